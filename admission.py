@@ -0,0 +1,234 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class Rejected(Exception):
+    """A request shed by admission control; status is 429 or 503, retry_after is in whole seconds"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(f"Request shed ({reason}), retry after {retry_after}s")
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def refill(tokens, updated_at, now, rate, burst):
+    return min(burst, tokens + (now - updated_at) * rate)
+
+
+def wait_seconds(tokens, rate):
+    """Whole seconds until a bucket holding `tokens` has one to spare"""
+    return max(1, math.ceil((1 - tokens) / rate))
+
+
+class MemoryBuckets:
+    """Token buckets for one process, with the least recently used client buckets dropped past max_keys"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, limits, now=None):
+        """Take one token from every (key, rate, burst) bucket, or none of them
+
+        Returns None when admitted, otherwise (index of the first empty bucket,
+        seconds until it refills one token).
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            levels = []
+            for index, (key, rate, burst) in enumerate(limits):
+                state = self._buckets.get(key)
+                tokens = burst if state is None else refill(state[0], state[1], now, rate, burst)
+                if tokens < 1:
+                    return index, wait_seconds(tokens, rate)
+                levels.append(tokens)
+            for (key, _, _), tokens in zip(limits, levels):
+                self._buckets[key] = (tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return None
+
+    def size(self):
+        return len(self._buckets)
+
+
+class SQLiteBuckets:
+    """Token buckets in a local SQLite file, so every worker process on the host draws from the same ones"""
+
+    def __init__(self, path, prune_every=1000):
+        self.path = path
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._takes = 0
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS admission_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Bucket levels are disposable: losing the last writes in a crash only refills some buckets
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, limits, now=None):
+        """Same contract as MemoryBuckets.take; wall-clock time, since processes share the buckets"""
+        now = time.time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            levels = []
+            for index, (key, rate, burst) in enumerate(limits):
+                row = conn.execute("SELECT tokens, updated_at FROM admission_buckets WHERE key = ?", (key,)).fetchone()
+                tokens = burst if row is None else refill(row[0], row[1], now, rate, burst)
+                if tokens < 1:
+                    conn.execute("ROLLBACK")
+                    return index, wait_seconds(tokens, rate)
+                levels.append(tokens)
+            conn.executemany(
+                "INSERT OR REPLACE INTO admission_buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                [(key, tokens - 1, now) for (key, _, _), tokens in zip(limits, levels)]
+            )
+            self._takes += 1
+            if self._takes % self.prune_every == 0:
+                # A bucket untouched for an hour is full again, which is the same as having no row
+                conn.execute("DELETE FROM admission_buckets WHERE updated_at < ?", (now - 3600,))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return None
+
+    def size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM admission_buckets").fetchone()[0]
+
+
+class AdmissionController:
+    """Token-bucket rate limits per client and overall, plus a cap on concurrent database sections
+
+    A rate of 0 disables that bucket and max_concurrent=0 disables the cap.
+    Requests over a client's own limit get 429; requests shed to protect the
+    database (global bucket or no free slot within queue_timeout) get 503.
+    The concurrency cap counts this process only, so a crashed worker can
+    never leak slots; budget it per worker.
+    """
+
+    def __init__(self, backend, client_rate=0.0, client_burst=10, global_rate=0.0, global_burst=100,
+                 max_concurrent=0, queue_timeout=0.05):
+        self.backend = backend
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.decisions = Counter()
+
+    def _count(self, outcome, reason):
+        with self._lock:
+            self.decisions[(outcome, reason)] += 1
+
+    def admit(self, client):
+        """Take a token for this client; raises Rejected when a bucket is empty"""
+        limits = []
+        if self.client_rate:
+            limits.append((f"client:{client}", self.client_rate, self.client_burst))
+        if self.global_rate:
+            limits.append(('global', self.global_rate, self.global_burst))
+        if not limits:
+            return
+        try:
+            refused = self.backend.take(limits)
+        except sqlite3.Error as e:
+            # A broken limiter store must not take the form down with it: fail open
+            logger.error(f"Admission backend failed, admitting without rate limits: {e}")
+            self._count('admitted', 'backend_error')
+            return
+        if refused is None:
+            self._count('admitted', 'rate')
+            return
+        index, retry_after = refused
+        if limits[index][0] == 'global':
+            self._count('shed', 'global_rate')
+            raise Rejected(503, 'global_rate', retry_after)
+        self._count('shed', 'client_rate')
+        raise Rejected(429, 'client_rate', retry_after)
+
+    @contextmanager
+    def db_slot(self):
+        """Hold one of max_concurrent database slots; raises Rejected if none frees up within queue_timeout"""
+        if self._slots is None:
+            yield
+            return
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count('shed', 'concurrency')
+            raise Rejected(503, 'concurrency', 1)
+        self._count('admitted', 'concurrency')
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def decision_counts(self):
+        with self._lock:
+            return dict(self.decisions)
+
+    def stats(self):
+        with self._lock:
+            decisions = {f"{outcome}_{reason}": count for (outcome, reason), count in sorted(self.decisions.items())}
+            in_flight = self._in_flight
+        return {
+            'client_rate': self.client_rate,
+            'client_burst': self.client_burst,
+            'global_rate': self.global_rate,
+            'global_burst': self.global_burst,
+            'max_concurrent': self.max_concurrent,
+            'in_flight': in_flight,
+            'tracked_buckets': self.backend.size(),
+            'decisions': decisions
+        }
+
+
+def create_admission(backend='memory', path='admission.db', max_clients=10000, **limits):
+    """AdmissionController on the named bucket backend; 'sqlite' shares the buckets between worker processes"""
+    if backend == 'sqlite':
+        return AdmissionController(SQLiteBuckets(path), **limits)
+    return AdmissionController(MemoryBuckets(max_keys=max_clients), **limits)
+
+
+def client_address(request, trusted_proxies=0):
+    """Address a (Flask or Quart) request's client bucket is keyed on
+
+    Behind trusted_proxies reverse proxies that each append to
+    X-Forwarded-For, the address the outermost proxy saw is used.
+    """
+    if trusted_proxies:
+        route = request.access_route
+        return route[max(0, len(route) - trusted_proxies)]
+    return request.remote_addr
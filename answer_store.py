@@ -0,0 +1,151 @@
+from form_options import ANSWER_OPTIONS, split_answer_values
+from submissions import select_list
+
+# Multi-select response group -> comma-joined column in desirability_form_responses
+ANSWER_GROUP_COLUMNS = {
+    'weekend': 'weekend_options',
+    'meeting': 'feel_meeting_new_people',
+    'vibe': 'vibe_selections',
+    'new_things': 'tried_new_activity_with_someone',
+    'blockers': 'meeting_blocker_to_meet_new_people',
+    'safe_fun': 'safe_fun_way_to',
+    'platform': 'platform_join_likey_to',
+    'challenges': 'challenges_you_face_when_trying_to_meet_new_people',
+    'features': 'likely_features_in_app',
+    'safety': 'safety_features_in_app',
+    'scenarios': 'scenarios_to_use_app_for'
+}
+
+RESPONSE_ANSWERS_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS response_answers (
+        response_id INT NOT NULL,
+        answer_group VARCHAR(32) NOT NULL,
+        option_id VARCHAR(255) NOT NULL,
+        PRIMARY KEY (response_id, answer_group, option_id),
+        INDEX idx_group_option (answer_group, option_id),
+        FOREIGN KEY (response_id) REFERENCES desirability_form_responses (id) ON DELETE CASCADE
+    )
+"""
+
+# Re-inserting an existing answer is a no-op, so backfills and replays can be repeated safely
+INSERT_ANSWER_SQL = """
+    INSERT INTO response_answers (response_id, answer_group, option_id) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE option_id = option_id
+"""
+
+
+def answer_rows(response_id, values_by_column):
+    """(response_id, group, option_id) tuples for one response, given its comma-joined columns"""
+    rows = []
+    for group, column in ANSWER_GROUP_COLUMNS.items():
+        for option_id in dict.fromkeys(split_answer_values(group, values_by_column.get(column))):
+            rows.append((response_id, group, option_id))
+    return rows
+
+
+def insert_answer_params(responses, columns):
+    """INSERT_ANSWER_SQL parameters for (response_id, row) pairs, rows being tuples in `columns` order"""
+    positions = {column: columns.index(column) for column in ANSWER_GROUP_COLUMNS.values()}
+    rows = []
+    for response_id, row in responses:
+        rows.extend(answer_rows(response_id, {column: row[i] for column, i in positions.items()}))
+    return rows
+
+
+def insert_answers(cursor, responses, columns):
+    """Write normalized answers for (response_id, row) pairs; call inside the insert transaction"""
+    rows = insert_answer_params(responses, columns)
+    if rows:
+        cursor.executemany(INSERT_ANSWER_SQL, rows)
+
+
+def backfill_answers(cursor, commit, batch_size=1000, schema='current'):
+    """Populate response_answers from the comma-joined columns of every existing response
+
+    Walks the table in primary-key order and commits after each batch, so it
+    can be interrupted and re-run. Returns the number of responses processed.
+    """
+    processed = 0
+    last_id = 0
+    while True:
+        cursor.execute(f"""
+            SELECT {select_list([('id', 'id'), *((column, column) for column in ANSWER_GROUP_COLUMNS.values())], schema)}
+            FROM desirability_form_responses
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """, (last_id, batch_size))
+        responses = cursor.fetchall()
+        if not responses:
+            return processed
+
+        rows = []
+        for response in responses:
+            rows.extend(answer_rows(response['id'], response))
+        if rows:
+            cursor.executemany(INSERT_ANSWER_SQL, rows)
+        commit()
+
+        processed += len(responses)
+        last_id = responses[-1]['id']
+
+
+# Respondent fields a multi-select group can be cross-tabulated against
+CROSSTAB_DIMENSIONS = ('gender', 'age', 'city', 'occupation')
+
+# Set-based aggregation over the normalized answers, answered from idx_group_option
+OPTION_COUNTS_SQL = """
+    SELECT option_id, COUNT(*) as count
+    FROM response_answers
+    WHERE answer_group = %s
+    GROUP BY option_id
+"""
+
+RESPONDENTS_SQL = """
+    SELECT COUNT(DISTINCT response_id) as respondents
+    FROM response_answers
+    WHERE answer_group = %s
+"""
+
+
+def crosstab_sql(by):
+    """Option counts per value of a respondent field; `by` must be one of CROSSTAB_DIMENSIONS"""
+    if by not in CROSSTAB_DIMENSIONS:
+        raise ValueError(f"Cannot cross-tabulate by {by!r}")
+    return f"""
+        SELECT a.option_id, r.{by} as segment, COUNT(*) as count
+        FROM response_answers a
+        JOIN desirability_form_responses r ON r.id = a.response_id
+        WHERE a.answer_group = %s
+        GROUP BY a.option_id, r.{by}
+    """
+
+
+def build_analytics(group, count_rows, respondents, by=None, crosstab_rows=()):
+    """Assemble the /answers/analytics payload from the rows of the queries above"""
+    counts = dict.fromkeys(ANSWER_OPTIONS.get(group, []), 0)
+    counts.update({row['option_id']: row['count'] for row in count_rows})
+
+    analytics = {
+        'group': group,
+        'respondents': respondents,
+        'options': [
+            {'option_id': option_id, 'count': count}
+            for option_id, count in sorted(counts.items(), key=lambda item: -item[1])
+        ]
+    }
+
+    if by:
+        crosstab = {option_id: {} for option_id in counts}
+        segments = set()
+        for row in crosstab_rows:
+            segment = row['segment'] or 'unknown'
+            segments.add(segment)
+            option_counts = crosstab.setdefault(row['option_id'], {})
+            option_counts[segment] = option_counts.get(segment, 0) + row['count']
+        analytics['crosstab'] = {
+            'by': by,
+            'segments': sorted(segments),
+            'counts': crosstab
+        }
+    return analytics
@@ -0,0 +1,764 @@
+"""Asyncio deployment of the form service: Quart on an ASGI server
+
+Serves the same routes and JSON bodies as flask_app.py, from the same
+settings.py environment and the same storage.ResponseRepository, so
+STORAGE_ENGINE, admission control, duplicate suppression, the spool, ETags
+and the response cache all behave as they do there. This is a thread-offloaded
+shim, not an asyncio-native database stack: repository calls are synchronous
+and run on a thread pool sized to the connection pool, so the event loop keeps
+accepting requests while they wait, but database concurrency is still
+DB_POOL_MAX_SIZE. Exports stream from their own smaller pool and threads
+(ASGI_EXPORT_CONCURRENCY), so long downloads cannot take every database slot.
+Needs the extra packages in requirements-asgi.txt, then run it with e.g.
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5501
+    uvicorn asgi_app:app --port 5501
+
+Write-behind (SUBMIT_WRITE_BEHIND) is only available on flask_app.py.
+"""
+from quart import Quart, request, jsonify, render_template, Response, abort, url_for, g, make_response
+from quart.wrappers.response import DataBody
+import asyncio
+import functools
+import logging
+import traceback
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from json_provider import FastJSONProvider, Rows
+from storage import DATABASE_ERRORS, ResponseRepository, create_engine, error_message, is_unavailable
+from submissions import (MAX_IDEMPOTENCY_KEY_LENGTH, build_submission_row, encode_page_cursor, decode_page_cursor,
+                         flatten_powerbi_rows, gzip_chunks, stream_text_export, submission_identity)
+from submission_schema import validate_submission
+from submission_spool import SubmissionSpool
+from admission import Rejected, client_address, create_admission
+from totals import RowCounter, TTLCache
+from static_assets import AssetManifest, RenderedPage
+from email_search import MATCH_MODES, email_filter_clause
+from conditional import request_validators, set_validators
+from columnar_export import COLUMNAR_FORMATS, columnar_available, stream_columnar
+from response_cache import create_response_cache
+from answer_store import ANSWER_GROUP_COLUMNS, CROSSTAB_DIMENSIONS
+from settings import (DB_CONFIG, POOL_CONFIG, STORAGE_ENGINE, SQLITE_PATH, SQLITE_CONFIG, USE_ORJSON,
+                      TOTAL_REFRESH_INTERVAL, FILTERED_TOTAL_TTL, RESPONSE_CACHE_TTLS, RESPONSE_CACHE_CONFIG,
+                      EXPORT_CHUNK_ROWS, POWERBI_ID_OVERLAP, SPOOL_PATH, SPOOL_CONFIG, ADMISSION_CONFIG,
+                      ADMISSION_BACKEND_CONFIG, TRUSTED_PROXIES, DEDUPE_RETENTION, DEDUPE_BY_CONTENT,
+                      DEDUPE_MAX_ENTRIES, ASGI_EXPORT_CONCURRENCY)
+
+app = Quart(__name__, static_folder='static', template_folder='templates')
+app.json = FastJSONProvider(app, use_orjson=USE_ORJSON)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+storage_engine = create_engine(
+    STORAGE_ENGINE,
+    connect_kwargs=DB_CONFIG,
+    pool_config=POOL_CONFIG,
+    sqlite_path=SQLITE_PATH,
+    sqlite_config=SQLITE_CONFIG
+)
+
+repository = ResponseRepository(storage_engine)
+
+# One event loop multiplexes every in-flight request; only database work takes one of these threads,
+# and there is one per pooled connection so a thread never waits on the pool
+db_executor = ThreadPoolExecutor(max_workers=POOL_CONFIG['max_size'], thread_name_prefix='db')
+
+# An export holds a thread and a connection for the whole download, so exports get their own (smaller) pool and
+# threads, and any beyond ASGI_EXPORT_CONCURRENCY are turned away rather than queued
+export_engine = create_engine(
+    STORAGE_ENGINE,
+    connect_kwargs=DB_CONFIG,
+    pool_config=dict(POOL_CONFIG, min_size=0, max_size=ASGI_EXPORT_CONCURRENCY),
+    sqlite_path=SQLITE_PATH,
+    sqlite_config=dict(SQLITE_CONFIG, group_commit=False)
+)
+export_repository = ResponseRepository(export_engine)
+export_executor = ThreadPoolExecutor(max_workers=ASGI_EXPORT_CONCURRENCY, thread_name_prefix='export')
+export_slots = threading.BoundedSemaphore(ASGI_EXPORT_CONCURRENCY)
+
+async def run_db(function, *args, executor=db_executor):
+    """Run a blocking repository call on the database threads and await its result"""
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+def with_cursor(work, *args):
+    """Call work(cursor, *args) on a connection of the configured engine and release it (on a database thread)"""
+    conn = repository.connect()
+    cursor = conn.cursor()
+    try:
+        return work(cursor, *args)
+    finally:
+        cursor.close()
+        conn.close()
+
+def init_database():
+    """Initialize the database and create tables if they don't exist"""
+    conn = repository.connect()
+    cursor = conn.cursor()
+    try:
+        repository.init_schema(cursor)
+        conn.commit()
+        logger.info("Database table initialized successfully")
+    except DATABASE_ERRORS as e:
+        logger.error(f"Failed to initialize database: {e}")
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+# Unfiltered total maintained in-process, and filtered totals cached per filter
+response_total = RowCounter(refresh_interval=TOTAL_REFRESH_INTERVAL)
+filtered_totals = TTLCache(ttl=FILTERED_TOTAL_TTL)
+
+# Read-endpoint response cache, invalidated by every successful write
+response_cache = create_response_cache(**RESPONSE_CACHE_CONFIG)
+
+def table_watermark(cursor):
+    """Version of the responses table for ETags: (max id, row count), plus the newest submission_date"""
+    max_id, last_modified = repository.watermark(cursor)
+    total = response_total.get(lambda: repository.count_responses(cursor))
+    return (max_id, total), last_modified
+
+def insert_submissions(rows):
+    """Insert a batch of spooled submission rows with one multi-row INSERT and one commit"""
+    new_rows = repository.save_submissions(rows)
+    if new_rows:
+        response_total.add(len(new_rows))
+        response_cache.invalidate()
+
+submission_spool = None
+if SPOOL_PATH:
+    submission_spool = SubmissionSpool(SPOOL_PATH, insert_submissions, retryable=is_unavailable, **SPOOL_CONFIG)
+
+admission = create_admission(**ADMISSION_BACKEND_CONFIG, **ADMISSION_CONFIG)
+
+recent_submissions = TTLCache(ttl=DEDUPE_RETENTION, max_entries=DEDUPE_MAX_ENTRIES)
+
+@app.before_serving
+async def start_storage():
+    """Create or migrate the schema, pre-open pooled connections and start replaying the spool"""
+    try:
+        await run_db(init_database)
+        await run_db(storage_engine.warm_up)
+    except Exception as e:
+        logger.error(f"Failed to initialize database on startup: {e}")
+    if submission_spool is not None:
+        submission_spool.start()
+
+@app.after_serving
+async def stop_storage():
+    if submission_spool is not None:
+        await run_db(submission_spool.stop)
+    await run_db(storage_engine.close)
+    await run_db(export_engine.close, executor=export_executor)
+
+@app.after_request
+async def add_cors_headers(response):
+    """Same open CORS policy flask_cors applies to the WSGI app"""
+    response.headers.setdefault('Access-Control-Allow-Origin', '*')
+    return response
+
+def conditional_response(view):
+    """conditional.conditional_response for async views, with the watermark read on a database thread"""
+    @functools.wraps(view)
+    async def wrapper(*args, **kwargs):
+        try:
+            version, last_modified = await run_db(with_cursor, table_watermark)
+        except Exception as e:
+            logger.warning(f"Could not read data watermark, serving without validators: {e}")
+            return await view(*args, **kwargs)
+
+        g.data_version = version
+        etag, last_modified, not_modified = request_validators(request, version, last_modified)
+        if not_modified:
+            response = await make_response('', 304)
+        else:
+            response = await make_response(await view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        return set_validators(response, etag, last_modified)
+    return wrapper
+
+def cached(ttl):
+    """ResponseCache.cached for async views; only 200 responses with a buffered body are stored"""
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            key = response_cache.key(request, g.get('data_version'))
+            entry = response_cache.lookup(key)
+            if entry is not None:
+                body, status, headers = entry
+                response = await make_response(body, status)
+                response.headers.update(headers)
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = await make_response(await view(*args, **kwargs))
+            if response.status_code == 200 and isinstance(response.response, DataBody):
+                response_cache.store(key, await response.get_data(), response.status_code, response.headers, ttl)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+def client_ip():
+    """Address admission control keys the client's bucket on"""
+    return client_address(request, TRUSTED_PROXIES)
+
+def shed_response(rejected):
+    """Fast 429/503 for a submission turned away by admission control"""
+    response = jsonify({
+        'success': False,
+        'error': ('Too many submissions, please retry shortly' if rejected.status == 429
+                  else 'Server is busy, please retry shortly')
+    })
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response, rejected.status
+
+def remember_submission(dedupe_key, submission_id, submission_key):
+    if dedupe_key is not None and DEDUPE_RETENTION > 0:
+        recent_submissions.set(dedupe_key, (submission_id, submission_key))
+
+def duplicate_response(submission_id, submission_key):
+    """Answer a repeated submission with the one already accepted, without writing again"""
+    return jsonify({
+        'success': True,
+        'message': 'Form already submitted',
+        'submission_id': submission_id,
+        'submission_key': submission_key,
+        'duplicate': True
+    })
+
+def save_submission(row):
+    """Insert a submission unless its key is already stored, inside an admission slot; returns (id, created)"""
+    with admission.db_slot():
+        submission_id, created = repository.save_submission_once(row)
+    if created:
+        response_total.add()
+        response_cache.invalidate()
+    return submission_id, created
+
+# Fingerprinted, precompressed copies of static/ written by `flask --app flask_app build-assets`
+static_assets = AssetManifest(os.getenv('ASSET_BUILD_DIR', os.path.join(app.static_folder, 'dist')))
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file: its fingerprinted build when there is one, the plain static route otherwise"""
+    built_path = None if app.debug else static_assets.hashed_path(filename)
+    if built_path is None:
+        return url_for('static', filename=filename)
+    return url_for('serve_asset', filename=built_path)
+
+@app.route('/assets/<path:filename>')
+async def serve_asset(filename):
+    """Serve a fingerprinted asset from memory, precompressed and cacheable forever"""
+    result = static_assets.respond(filename, request.accept_encodings, request.if_none_match)
+    if result is None:
+        abort(404)
+    body, status, headers = result
+    return Response(body, status, headers)
+
+# index.html takes no per-request context, so it is rendered once and served precompressed
+index_page = RenderedPage(os.path.join(app.root_path, app.template_folder, 'index.html'))
+
+@app.route('/')
+async def index():
+    """Serve the main index.html page"""
+    # Re-render when the template changes during development
+    if index_page.stale(check_source=app.debug or bool(app.config.get('TEMPLATES_AUTO_RELOAD'))):
+        index_page.store(await render_template('index.html'))
+    body, status, headers = index_page.respond(request.accept_encodings, request.if_none_match)
+    return Response(body, status, headers)
+
+@app.route('/submit', methods=['POST'])
+async def handle_form_submission():
+    try:
+        # Shed over-limit clients before parsing anything
+        admission.admit(client_ip())
+
+        form_data = await request.get_json(silent=True)
+        logger.info("Form submission received")
+        logger.debug(f"Full submission data: {form_data}")
+
+        # Reject malformed payloads before they reach the spool or a pooled connection
+        errors = validate_submission(form_data)
+        if errors:
+            logger.info(f"Rejected submission: {'; '.join(errors)}")
+            return jsonify({
+                'success': False,
+                'error': f"Invalid submission: {errors[0]}",
+                'errors': errors
+            }), 400
+
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({
+                'success': False,
+                'error': f"Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+            }), 400
+
+        # Double clicks and retries after a slow response get the original submission back
+        submission_key, dedupe_key = submission_identity(form_data, idempotency_key, client_ip(), DEDUPE_RETENTION,
+                                                         DEDUPE_BY_CONTENT)
+        if dedupe_key is not None:
+            original = recent_submissions.peek(dedupe_key)
+            if original is not None:
+                logger.info(f"Duplicate submission {submission_key} answered from memory")
+                return duplicate_response(*original)
+
+        row = build_submission_row(form_data, submission_key)
+
+        try:
+            # Insert data and commit (batched with concurrent submissions on SQLite)
+            submission_id, created = await run_db(save_submission, row)
+        except DATABASE_ERRORS as e:
+            # The database is down or saturated: keep the response in the local spool instead of losing it
+            if submission_spool is None or not is_unavailable(e):
+                raise
+            logger.warning(f"Database unavailable, spooling submission {submission_key}: {e}")
+            await run_db(submission_spool.append, submission_key, row)
+            remember_submission(dedupe_key, submission_key, submission_key)
+            return jsonify({
+                'success': True,
+                'message': 'Form submission accepted',
+                'submission_id': submission_key,
+                'spooled': True
+            }), 202
+
+        remember_submission(dedupe_key, submission_id, submission_key)
+        if not created:
+            logger.info(f"Duplicate submission {submission_key} matched response {submission_id}")
+            return duplicate_response(submission_id, submission_key)
+        return jsonify({
+            'success': True,
+            'message': 'Form submitted successfully',
+            'submission_id': submission_id,
+            'submission_key': submission_key
+        })
+
+    except Rejected as e:
+        logger.info(f"Submission from {client_ip()} shed: {e}")
+        return shed_response(e)
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {e}")
+        return jsonify({
+            'success': False,
+            'error': f"Database error: {error_message(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}\n{traceback.format_exc()}")
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'traceback': traceback.format_exc()
+        }), 500
+
+def read_answers_page(cursor, email_filter, email_match, email_clause, after_key, limit, offset, include_total):
+    """One /answers page and its total (None unless include_total)"""
+    results = repository.list_responses(cursor, email_clause, after_key, limit, offset)
+    total_count = None
+    if include_total:
+        if email_filter:
+            total_count = filtered_totals.get(
+                ('email', email_match, email_filter),
+                lambda: repository.count_responses(cursor, email_clause)
+            )
+        else:
+            total_count = response_total.get(lambda: repository.count_responses(cursor))
+    return results, total_count
+
+@app.route('/answers', methods=['GET'])
+@conditional_response
+async def get_answers_route():
+    """Get all form responses from database"""
+    try:
+        # Get query parameters for filtering/pagination
+        limit = request.args.get('limit', 100, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        email_filter = request.args.get('email', '')
+        email_match = request.args.get('email_match', 'contains').lower()
+        if email_match not in MATCH_MODES:
+            return jsonify({
+                'success': False,
+                'error': f"email_match must be one of: {', '.join(MATCH_MODES)}"
+            }), 400
+        after = request.args.get('after', '')
+        include_total = request.args.get('include_total', 'true').lower() not in ('0', 'false', 'no')
+
+        # Keyset pagination: `after` is the next_cursor of the previous page
+        after_key = None
+        if after:
+            try:
+                after_key = decode_page_cursor(after)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid pagination cursor'
+                }), 400
+
+        email_clause = None
+        if email_filter:
+            email_clause = email_filter_clause(email_filter, email_match, repository.fulltext_available)
+        results, total_count = await run_db(with_cursor, read_answers_page, email_filter, email_match, email_clause,
+                                            after_key, limit, offset, include_total)
+
+        next_cursor = None
+        if results and len(results) == limit:
+            next_cursor = encode_page_cursor(results[-1])
+
+        return jsonify({
+            'success': True,
+            'data': results,
+            'pagination': {
+                'total': total_count,
+                'limit': limit,
+                'offset': 0 if after_key else offset,
+                'count': len(results),
+                'next_cursor': next_cursor
+            }
+        })
+
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Database error: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/answers/<int:response_id>', methods=['GET'])
+@conditional_response
+@cached(ttl=RESPONSE_CACHE_TTLS['single_answer'])
+async def get_single_answer(response_id):
+    """Get a specific form response by ID"""
+    try:
+        result = await run_db(with_cursor, repository.get_response, response_id)
+
+        if result:
+            return jsonify({
+                'success': True,
+                'data': result
+            })
+        return jsonify({
+            'success': False,
+            'error': 'Response not found'
+        }), 404
+
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Database error: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/answers/summary', methods=['GET'])
+@conditional_response
+@cached(ttl=RESPONSE_CACHE_TTLS['summary'])
+async def get_answers_summary():
+    """Get summary statistics of form responses"""
+    try:
+        # O(1) read from the rollup tables maintained at insert time
+        summary = await run_db(with_cursor, repository.summary)
+
+        return jsonify({
+            'success': True,
+            'summary': summary
+        })
+
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Database error: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/answers/analytics', methods=['GET'])
+@conditional_response
+@cached(ttl=RESPONSE_CACHE_TTLS['analytics'])
+async def get_answers_analytics():
+    """Per-option pick counts for a multi-select group, optionally cross-tabbed by a respondent field"""
+    try:
+        group = request.args.get('group', '')
+        by = request.args.get('by', '')
+        if group not in ANSWER_GROUP_COLUMNS:
+            return jsonify({
+                'success': False,
+                'error': f"group must be one of: {', '.join(ANSWER_GROUP_COLUMNS)}"
+            }), 400
+        if by and by not in CROSSTAB_DIMENSIONS:
+            return jsonify({
+                'success': False,
+                'error': f"by must be one of: {', '.join(CROSSTAB_DIMENSIONS)}"
+            }), 400
+
+        analytics = await run_db(with_cursor, repository.analytics, group, by)
+
+        return jsonify({
+            'success': True,
+            'analytics': analytics
+        })
+
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Database error: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def open_export():
+    """(conn, cursor) from the export pool with a streaming tuple cursor positioned on the full export"""
+    conn = export_repository.connect()
+    try:
+        return conn, export_repository.export_cursor(conn)
+    except BaseException:
+        conn.close()
+        raise
+
+def close_export(chunks, conn, cursor):
+    try:
+        chunks.close()
+    finally:
+        cursor.close()
+        conn.close()
+
+async def export_chunks(chunks, conn, cursor):
+    """Drive the synchronous export generator one chunk at a time on an export thread, then release it and its slot"""
+    step = None
+    try:
+        # Handed back to export_data, which primes the generator so this finally always runs
+        yield b''
+        while True:
+            step = asyncio.ensure_future(run_db(next, chunks, None, executor=export_executor))
+            chunk = await asyncio.shield(step)
+            if chunk is None:
+                break
+            yield chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+    finally:
+        if step is not None and not step.done():
+            # A disconnected client must not close the generator while a fetch is still running on its thread
+            await asyncio.wait([step])
+        try:
+            await run_db(close_export, chunks, conn, cursor, executor=export_executor)
+        finally:
+            export_slots.release()
+
+@app.route('/api/data/export', methods=['GET'])
+@conditional_response
+async def export_data():
+    """Export all data as CSV, JSON, Parquet or Arrow for PowerBI, streamed from a server-side cursor"""
+    try:
+        format_type = request.args.get('format', 'json').lower()
+
+        columnar = format_type in COLUMNAR_FORMATS
+        if columnar and not columnar_available():
+            return jsonify({
+                'success': False,
+                'error': f"format={format_type} requires pyarrow to be installed on the server"
+            }), 501
+
+        if not export_slots.acquire(blocking=False):
+            response = jsonify({
+                'success': False,
+                'error': 'Too many exports in progress, please retry shortly'
+            })
+            response.headers['Retry-After'] = '1'
+            return response, 503
+
+        # Streaming tuple cursor: rows are read from the database as the response is sent
+        try:
+            conn, cursor = await run_db(open_export, executor=export_executor)
+        except BaseException:
+            export_slots.release()
+            raise
+
+        if columnar:
+            chunks = stream_columnar(cursor, format_type, EXPORT_CHUNK_ROWS)
+        else:
+            chunks = stream_text_export(cursor, format_type, app.json.dumps, EXPORT_CHUNK_ROWS)
+
+        # Parquet and Arrow are already compact binary formats, so only text formats are gzipped
+        gzip_enabled = not columnar and 'gzip' in request.accept_encodings
+        if gzip_enabled:
+            chunks = gzip_chunks(chunks)
+
+        # The response owns the cursor and connection from here and releases them when closed
+        body = export_chunks(chunks, conn, cursor)
+        await body.asend(None)
+
+        if columnar:
+            mimetype, filename = COLUMNAR_FORMATS[format_type]
+            response = Response(
+                body,
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        elif format_type == 'csv':
+            response = Response(
+                body,
+                mimetype='text/csv',
+                headers={'Content-Disposition': 'attachment; filename=form_responses.csv'}
+            )
+        else:  # JSON format (default)
+            response = Response(body, mimetype='application/json')
+
+        response.headers['Vary'] = 'Accept-Encoding'
+        if gzip_enabled:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Database error: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def read_powerbi_rows(query, params):
+    """(columns, tuple rows) of the Power BI query, read through a buffered tuple cursor"""
+    conn = repository.connect()
+    cursor = repository.tuple_cursor(conn)
+    try:
+        cursor.execute(query, params)
+        return [column[0] for column in cursor.description], cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.route('/api/data/powerbi', methods=['GET'])
+@conditional_response
+@cached(ttl=RESPONSE_CACHE_TTLS['powerbi'])
+async def powerbi_endpoint():
+    """Specialized endpoint for PowerBI with flattened data structure"""
+    try:
+        # Incremental refresh: rows past the client's since_id watermark, re-reading POWERBI_ID_OVERLAP ids below it
+        # so late commits are not skipped (since only picks a first-load start)
+        since_id = request.args.get('since_id', '')
+        since = request.args.get('since', '')
+        try:
+            query, params = repository.powerbi_query(since_id, since, POWERBI_ID_OVERLAP)
+        except ValueError:
+            return jsonify({
+                'error': 'since_id must be an integer and since an ISO 8601 timestamp'
+            }), 400
+
+        columns, rows = await run_db(read_powerbi_rows, query, params)
+
+        # Split the timestamp into date and time columns in Python rather than per row in SQL
+        columns, rows, next_watermark = flatten_powerbi_rows(columns, rows, since_id)
+        return jsonify({
+            'value': Rows(columns, rows),
+            'next_watermark': next_watermark
+        })
+
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
+        return jsonify({
+            'error': f"Database error: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+@app.route('/init-db', methods=['POST'])
+async def init_db_route():
+    """Manual database initialization endpoint"""
+    try:
+        await run_db(init_database)
+        return jsonify({
+            'success': True,
+            'message': 'Database initialized successfully',
+            'database_engine': STORAGE_ENGINE,
+            'database_host': storage_engine.describe()['host'],
+            'database_name': storage_engine.describe()['database']
+        })
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def read_health(cursor):
+    """(table_exists, record_count) for /health"""
+    table_exists = repository.table_exists(cursor)
+    record_count = 0
+    if table_exists:
+        record_count = response_total.get(lambda: repository.count_responses(cursor))
+    return table_exists, record_count
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    """Health check endpoint with database info"""
+    try:
+        table_exists, record_count = await run_db(with_cursor, read_health)
+
+        return jsonify({
+            'status': 'healthy',
+            'database': {
+                **storage_engine.describe(),
+                'connection': 'successful',
+                'table_exists': table_exists,
+                'record_count': record_count
+            },
+            'pool': storage_engine.stats(),
+            'export_pool': export_engine.stats(),
+            'write_behind': None,
+            'spool': submission_spool.stats() if submission_spool else None,
+            'response_cache': response_cache.stats(),
+            'admission': admission.stats()
+        })
+
+    except DATABASE_ERRORS as e:
+        return jsonify({
+            'status': 'error',
+            'database': {
+                **storage_engine.describe(),
+                'connection': 'failed',
+                'error': f"Database Error: {str(e)}"
+            },
+            'pool': storage_engine.stats(),
+            'write_behind': None,
+            'spool': submission_spool.stats() if submission_spool else None,
+            'response_cache': response_cache.stats()
+        }), 500
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'error': str(e)
+        }), 500
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=int(os.getenv('PORT', 5501)))
@@ -0,0 +1,150 @@
+"""Compare /answers email search strategies on a large copy of the responses table
+
+Seeds a scratch table (desirability_form_responses_bench, created LIKE the
+real table so it carries the same indexes) and times each filter returned by
+email_search.email_filter_clause against the leading-wildcard LIKE baseline.
+The FULLTEXT contains path is also checked row for row against plain LIKE on
+terms with LIKE wildcards and punctuation; any difference exits non-zero.
+The target database (DB_* variables, as for flask_app.py) must already hold
+desirability_form_responses with its indexes; POST /init-db creates them.
+
+    python benchmarks/bench_email_search.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import time
+
+import pymysql
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from email_search import email_filter_clause  # noqa: E402
+
+BENCH_TABLE = 'desirability_form_responses_bench'
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com', 'icloud.com', 'proton.me']
+
+
+def connect():
+    load_dotenv()
+    return pymysql.connect(
+        host=os.getenv('DB_HOST', '127.0.0.1'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', ''),
+        database=os.getenv('DB_NAME', 'desirability_bench'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def random_email(rng):
+    name = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+    return f"{name}{rng.randint(1, 9999)}@{rng.choice(DOMAINS)}"
+
+
+def seed(conn, rows, batch_size=5000):
+    """Recreate the scratch table and fill it with `rows` random emails"""
+    rng = random.Random(42)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    cursor.execute(f"CREATE TABLE {BENCH_TABLE} LIKE desirability_form_responses")
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        batch = [(f"User {i}", random_email(rng), f"bench-{i}") for i in range(start, min(start + batch_size, rows))]
+        cursor.executemany(
+            f"INSERT INTO {BENCH_TABLE} (full_name, email, submission_key) VALUES (%s, %s, %s)",
+            batch
+        )
+        conn.commit()
+    cursor.execute(f"ANALYZE TABLE {BENCH_TABLE}")
+    cursor.fetchall()
+    print(f"Seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+    cursor.execute(f"SELECT email FROM {BENCH_TABLE} ORDER BY RAND(42) LIMIT 5")
+    return [row['email'] for row in cursor.fetchall()]
+
+
+def time_query(cursor, where, params, repeat, ignore_index=False):
+    """Median COUNT(*) latency in ms for a filter, optionally forcing a scan past idx_email"""
+    hint = " IGNORE INDEX (idx_email)" if ignore_index else ""
+    timings = []
+    count = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cursor.execute(f"SELECT COUNT(*) as total FROM {BENCH_TABLE}{hint} WHERE {where}", params)
+        count = cursor.fetchone()['total']
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), count
+
+
+def matching_ids(cursor, where, params):
+    cursor.execute(f"SELECT id FROM {BENCH_TABLE} WHERE {where}", params)
+    return {row['id'] for row in cursor.fetchall()}
+
+
+def check_terms(email):
+    """Contains terms built from a stored email that the ngram phrase search cannot take literally"""
+    local_part, domain = email.split('@')
+    return [
+        f"{local_part[:2]}_{local_part[3:5]}",
+        f"{local_part[:2]}%{local_part[-2:]}",
+        f"_{local_part[1:4]}",
+        f"{local_part[-3:]}@{domain[:3]}",
+        f"@{domain}",
+        f".{domain.split('.')[-1]}",
+        f"{local_part[:3]}\\{local_part[3:5]}"
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--skip-seed', action='store_true', help='reuse the existing scratch table')
+    args = parser.parse_args()
+
+    conn = connect()
+    cursor = conn.cursor()
+    if args.skip_seed:
+        cursor.execute(f"SELECT email FROM {BENCH_TABLE} ORDER BY RAND(42) LIMIT 5")
+        samples = [row['email'] for row in cursor.fetchall()]
+    else:
+        samples = seed(conn, args.rows)
+
+    mismatches = []
+    print(f"{'mode':<22}{'term':<32}{'median ms':>12}{'rows':>10}")
+    for email in samples:
+        local_part = email.split('@')[0]
+        substring = local_part[2:7]
+        cases = [
+            ('exact (scan)', *email_filter_clause(email, 'exact'), True),
+            ('exact (index)', *email_filter_clause(email, 'exact'), False),
+            ('prefix (scan)', *email_filter_clause(local_part[:4], 'prefix'), True),
+            ('prefix (index)', *email_filter_clause(local_part[:4], 'prefix'), False),
+            ('contains (LIKE)', *email_filter_clause(substring, 'contains'), False),
+            ('contains (FULLTEXT)', *email_filter_clause(substring, 'contains', fulltext=True), False),
+        ]
+        counts = {}
+        for label, where, params, ignore_index in cases:
+            elapsed, counts[label] = time_query(cursor, where, params, args.repeat, ignore_index)
+            print(f"{label:<22}{str(params[-1])[:30]:<32}{elapsed:>12.2f}{counts[label]:>10}")
+
+        # The FULLTEXT path must return exactly the rows the LIKE scan returns
+        for term in [substring, *check_terms(email)]:
+            expected = matching_ids(cursor, *email_filter_clause(term, 'contains'))
+            actual = matching_ids(cursor, *email_filter_clause(term, 'contains', fulltext=True))
+            if expected != actual:
+                mismatches.append(term)
+                print(f"MISMATCH for {term!r}: LIKE={len(expected)} FULLTEXT={len(actual)} rows")
+        print()
+
+    conn.close()
+    if mismatches:
+        raise SystemExit(f"{len(mismatches)} contains terms differ between LIKE and FULLTEXT")
+
+
+if __name__ == '__main__':
+    main()
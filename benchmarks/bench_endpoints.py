@@ -0,0 +1,309 @@
+"""Load-test every route of a running server and record latency, throughput and query counts
+
+Seeds desirability_form_responses (plus response_answers and the summary
+rollups) with realistic submissions, then drives each route with a fixed
+number of concurrent clients. Start the server against the same database
+first; the DB_* variables are read exactly as flask_app.py reads them. All
+load comes from one address, so leave the per-client submission limit
+(ADMISSION_CLIENT_RATE) unset or /submit will mostly measure 429s.
+
+    DB_NAME=desirability_bench gunicorn -w 4 flask_app:app -b 127.0.0.1:5501 &
+    python benchmarks/bench_endpoints.py --url http://127.0.0.1:5501 --rows 50000 \\
+        --concurrency 32 --output results/baseline.json
+    python benchmarks/bench_endpoints.py --skip-seed --compare results/baseline.json ...
+
+DB query counts are the growth of MySQL's global `Questions` status over
+each route's run, so keep other clients off the benchmark database.
+
+Against a server started with STORAGE_ENGINE=sqlite, pass the same file with
+--sqlite instead; SQLite has no server-wide query counter, so q/req is blank.
+
+    STORAGE_ENGINE=sqlite SQLITE_PATH=bench.db gunicorn -w 1 --threads 16 flask_app:app -b 127.0.0.1:5501 &
+    python benchmarks/bench_endpoints.py --sqlite bench.db --rows 50000
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pymysql
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from submissions import INSERT_COLUMNS, INSERT_RESPONSE_SQL, SUBMISSION_KEY_INDEX, build_submission_row  # noqa: E402
+from answer_store import ANSWER_GROUP_COLUMNS, insert_answers  # noqa: E402
+from rollups import rebuild_rollups  # noqa: E402
+from storage import ResponseRepository, SQLiteEngine  # noqa: E402
+from payloads import generate_submission  # noqa: E402
+
+SUBMISSION_DATE_INDEX = INSERT_COLUMNS.index('submission_date')
+
+
+def connect(sqlite_path=None):
+    if sqlite_path:
+        # Same translation layer the server uses, creating the tables if the file is new
+        repository = ResponseRepository(SQLiteEngine(sqlite_path, group_commit=False))
+        conn = repository.connect()
+        cursor = conn.cursor()
+        repository.init_schema(cursor)
+        conn.commit()
+        cursor.close()
+        return conn
+
+    load_dotenv()
+    return pymysql.connect(
+        host=os.getenv('DB_HOST', '127.0.0.1'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', ''),
+        database=os.getenv('DB_NAME', 'desirability_bench'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor
+    )
+
+
+def seed(conn, rows, batch_size=2000):
+    """Insert `rows` generated submissions spread over the last 90 days, then rebuild the rollups"""
+    rng = random.Random(42)
+    cursor = conn.cursor()
+    now = datetime.now()
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        batch = []
+        for _ in range(min(batch_size, rows - start)):
+            row = list(build_submission_row(generate_submission(rng), uuid.uuid4().hex))
+            row[SUBMISSION_DATE_INDEX] = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            batch.append(tuple(row))
+        cursor.executemany(INSERT_RESPONSE_SQL, batch)
+        keys = [row[SUBMISSION_KEY_INDEX] for row in batch]
+        cursor.execute(f"""
+            SELECT id, submission_key FROM desirability_form_responses
+            WHERE submission_key IN ({', '.join(['%s'] * len(keys))})
+        """, keys)
+        ids = {result['submission_key']: result['id'] for result in cursor.fetchall()}
+        insert_answers(cursor, [(ids[row[SUBMISSION_KEY_INDEX]], row) for row in batch], INSERT_COLUMNS)
+        conn.commit()
+    rebuild_rollups(cursor)
+    conn.commit()
+    if isinstance(conn, pymysql.connections.Connection):
+        cursor.execute("ANALYZE TABLE desirability_form_responses, response_answers")
+        cursor.fetchall()
+    else:
+        cursor.execute("ANALYZE")
+    print(f"Seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+
+def sample_targets(conn):
+    """Ids and email fragments that exist, for the parameterised routes"""
+    cursor = conn.cursor()
+    random_order = 'RAND(42)' if isinstance(conn, pymysql.connections.Connection) else 'RANDOM()'
+    cursor.execute(f"SELECT id, email FROM desirability_form_responses ORDER BY {random_order} LIMIT 200")
+    rows = cursor.fetchall()
+    if not rows:
+        raise SystemExit("desirability_form_responses is empty; run without --skip-seed first")
+    return [row['id'] for row in rows], [row['email'].split('@')[0][:4] for row in rows if row['email']]
+
+
+def query_count(conn):
+    """MySQL's server-wide statement counter, or None on SQLite"""
+    if not isinstance(conn, pymysql.connections.Connection):
+        return None
+    cursor = conn.cursor()
+    cursor.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+    return int(cursor.fetchone()['Value'])
+
+
+def build_routes(ids, email_terms):
+    """(name, request factory) pairs; each factory returns (method, path, json body or None)"""
+    groups = list(ANSWER_GROUP_COLUMNS)
+    return [
+        ('submit', lambda rng: ('POST', '/submit', generate_submission(rng))),
+        ('answers', lambda rng: ('GET', '/answers?limit=100', None)),
+        ('answers_email', lambda rng: ('GET', f"/answers?limit=100&email={rng.choice(email_terms)}", None)),
+        ('answers_by_id', lambda rng: ('GET', f"/answers/{rng.choice(ids)}", None)),
+        ('summary', lambda rng: ('GET', '/answers/summary', None)),
+        ('analytics', lambda rng: ('GET', f"/answers/analytics?group={rng.choice(groups)}&by=age", None)),
+        ('powerbi', lambda rng: ('GET', '/api/data/powerbi', None)),
+        ('export_json', lambda rng: ('GET', '/api/data/export?format=json', None)),
+        ('export_csv', lambda rng: ('GET', '/api/data/export?format=csv', None)),
+        ('health', lambda rng: ('GET', '/health', None))
+    ]
+
+
+def send(base_url, method, path, body):
+    """Issue one request, read the whole body, and return (status, elapsed seconds)"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def run_route(base_url, make_request, requests, concurrency, seed_value):
+    """Fire `requests` requests from `concurrency` threads; returns latencies and status counts"""
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def worker(worker_id):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            status, elapsed = send(base_url, *make_request(rng))
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+def summarize(latencies, statuses, wall_time, queries):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None  # noqa: E731
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'status_counts': {str(status): count for status, count in sorted(statuses.items())},
+        'wall_time_s': round(wall_time, 3),
+        'throughput_rps': round(len(latencies) / wall_time, 2) if wall_time else None,
+        'latency_ms': {
+            'p50': ms(percentile(ordered, 50)),
+            'p95': ms(percentile(ordered, 95)),
+            'p99': ms(percentile(ordered, 99)),
+            'mean': ms(statistics.fmean(ordered)) if ordered else None,
+            'max': ms(ordered[-1]) if ordered else None
+        },
+        'db_queries': queries,
+        'db_queries_per_request': round(queries / len(latencies), 2) if latencies and queries is not None else None
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_comparison(results, baseline):
+    print(f"\n{'route':<16}{'p50 ms':>18}{'p99 ms':>18}{'rps':>18}")
+    for name, current in results['routes'].items():
+        previous = baseline.get('routes', {}).get(name)
+        if not previous:
+            continue
+        cells = []
+        for before, after in (
+            (previous['latency_ms']['p50'], current['latency_ms']['p50']),
+            (previous['latency_ms']['p99'], current['latency_ms']['p99']),
+            (previous['throughput_rps'], current['throughput_rps'])
+        ):
+            change = f"{(after - before) / before * 100:+.0f}%" if before else 'n/a'
+            cells.append(f"{after} ({change})")
+        print(f"{name:<16}" + ''.join(f"{cell:>18}" for cell in cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5501', help='base URL of the running server')
+    parser.add_argument('--rows', type=int, default=10_000, help='submissions to seed before the run')
+    parser.add_argument('--skip-seed', action='store_true', help='benchmark the rows already in the database')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500, help='requests per route')
+    parser.add_argument('--export-requests', type=int, default=10, help='requests for the full-export routes')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed requests per route before measuring')
+    parser.add_argument('--routes', help='comma-separated subset of routes to run')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='print changes against an earlier --output file')
+    parser.add_argument('--sqlite', help="seed and count against this SQLite file instead of MySQL")
+    args = parser.parse_args()
+
+    conn = connect(args.sqlite)
+    if not args.sqlite:
+        conn.autocommit(True)
+    if not args.skip_seed:
+        seed(conn, args.rows)
+    ids, email_terms = sample_targets(conn)
+
+    routes = build_routes(ids, email_terms)
+    if args.routes:
+        wanted = set(args.routes.split(','))
+        routes = [route for route in routes if route[0] in wanted]
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) as total FROM desirability_form_responses")
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'url': args.url,
+        'storage': 'sqlite' if args.sqlite else 'mysql',
+        'rows': cursor.fetchone()['total'],
+        'concurrency': args.concurrency,
+        'routes': {}
+    }
+
+    print(f"{'route':<16}{'req':>6}{'err':>6}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}")
+    for index, (name, make_request) in enumerate(routes):
+        requests = args.export_requests if name.startswith('export') else args.requests
+        run_route(args.url, make_request, min(args.warmup, requests), args.concurrency, index)
+
+        # The status query itself is one Question, counted once per sample
+        before = query_count(conn)
+        latencies, statuses, wall_time = run_route(args.url, make_request, requests, args.concurrency, index)
+        queries = query_count(conn) - before - 1 if before is not None else None
+
+        stats = results['routes'][name] = summarize(latencies, statuses, wall_time, queries)
+        latency = stats['latency_ms']
+        print(f"{name:<16}{stats['requests']:>6}{stats['errors']:>6}{stats['throughput_rps']:>10}"
+              f"{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}{stats['db_queries_per_request'] or '':>8}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""Compare submission and read throughput of the storage engines, without HTTP in the way
+
+Runs the same workload through ResponseRepository on each engine: a number of
+threads each saving generated submissions (one transaction per submission,
+as /submit does), then the same threads reading single responses and
+/answers pages. The SQLite engine runs with and without group commit; MySQL
+is included when the DB_* variables point at a reachable server.
+
+    python benchmarks/bench_storage.py --threads 16 --submissions 5000
+    DB_NAME=desirability_bench python benchmarks/bench_storage.py --engines sqlite,mysql \\
+        --output results/storage.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from storage import DATABASE_ERRORS, ResponseRepository, create_engine  # noqa: E402
+from submissions import build_submission_row  # noqa: E402
+from bench_endpoints import git_revision, percentile  # noqa: E402
+from payloads import generate_submission  # noqa: E402
+
+# name -> (engine, sqlite_config)
+ENGINE_VARIANTS = {
+    'sqlite': ('sqlite', {'group_commit': True}),
+    'sqlite-no-group-commit': ('sqlite', {'group_commit': False}),
+    'sqlite-sync-full': ('sqlite', {'group_commit': True, 'synchronous': 'FULL'}),
+    'mysql': ('mysql', None)
+}
+
+
+def mysql_config():
+    load_dotenv()
+    return {
+        'host': os.getenv('DB_HOST', '127.0.0.1'),
+        'user': os.getenv('DB_USER', 'root'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'database': os.getenv('DB_NAME', 'desirability_bench'),
+        'port': int(os.getenv('DB_PORT', 3306)),
+        'charset': 'utf8mb4'
+    }
+
+
+def open_repository(variant, sqlite_dir, threads):
+    engine_name, sqlite_config = ENGINE_VARIANTS[variant]
+    engine = create_engine(
+        engine_name,
+        connect_kwargs=mysql_config(),
+        pool_config={'min_size': 1, 'max_size': threads, 'timeout': 30},
+        sqlite_path=os.path.join(sqlite_dir, f"{variant}.db"),
+        sqlite_config=sqlite_config
+    )
+    repository = ResponseRepository(engine)
+    conn = repository.connect()
+    cursor = conn.cursor()
+    try:
+        repository.init_schema(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return repository
+
+
+def timed_phase(threads, operations, operation):
+    """Run `operations` calls of operation(rng) across `threads` threads; returns latencies and wall time"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    remaining = iter(range(operations))
+
+    def worker(worker_id):
+        rng = random.Random(worker_id)
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started = time.perf_counter()
+            try:
+                operation(rng)
+            except DATABASE_ERRORS as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(latencies, errors, wall_time):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None  # noqa: E731
+    return {
+        'operations': len(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'wall_time_s': round(wall_time, 3),
+        'throughput_ops': round(len(latencies) / wall_time, 1) if wall_time else None,
+        'latency_ms': {'p50': ms(percentile(ordered, 50)), 'p99': ms(percentile(ordered, 99))}
+    }
+
+
+def run_variant(repository, threads, submissions, reads):
+    ids = []
+    ids_lock = threading.Lock()
+
+    def submit(rng):
+        response_id = repository.save_submission(build_submission_row(generate_submission(rng), uuid.uuid4().hex))
+        with ids_lock:
+            ids.append(response_id)
+
+    def read_one(rng):
+        conn = repository.connect()
+        cursor = conn.cursor()
+        try:
+            repository.get_response(cursor, rng.choice(ids))
+        finally:
+            cursor.close()
+            conn.close()
+
+    def read_page(rng):
+        conn = repository.connect()
+        cursor = conn.cursor()
+        try:
+            repository.list_responses(cursor, None, None, 100, 0)
+        finally:
+            cursor.close()
+            conn.close()
+
+    results = {'submit': summarize(*timed_phase(threads, submissions, submit))}
+    if ids:
+        results['get_response'] = summarize(*timed_phase(threads, reads, read_one))
+        results['list_page'] = summarize(*timed_phase(threads, reads, read_page))
+    stats = repository.engine.stats()
+    if stats.get('writer'):
+        results['writer'] = stats['writer']
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engines', default='sqlite,sqlite-no-group-commit,mysql',
+                        help=f"comma-separated subset of: {', '.join(ENGINE_VARIANTS)}")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--submissions', type=int, default=2000, help='submissions per engine')
+    parser.add_argument('--reads', type=int, default=5000, help='operations per read phase')
+    parser.add_argument('--sqlite-dir', help='directory for the SQLite files (default: a temporary directory)')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'threads': args.threads,
+        'engines': {}
+    }
+
+    with tempfile.TemporaryDirectory() as scratch:
+        sqlite_dir = args.sqlite_dir or scratch
+        print(f"{'engine':<24}{'phase':<14}{'ops':>8}{'err':>6}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for variant in args.engines.split(','):
+            if variant not in ENGINE_VARIANTS:
+                raise SystemExit(f"Unknown engine {variant!r}; choose from {', '.join(ENGINE_VARIANTS)}")
+            try:
+                repository = open_repository(variant, sqlite_dir, args.threads)
+            except DATABASE_ERRORS as e:
+                print(f"{variant:<24}skipped: {e}")
+                continue
+            try:
+                variant_results = results['engines'][variant] = run_variant(
+                    repository, args.threads, args.submissions, args.reads
+                )
+            finally:
+                repository.engine.close()
+            for phase, stats in variant_results.items():
+                if phase == 'writer':
+                    print(f"{variant:<24}{'writer':<14}avg batch {stats['avg_batch']}, "
+                          f"largest {stats['largest_batch']}, avg commit {stats['avg_commit_ms']} ms")
+                    continue
+                latency = stats['latency_ms']
+                print(f"{variant:<24}{phase:<14}{stats['operations']:>8}{stats['errors']:>6}"
+                      f"{stats['throughput_ops']:>10}{latency['p50']:>10}{latency['p99']:>10}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
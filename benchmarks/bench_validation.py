@@ -0,0 +1,90 @@
+"""Per-request cost of the /submit payload validator, next to the other work every submission pays for
+
+Times validate_submission on generated valid payloads and on a set of
+malformed ones, alongside parsing the JSON body and building the insert row,
+so the validator's share of a request is visible.
+
+    python benchmarks/bench_validation.py --payloads 2000
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from submission_schema import compile_validator, validate_submission  # noqa: E402
+from submissions import build_submission_row  # noqa: E402
+from payloads import generate_submission  # noqa: E402
+
+
+def malformed_payloads(valid):
+    """(name, payload) pairs, each breaking one rule of the schema"""
+    def mutate(change):
+        payload = copy.deepcopy(valid)
+        change(payload)
+        return payload
+
+    return [
+        ('not an object', ['personalInfo']),
+        ('unknown option', mutate(lambda p: p['personalInfo'].update(city='atlantis'))),
+        ('too long', mutate(lambda p: p['personalInfo'].update(phone='0' * 21))),
+        ('wrong type', mutate(lambda p: p['personalInfo'].update(name=['a', 'b']))),
+        ('rating range', mutate(lambda p: p['responses']['frustrations']['ratings'][0].update(value=9))),
+        ('too many answers', mutate(lambda p: p['responses']['new_things']['answers'].append(
+            {'value': 'last_month', 'text': 'last_month'}))),
+        ('unknown field', mutate(lambda p: p.update(extra='x' * 10_000)))
+    ]
+
+
+def time_per_call(function, payloads, repeat):
+    """Best-of-repeat mean microseconds per call over payloads"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for payload in payloads:
+            function(payload)
+        elapsed = (time.perf_counter() - started) / len(payloads)
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--payloads', type=int, default=2000, help='generated valid payloads')
+    parser.add_argument('--repeat', type=int, default=5, help='passes per case; the fastest is reported')
+    args = parser.parse_args()
+
+    rng = random.Random(21)
+    valid = [generate_submission(rng) for _ in range(args.payloads)]
+    rejected = [payload for payload in valid if validate_submission(payload)]
+    if rejected:
+        raise SystemExit(f"{len(rejected)} generated payloads failed validation: {validate_submission(rejected[0])}")
+    bodies = [json.dumps(payload) for payload in valid]
+
+    started = time.perf_counter()
+    compile_validator()
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    print(f"validator compiled in {compile_ms:.3f} ms (once, at import)\n")
+    print(f"{'case':<28}{'us/call':>10}")
+    cases = [
+        ('json.loads (request body)', json.loads, bodies),
+        ('build_submission_row', lambda payload: build_submission_row(payload, uuid.uuid4().hex), valid),
+        ('validate: valid payload', validate_submission, valid)
+    ]
+    for name, payload in malformed_payloads(valid[0]):
+        errors = validate_submission(payload)
+        if not errors:
+            raise SystemExit(f"Malformed payload {name!r} passed validation")
+        cases.append((f"reject: {name}", validate_submission, [payload] * args.payloads))
+
+    for name, function, payloads in cases:
+        print(f"{name:<28}{time_per_call(function, payloads, args.repeat):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
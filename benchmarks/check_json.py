@@ -0,0 +1,175 @@
+"""Check that the fast JSON path produces the same documents as Flask's default provider, and time both
+
+Builds export-shaped rows in memory and encodes them three ways:
+Flask's DefaultJSONProvider with one dict per row (the old path), and
+FastJSONProvider over tuple rows with the standard library and with orjson.
+Every document must parse to exactly what jsonify produces; bytes must also
+match unless the data contains non-ASCII text (orjson writes it as UTF-8
+instead of \\u escapes). Exits non-zero on any difference.
+
+tests/test_json_provider.py covers the same cases (Rows, datetimes,
+Decimals, non-ASCII text) in the test suite; this script repeats the
+comparison on generated data at scale and reports timings.
+
+    python benchmarks/check_json.py --rows 50000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from json_provider import FastJSONProvider, Rows, orjson_available  # noqa: E402
+from submissions import (RESPONSE_COLUMNS, INSERT_COLUMNS, TextExportEncoder, build_submission_row,  # noqa: E402
+                         flatten_powerbi_rows)
+from payloads import generate_submission  # noqa: E402
+
+NON_ASCII_NAMES = ['José Núñez', 'Zoë Ålund', 'Ayşe Çelik', 'محمد علي']
+
+
+def generate_rows(count, non_ascii):
+    """Tuple rows in RESPONSE_COLUMNS order"""
+    rng = random.Random(7)
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    rows = []
+    for index in range(count):
+        submission = generate_submission(rng)
+        if non_ascii and index % 10 == 0:
+            submission['personalInfo']['name'] = rng.choice(NON_ASCII_NAMES)
+        values = dict(zip(INSERT_COLUMNS, build_submission_row(submission, uuid.uuid4().hex)))
+        values['id'] = index + 1
+        values['submission_date'] = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+        rows.append(tuple(values[column] for column in RESPONSE_COLUMNS))
+    return rows
+
+
+def stream_document(app, rows, chunk_rows=500):
+    """The /api/data/export JSON body as stream_text_export builds it"""
+    encoder = TextExportEncoder('json', RESPONSE_COLUMNS, app.json.dumps)
+    chunks = [encoder.start()]
+    for start in range(0, len(rows), chunk_rows):
+        chunks.append(encoder.encode(rows[start:start + chunk_rows]))
+    chunks.append(encoder.finish())
+    return ''.join(chunks).encode('utf-8')
+
+
+def legacy_stream_document(app, rows, chunk_rows=500):
+    """The export body before this change: one dict per row, one dumps call per row"""
+    dict_rows = [dict(zip(RESPONSE_COLUMNS, row)) for row in rows]
+    chunks = ['{"data":[']
+    for start in range(0, len(dict_rows), chunk_rows):
+        prefix = ',' if start else ''
+        chunks.append(prefix + ','.join(app.json.dumps(row, separators=(',', ':'))
+                                        for row in dict_rows[start:start + chunk_rows]))
+    chunks.append(f'],"export_date":{app.json.dumps(datetime.now().isoformat())},'
+                  f'"success":true,"total_records":{len(dict_rows)}}}')
+    return ''.join(chunks).encode('utf-8')
+
+
+def make_app(provider, **kwargs):
+    app = Flask(__name__)
+    app.json = provider(app, **kwargs)
+    return app
+
+
+def jsonify_body(app, document):
+    with app.app_context():
+        return app.json.response(document).get_data()
+
+
+def timed(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def without_export_date(document):
+    document = json.loads(document)
+    document.pop('export_date', None)
+    return document
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the fastest is reported')
+    parser.add_argument('--ascii-only', action='store_true', help='leave out non-ASCII names')
+    args = parser.parse_args()
+
+    rows = generate_rows(args.rows, non_ascii=not args.ascii_only)
+    reference = make_app(DefaultJSONProvider)
+    candidates = {'stdlib': make_app(FastJSONProvider, use_orjson=False)}
+    if orjson_available():
+        candidates['orjson'] = make_app(FastJSONProvider)
+    else:
+        print("orjson is not installed; checking the standard library path only")
+
+    failures = []
+
+    def compare(case, name, expected, actual, strip_date=False):
+        parse = without_export_date if strip_date else json.loads
+        if parse(expected) != parse(actual):
+            failures.append(f"{case}/{name}: documents differ")
+            return 'DIFFERENT'
+        if expected == actual or strip_date:
+            return 'identical'
+        if name == 'stdlib' or args.ascii_only:
+            failures.append(f"{case}/{name}: same document, different bytes")
+        return 'same document'
+
+    print(f"{'case':<12}{'encoder':<16}{'ms':>10}{'speedup':>10}  result")
+
+    # /api/data/export: streamed chunks against the old per-row dumps
+    expected, baseline = timed(lambda: legacy_stream_document(reference, rows), args.repeat)
+    print(f"{'export':<12}{'default (dicts)':<16}{baseline * 1000:>10.1f}{'1.0x':>10}  reference")
+    for name, app in candidates.items():
+        actual, elapsed = timed(lambda: stream_document(app, rows), args.repeat)
+        result = compare('export', name, expected, actual, strip_date=True)
+        print(f"{'export':<12}{name:<16}{elapsed * 1000:>10.1f}{baseline / elapsed:>9.1f}x  {result}")
+
+    # /api/data/powerbi: jsonify of the flattened rows
+    dict_rows = [dict(zip(RESPONSE_COLUMNS, row)) for row in rows]
+    for row in dict_rows:
+        row['submission_time'] = row['submission_date'].strftime('%H:%M:%S')
+        row['submission_date'] = row['submission_date'].date()
+    watermark = {'since_id': None}
+    expected, baseline = timed(lambda: jsonify_body(reference, {'value': dict_rows, 'next_watermark': watermark}),
+                               args.repeat)
+    print(f"{'powerbi':<12}{'default (dicts)':<16}{baseline * 1000:>10.1f}{'1.0x':>10}  reference")
+    columns, flattened, _ = flatten_powerbi_rows(RESPONSE_COLUMNS, rows, '')
+    for name, app in candidates.items():
+        actual, elapsed = timed(
+            lambda: jsonify_body(app, {'value': Rows(columns, flattened), 'next_watermark': watermark}), args.repeat
+        )
+        result = compare('powerbi', name, expected, actual)
+        print(f"{'powerbi':<12}{name:<16}{elapsed * 1000:>10.1f}{baseline / elapsed:>9.1f}x  {result}")
+
+    # /answers: a 100-row page of dicts, as the route still builds it
+    page = {'success': True, 'data': dict_rows[:100], 'pagination': {'total': len(rows), 'limit': 100}}
+    expected, baseline = timed(lambda: jsonify_body(reference, page), args.repeat)
+    print(f"{'answers':<12}{'default (dicts)':<16}{baseline * 1000:>10.3f}{'1.0x':>10}  reference")
+    for name, app in candidates.items():
+        actual, elapsed = timed(lambda: jsonify_body(app, page), args.repeat)
+        result = compare('answers', name, expected, actual)
+        print(f"{'answers':<12}{name:<16}{elapsed * 1000:>10.3f}{baseline / elapsed:>9.1f}x  {result}")
+
+    for failure in failures:
+        print(f"MISMATCH {failure}", file=sys.stderr)
+    if failures:
+        raise SystemExit(1)
+    print("\nAll documents match the default provider")
+
+
+if __name__ == '__main__':
+    main()
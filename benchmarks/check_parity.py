@@ -0,0 +1,101 @@
+"""Check that the WSGI (flask_app) and ASGI (asgi_app) deployments answer alike
+
+tests/test_parity.py runs the same comparison through both test clients on a
+throwaway SQLite database; this script checks two live deployments, which
+must point at the same database. Every read endpoint is fetched from each
+and the JSON bodies compared; then one submission is sent to each and the
+two responses compared by shape, since ids and keys differ.
+
+    gunicorn flask_app:app -b 127.0.0.1:5501 &
+    hypercorn asgi_app:app -b 127.0.0.1:5502 &
+    python benchmarks/check_parity.py http://127.0.0.1:5501 http://127.0.0.1:5502
+"""
+import argparse
+import json
+import sys
+import urllib.error
+import urllib.request
+
+READ_PATHS = [
+    '/answers?limit=5',
+    '/answers?limit=5&email=a&email_match=contains',
+    '/answers?limit=5&email_match=bad',
+    '/answers?after=not-a-cursor',
+    '/answers/1',
+    '/answers/999999999',
+    '/answers/summary',
+    '/answers/analytics?group=blockers',
+    '/answers/analytics?group=features&by=age',
+    '/answers/analytics?group=nope',
+    '/api/data/powerbi',
+    '/api/data/powerbi?since_id=1',
+    '/api/data/powerbi?since_id=x',
+    '/api/data/export?format=json',
+    '/api/data/export?format=csv'
+]
+
+SAMPLE_SUBMISSION = {
+    'personalInfo': {
+        'name': 'Parity Check', 'gender': 'other', 'age': '25-34', 'city': 'lahore',
+        'email': 'parity@example.com', 'phone': '', 'occupation': 'student'
+    },
+    'responses': {
+        'frustrations': {'ratings': [{'title': 'No event buddies', 'value': 3}]},
+        'blockers': {'answers': [{'value': 'no_time'}, {'value': 'safety_concerns'}]}
+    }
+}
+
+
+def fetch(base_url, path, payload=None):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(base_url + path, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def normalize(path, body):
+    if 'format=csv' in path:
+        return body.decode('utf-8')
+    document = json.loads(body)
+    if path.startswith('/api/data/export'):
+        document.pop('export_date', None)
+    return document
+
+
+def shape(value):
+    """Keys and value types, ignoring the values themselves"""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    return type(value).__name__
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('wsgi_url')
+    parser.add_argument('asgi_url')
+    parser.add_argument('--skip-submit', action='store_true', help='do not write two rows to the database')
+    args = parser.parse_args()
+
+    mismatches = 0
+    for path in READ_PATHS:
+        wsgi_status, wsgi_body = fetch(args.wsgi_url, path)
+        asgi_status, asgi_body = fetch(args.asgi_url, path)
+        same = wsgi_status == asgi_status and normalize(path, wsgi_body) == normalize(path, asgi_body)
+        print(f"{'ok      ' if same else 'MISMATCH'} {wsgi_status} {asgi_status} {path}")
+        mismatches += not same
+
+    if not args.skip_submit:
+        wsgi_status, wsgi_body = fetch(args.wsgi_url, '/submit', SAMPLE_SUBMISSION)
+        asgi_status, asgi_body = fetch(args.asgi_url, '/submit', SAMPLE_SUBMISSION)
+        same = wsgi_status == asgi_status and shape(json.loads(wsgi_body)) == shape(json.loads(asgi_body))
+        print(f"{'ok      ' if same else 'MISMATCH'} {wsgi_status} {asgi_status} POST /submit")
+        mismatches += not same
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Random /submit payloads in the shape static/script.js sends
+
+    {"personalInfo": {...}, "responses": {"<page>": {"question", "answers": [{"value", "text"}]},
+                                          "frustrations": {"question", "ratings": [{"title", "value"}]}}}
+"""
+import os
+import string
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from form_options import PERSONAL_INFO_OPTIONS, ANSWER_OPTIONS, SINGLE_CHOICE_GROUPS, max_selections  # noqa: E402
+from submissions import FRUSTRATION_TITLES  # noqa: E402
+
+# Question titles from responsePages in static/script.js
+QUESTION_TITLES = {
+    'weekend': "What's Your Ideal Weekend?",
+    'meeting': "How do you feel about meeting new people on app?",
+    'vibe': "Pick your vibe.",
+    'new_things': "When was the last time you tried something new with someone?",
+    'blockers': "What stopped you from meeting new people?",
+    'safe_fun': "Would you try a SAFE, fun way to...?",
+    'platform': "How likely are you to join a platform that helps you:",
+    'challenges': "What are the biggest challenges you face when trying to meet new people or plan outings?",
+    'features': "What features would you find most useful in an app that connects you with like-minded people?",
+    'safety': "What safety features would make you feel more comfortable meeting strangers through an app?",
+    'scenarios': "Which of these scenarios would you most likely use the app for?"
+}
+
+FRUSTRATIONS_QUESTION = "Rate your frustration with these struggles"
+
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'hotmail.com', 'icloud.com', 'proton.me']
+
+
+def random_name(rng):
+    return ' '.join(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))).title() for _ in range(2))
+
+
+def generate_submission(rng):
+    """One complete form submission, every page answered"""
+    name = random_name(rng)
+    personal_info = {
+        'name': name,
+        'gender': rng.choice(PERSONAL_INFO_OPTIONS['gender']),
+        'age': rng.choice(PERSONAL_INFO_OPTIONS['age']),
+        'city': rng.choice(PERSONAL_INFO_OPTIONS['city']),
+        'email': f"{name.replace(' ', '.').lower()}{rng.randint(1, 9999)}@{rng.choice(EMAIL_DOMAINS)}",
+        'phone': f"03{rng.randint(0, 999999999):09d}",
+        'occupation': rng.choice(PERSONAL_INFO_OPTIONS['occupation'])
+    }
+
+    responses = {}
+    for group, question in QUESTION_TITLES.items():
+        options = ANSWER_OPTIONS[group]
+        count = 1 if group in SINGLE_CHOICE_GROUPS else rng.randint(1, max_selections(group))
+        responses[group] = {
+            'question': question,
+            'answers': [{'value': value, 'text': value} for value in rng.sample(options, count)]
+        }
+    responses['frustrations'] = {
+        'question': FRUSTRATIONS_QUESTION,
+        'ratings': [{'title': title, 'value': rng.randint(1, 5)} for title in FRUSTRATION_TITLES]
+    }
+    return {'personalInfo': personal_info, 'responses': responses}
@@ -0,0 +1,117 @@
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency: pip install pyarrow
+    pa = None
+    pq = None
+
+from answer_store import ANSWER_GROUP_COLUMNS
+from form_options import split_answer_values
+
+COLUMNAR_FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', 'form_responses.parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'form_responses.arrows')
+}
+
+INT_COLUMNS = {
+    'id',
+    'frustration_no_buddies', 'frustration_social_rut', 'frustration_starting_convos',
+    'frustration_similar_interests', 'frustration_short_notice', 'frustration_isolated_new_place'
+}
+
+# Comma-joined answer columns, exported as list<string>; the group says which options contain commas
+LIST_COLUMNS = {column: group for group, column in ANSWER_GROUP_COLUMNS.items()}
+
+TIMESTAMP_COLUMNS = {'submission_date'}
+
+
+def columnar_available():
+    return pa is not None
+
+
+def build_schema(column_names):
+    fields = []
+    for name in column_names:
+        if name in INT_COLUMNS:
+            fields.append(pa.field(name, pa.int32()))
+        elif name in LIST_COLUMNS:
+            fields.append(pa.field(name, pa.list_(pa.string())))
+        elif name in TIMESTAMP_COLUMNS:
+            fields.append(pa.field(name, pa.timestamp('us')))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def rows_to_batch(rows, schema):
+    """Turn a chunk of tuple rows into a RecordBatch, one column at a time"""
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(schema, columns):
+        group = LIST_COLUMNS.get(field.name)
+        if group is not None:
+            values = [split_answer_values(group, value) for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the streaming generator"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ColumnarEncoder:
+    """Encodes tuple rows as a Parquet or Arrow IPC stream, one RecordBatch per chunk"""
+
+    def __init__(self, column_names, format_type):
+        self.schema = build_schema(column_names)
+        self._sink = _ChunkSink()
+        if format_type == 'parquet':
+            self._writer = pq.ParquetWriter(self._sink, self.schema, compression='snappy')
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def encode(self, rows):
+        self._writer.write_batch(rows_to_batch(rows, self.schema))
+        return self._sink.drain()
+
+    def finish(self):
+        self._writer.close()
+        return self._sink.drain()
+
+
+def stream_columnar(cursor, format_type, chunk_rows):
+    """Yield a Parquet or Arrow IPC stream built from an unbuffered tuple cursor, one batch per chunk"""
+    encoder = ColumnarEncoder([column[0] for column in cursor.description], format_type)
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        data = encoder.encode(rows)
+        if data:
+            yield data
+    yield encoder.finish()
@@ -0,0 +1,68 @@
+import functools
+import hashlib
+import logging
+from datetime import timezone
+
+from flask import g, request, make_response
+
+logger = logging.getLogger(__name__)
+
+
+def request_validators(req, version, last_modified):
+    """(etag, last_modified, not_modified) for a request (Flask or Quart) against a data watermark"""
+    args_key = '&'.join(f"{k}={v}" for k, v in sorted(req.args.items(multi=True)))
+    gzip_variant = 'gzip' in req.accept_encodings
+    etag = hashlib.sha1(
+        f"{req.endpoint}|{req.path}?{args_key}|{gzip_variant}|{version}".encode('utf-8')
+    ).hexdigest()
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.astimezone()
+        last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+
+    not_modified = False
+    if req.if_none_match:
+        not_modified = req.if_none_match.contains(etag)
+    elif req.if_modified_since and last_modified is not None:
+        not_modified = last_modified <= req.if_modified_since
+    return etag, last_modified, not_modified
+
+
+def set_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def conditional_response(get_watermark):
+    """Decorator adding ETag / Last-Modified validation to a read-only route
+
+    `get_watermark` returns (version, last_modified), where version is any
+    value that changes whenever the underlying data does. A matching
+    If-None-Match or If-Modified-Since is answered with 304 before the view
+    runs, so the expensive query is skipped entirely. The version is left in
+    g.data_version, where ResponseCache keys on it, so a body cached before
+    the data changed is never sent under the new ETag.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                version, last_modified = get_watermark()
+            except Exception as e:
+                logger.warning(f"Could not read data watermark, serving without validators: {e}")
+                return view(*args, **kwargs)
+
+            g.data_version = version
+            etag, last_modified, not_modified = request_validators(request, version, last_modified)
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            return set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
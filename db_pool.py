@@ -0,0 +1,191 @@
+import logging
+import threading
+import time
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(pymysql.OperationalError):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class PooledConnection:
+    """Wrapper around a pymysql connection that returns itself to the pool on close()"""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self.created_at = time.monotonic()
+        self._checked_out = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.cursor_wrapper is not None:
+            cursor = self._pool.cursor_wrapper(cursor)
+        return cursor
+
+    def close(self):
+        """Return the connection to the pool instead of closing the socket"""
+        if self._checked_out:
+            self._checked_out = False
+            self._pool.release(self)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections"""
+
+    def __init__(self, connect_kwargs, min_size=1, max_size=10, timeout=5.0, recycle=3600, cursor_wrapper=None):
+        self.connect_kwargs = connect_kwargs
+        # Optional callable applied to every cursor handed out, e.g. for instrumentation
+        self.cursor_wrapper = cursor_wrapper
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.recycle = recycle
+
+        self._idle = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+        # Pool counters exposed through /health
+        self.checked_out = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.created = 0
+        self.recycled = 0
+        self.failed_pings = 0
+
+    def _connect(self):
+        raw = pymysql.connect(**self.connect_kwargs)
+        with self._lock:
+            self.created += 1
+        return PooledConnection(self, raw)
+
+    def _discard(self, conn):
+        """Close the underlying socket and free its slot"""
+        try:
+            conn._raw.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._available.notify()
+
+    def _is_usable(self, conn):
+        if self.recycle and time.monotonic() - conn.created_at > self.recycle:
+            with self._lock:
+                self.recycled += 1
+            return False
+        try:
+            conn._raw.ping(reconnect=False)
+        except pymysql.Error as e:
+            logger.warning(f"Discarding dead pooled connection: {e}")
+            with self._lock:
+                self.failed_pings += 1
+            return False
+        return True
+
+    def warm_up(self):
+        """Open connections until min_size idle connections are available"""
+        while True:
+            with self._lock:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._lock:
+                    self._size -= 1
+                raise
+            with self._lock:
+                self._idle.append(conn)
+                self._available.notify()
+
+    def acquire(self):
+        """Check out a live connection, waiting up to `timeout` seconds for a free slot"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn = None
+            with self._lock:
+                waited = False
+                while not self._idle and self._size >= self.max_size:
+                    if not waited:
+                        self.waits += 1
+                        waited = True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(2013, f"Timed out after {self.timeout}s waiting for a database connection")
+                    self._available.wait(remaining)
+                if self._idle:
+                    conn = self._idle.pop()
+                else:
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+            elif not self._is_usable(conn):
+                self._discard(conn)
+                continue
+
+            conn._checked_out = True
+            with self._lock:
+                self.checked_out += 1
+            return conn
+
+    def release(self, conn):
+        """Return a connection to the idle list, rolling back any open transaction"""
+        with self._lock:
+            self.checked_out -= 1
+        try:
+            if conn._raw.open and conn._raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                conn._raw.rollback()
+        except pymysql.Error:
+            self._discard(conn)
+            return
+        if not conn._raw.open:
+            self._discard(conn)
+            return
+        with self._lock:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def close_all(self):
+        """Close every idle connection (checked-out connections close on release)"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn in idle:
+            try:
+                conn._raw.close()
+            except Exception:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'checked_out': self.checked_out,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'recycled': self.recycled,
+                'failed_pings': self.failed_pings
+            }
@@ -0,0 +1,56 @@
+import re
+
+# Email search modes for /answers: exact and prefix use the B-tree index on email,
+# contains uses the ngram FULLTEXT index when available
+MATCH_MODES = ('contains', 'prefix', 'exact')
+
+# Must match the server's ngram_token_size (MySQL default is 2)
+NGRAM_TOKEN_SIZE = 2
+
+# Runs of characters the ngram parser indexes; anything else (@ . - and so on) may be a token boundary
+NGRAM_WORD = re.compile(r'[^\W_]+')
+
+# LIKE metacharacters: a term containing one is a pattern, not a literal the phrase search could look for
+LIKE_SPECIALS = ('%', '_', '\\')
+
+
+def escape_like(term):
+    """Escape LIKE wildcards so the term matches literally"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def fulltext_phrases(term):
+    """Boolean-mode query every row matching LIKE '%term%' also matches, or None if there is none
+
+    Each run of indexed characters long enough to form an ngram must appear in
+    a matching email, so all of them are required phrases; the LIKE applied
+    alongside keeps the exact semantics.
+    """
+    if any(special in term for special in LIKE_SPECIALS):
+        return None
+    words = [word for word in NGRAM_WORD.findall(term) if len(word) >= NGRAM_TOKEN_SIZE]
+    if not words:
+        return None
+    return ' '.join(f'+"{word}"' for word in words)
+
+
+def email_filter_clause(term, mode='contains', fulltext=False):
+    """Return (where_sql, params) for an email search
+
+    `contains` keeps the original LIKE '%term%' semantics, wildcards included.
+    With the FULLTEXT index it only adds a MATCH that narrows the candidate
+    rows first, and only when the term is literal text the ngram index can
+    find, so the results are the same either way.
+    """
+    if mode == 'exact':
+        return "email = %s", [term]
+    if mode == 'prefix':
+        return "email LIKE %s", [escape_like(term) + '%']
+    if mode != 'contains':
+        raise ValueError(f"Unknown email match mode: {mode}")
+
+    phrases = fulltext_phrases(term) if fulltext else None
+    if phrases:
+        # Phrase search over ngrams finds the candidate rows, LIKE keeps the original semantics
+        return ('MATCH(email) AGAINST (%s IN BOOLEAN MODE) AND email LIKE %s', [phrases, f"%{term}%"])
+    return "email LIKE %s", [f"%{term}%"]
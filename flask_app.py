@@ -1,13 +1,32 @@
-from flask import Flask, request, jsonify, render_template, Response
+from flask import Flask, request, jsonify, render_template, Response, abort, url_for
 from flask_cors import CORS
-import pymysql
+import click
 import logging
 import traceback
-from datetime import datetime
-from dotenv import load_dotenv
 import os
-import io
-import csv
+import atexit
+from instrumentation import Instrumentation, Counter, Gauge
+from json_provider import FastJSONProvider, Rows
+from storage import (DATABASE_ERRORS, ResponseRepository, create_engine, error_message, is_unavailable)
+from submissions import (MAX_IDEMPOTENCY_KEY_LENGTH, SUBMISSION_KEY_INDEX, build_submission_row, encode_page_cursor,
+                         decode_page_cursor, flatten_powerbi_rows, gzip_chunks, stream_text_export,
+                         submission_identity)
+from submission_schema import validate_submission
+from admission import Rejected, client_address, create_admission
+from submission_queue import SubmissionQueue, QueueFull
+from submission_spool import SubmissionSpool
+from totals import RowCounter, TTLCache
+from email_search import MATCH_MODES, email_filter_clause
+from conditional import conditional_response
+from columnar_export import COLUMNAR_FORMATS, columnar_available, stream_columnar
+from response_cache import create_response_cache
+from answer_store import ANSWER_GROUP_COLUMNS, CROSSTAB_DIMENSIONS
+from static_assets import AssetManifest, RenderedPage, build_assets
+from settings import (DB_CONFIG, POOL_CONFIG, STORAGE_ENGINE, SQLITE_PATH, SQLITE_CONFIG, USE_ORJSON,
+                      TOTAL_REFRESH_INTERVAL, FILTERED_TOTAL_TTL, RESPONSE_CACHE_TTLS, RESPONSE_CACHE_CONFIG,
+                      EXPORT_CHUNK_ROWS, POWERBI_ID_OVERLAP, SPOOL_PATH, SPOOL_CONFIG, ADMISSION_CONFIG,
+                      ADMISSION_BACKEND_CONFIG, TRUSTED_PROXIES, DEDUPE_RETENTION, DEDUPE_BY_CONTENT,
+                      DEDUPE_MAX_ENTRIES)
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)
@@ -16,190 +35,310 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+app.json = FastJSONProvider(app, use_orjson=USE_ORJSON)
 
-# Database configuration for PythonAnywhere MySQL
-DB_CONFIG = {
-    'host': os.getenv('DB_HOST', 'junoform.mysql.pythonanywhere-services.com'),
-    'user': os.getenv('DB_USER', 'junoform'),
-    'password': os.getenv('DB_PASSWORD', '4d7CDntp6rZ6Xud'),
-    'database': os.getenv('DB_NAME', 'junoform$default'),
-    'port': int(os.getenv('DB_PORT', 3306)),
-    'charset': 'utf8mb4'
-}
+# Server-Timing headers, per-statement metrics for /metrics, and a log of statements slower than SLOW_QUERY_MS
+instrumentation = Instrumentation(slow_query_ms=float(os.getenv('SLOW_QUERY_MS', 200)))
+instrumentation.init_app(app)
+
+storage_engine = create_engine(
+    STORAGE_ENGINE,
+    connect_kwargs=DB_CONFIG,
+    pool_config=POOL_CONFIG,
+    sqlite_path=SQLITE_PATH,
+    sqlite_config=SQLITE_CONFIG,
+    cursor_wrapper=instrumentation.wrap_cursor
+)
+atexit.register(storage_engine.close)
+
+repository = ResponseRepository(storage_engine)
+
+if STORAGE_ENGINE == 'mysql':
+    instrumentation.registry.register(Gauge(
+        'db_pool_connections', 'Pooled MySQL connections by state', ('state',),
+        lambda: {(state,): storage_engine.stats()[state] for state in ('size', 'idle', 'checked_out')}
+    ))
 
 def get_db_connection():
-    """Get MySQL database connection"""
-    return pymysql.connect(
-        host=DB_CONFIG['host'],
-        user=DB_CONFIG['user'],
-        password=DB_CONFIG['password'],
-        database=DB_CONFIG['database'],
-        port=DB_CONFIG['port'],
-        charset=DB_CONFIG['charset'],
-        cursorclass=pymysql.cursors.DictCursor
-    )
+    """Open a connection on the configured engine (pooled for MySQL); close() releases it"""
+    return repository.connect()
 
 def init_database():
-    """Initialize the MySQL database and create tables if they don't exist"""
+    """Initialize the database and create tables if they don't exist"""
+    conn = None
+    cursor = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS desirability_form_responses (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                full_name VARCHAR(255),
-                gender VARCHAR(50),
-                age VARCHAR(50),
-                city VARCHAR(100),
-                email VARCHAR(255),
-                phone VARCHAR(20),
-                occupation VARCHAR(255),
-                frustration_no_buddies INT DEFAULT 0,
-                frustration_social_rut INT DEFAULT 0,
-                frustration_starting_convos INT DEFAULT 0,
-                frustration_similar_interests INT DEFAULT 0,
-                frustration_short_notice INT DEFAULT 0,
-                frustration_isolated_new_place INT DEFAULT 0,
-                weekend_options TEXT,
-                feel_meeting_new_people TEXT,
-                vibe_selections TEXT,
-                tried_new_activity_with_someone TEXT,
-                meeting_blocker_to_meet_new_people TEXT,
-                safe_fun_way_to TEXT,
-                platform_join_likey_to TEXT,
-                challenges_you_face_when_trying_to_meet_new_people  TEXT,
-                likely_features_in_app TEXT,
-                safety_features_in_app TEXT,
-                scenarios_to_use_app_for TEXT,
-                submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        repository.init_schema(cursor)
         
         conn.commit()
-        cursor.close()
-        conn.close()
         logger.info("Database table initialized successfully")
         
-    except pymysql.Error as e:
+    except DATABASE_ERRORS as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+# Unfiltered total maintained in-process, and filtered totals cached per filter
+response_total = RowCounter(refresh_interval=TOTAL_REFRESH_INTERVAL)
+filtered_totals = TTLCache(ttl=FILTERED_TOTAL_TTL)
+
+# Read-endpoint response cache, invalidated by every successful write
+response_cache = create_response_cache(**RESPONSE_CACHE_CONFIG)
+
+def table_watermark():
+    """Version of the responses table for ETags: (max id, row count), plus the newest submission_date"""
+    conn = None
+    cursor = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        max_id, last_modified = repository.watermark(cursor)
+        total = response_total.get(lambda: repository.count_responses(cursor))
+        return (max_id, total), last_modified
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def insert_submissions(rows):
+    """Insert a batch of submission rows with one multi-row INSERT and one commit
+
+    Rows whose submission_key is already stored are skipped, so retried or
+    replayed batches never create duplicates.
+    """
+    new_rows = repository.save_submissions(rows)
+    if new_rows:
+        response_total.add(len(new_rows))
+        response_cache.invalidate()
 
-def get_answers(form_data, response_name):
-    """Safely extract answers for a response group"""
+# Optional write-behind mode: /submit enqueues rows and a background thread batches the INSERTs
+WRITE_BEHIND_CONFIG = {
+    'max_size': int(os.getenv('SUBMIT_QUEUE_MAX_SIZE', 1000)),
+    'batch_size': int(os.getenv('SUBMIT_BATCH_SIZE', 50)),
+    'flush_interval': float(os.getenv('SUBMIT_FLUSH_INTERVAL', 0.5)),
+    'put_timeout': float(os.getenv('SUBMIT_QUEUE_PUT_TIMEOUT', 0.1))
+}
+
+submission_spool = None
+if SPOOL_PATH:
+    submission_spool = SubmissionSpool(SPOOL_PATH, insert_submissions, retryable=is_unavailable, **SPOOL_CONFIG)
+    submission_spool.start()
+    atexit.register(submission_spool.stop)
+
+def spool_batch(rows, error):
+    """Take a batch the write-behind flusher could not insert
+
+    Spooled for replay when the database is unavailable; any other error would
+    fail the same way again, so the rows are written one at a time and those
+    the database rejects are dead-lettered.
+    """
+    keyed_rows = [(row[SUBMISSION_KEY_INDEX], row) for row in rows]
+    if is_unavailable(error):
+        for submission_key, row in keyed_rows:
+            submission_spool.append(submission_key, row)
+        return
     try:
-        # Navigate through the response structure: responses > group name > answers
-        group_data = form_data.get('responses', {}).get(response_name, {})
-        answers = group_data.get('answers', [])
-        return ','.join(str(item['value']) for item in answers)
-    except (KeyError, TypeError):
-        logger.warning(f"Missing answers for {response_name}")
-        return ''
+        submission_spool.salvage(keyed_rows)
+    except DATABASE_ERRORS as e:
+        if not is_unavailable(e):
+            raise
+        # salvage spooled the rows it had not written yet
+        logger.warning(f"Database became unavailable while salvaging a batch: {e}")
+
+submission_queue = None
+if os.getenv('SUBMIT_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes'):
+    submission_queue = SubmissionQueue(
+        insert_submissions,
+        on_failure=spool_batch if submission_spool else None,
+        retryable=is_unavailable,
+        **WRITE_BEHIND_CONFIG
+    )
+    submission_queue.start()
+    atexit.register(submission_queue.stop)
+
+admission = create_admission(**ADMISSION_BACKEND_CONFIG, **ADMISSION_CONFIG)
+
+instrumentation.registry.register(Counter(
+    'submit_admission_decisions_total', 'Submissions admitted or shed by admission control',
+    ('outcome', 'reason'), admission.decision_counts
+))
+instrumentation.registry.register(Gauge(
+    'submit_db_in_flight', 'Submissions currently holding a database slot', (),
+    lambda: {(): admission.stats()['in_flight']}
+))
+
+def client_ip():
+    """Address admission control keys the client's bucket on"""
+    return client_address(request, TRUSTED_PROXIES)
+
+def shed_response(rejected):
+    """Fast 429/503 for a submission turned away by admission control"""
+    response = jsonify({
+        'success': False,
+        'error': ('Too many submissions, please retry shortly' if rejected.status == 429
+                  else 'Server is busy, please retry shortly')
+    })
+    response.headers['Retry-After'] = str(rejected.retry_after)
+    return response, rejected.status
+
+recent_submissions = TTLCache(ttl=DEDUPE_RETENTION, max_entries=DEDUPE_MAX_ENTRIES)
+
+def remember_submission(dedupe_key, submission_id, submission_key):
+    if dedupe_key is not None and DEDUPE_RETENTION > 0:
+        recent_submissions.set(dedupe_key, (submission_id, submission_key))
+
+def duplicate_response(submission_id, submission_key):
+    """Answer a repeated submission with the one already accepted, without writing again"""
+    return jsonify({
+        'success': True,
+        'message': 'Form already submitted',
+        'submission_id': submission_id,
+        'submission_key': submission_key,
+        'duplicate': True
+    })
+
+# Fingerprinted, precompressed copies of static/ written by `flask build-assets`
+ASSET_BUILD_DIR = os.getenv('ASSET_BUILD_DIR', os.path.join(app.static_folder, 'dist'))
+static_assets = AssetManifest(ASSET_BUILD_DIR)
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file: its fingerprinted build when there is one, the plain static route otherwise"""
+    # In debug mode the sources are served directly, so edits show up without a rebuild
+    built_path = None if app.debug else static_assets.hashed_path(filename)
+    if built_path is None:
+        return url_for('static', filename=filename)
+    return url_for('serve_asset', filename=built_path)
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Serve a fingerprinted asset from memory, precompressed and cacheable forever"""
+    result = static_assets.respond(filename, request.accept_encodings, request.if_none_match)
+    if result is None:
+        abort(404)
+    body, status, headers = result
+    return Response(body, status, headers)
+
+# index.html takes no per-request context, so it is rendered once and served precompressed
+index_page = RenderedPage(os.path.join(app.root_path, app.template_folder, 'index.html'))
 
 @app.route('/')
 def index():
     """Serve the main index.html page"""
-    return render_template('index.html')
+    # Re-render when the template changes during development
+    if index_page.stale(check_source=app.debug or bool(app.config.get('TEMPLATES_AUTO_RELOAD'))):
+        index_page.store(render_template('index.html'))
+    body, status, headers = index_page.respond(request.accept_encodings, request.if_none_match)
+    return Response(body, status, headers)
 
 @app.route('/submit', methods=['POST'])
 def handle_form_submission():
-    conn = None
-    cursor = None
     try:
-        form_data = request.get_json()
+        # Shed over-limit clients before parsing anything
+        admission.admit(client_ip())
+
+        form_data = request.get_json(silent=True)
         logger.info("Form submission received")
         
         # Log incoming data for debugging
         logger.debug(f"Full submission data: {form_data}")
         
-        # Required personal info validation
-        required_fields = ['name', 'gender', 'age', 'city', 'email', 'occupation']
-        personal_info = form_data.get('personalInfo', {})
-        
-        # missing_fields = [f for f in required_fields if f not in personal_info or not personal_info[f]]
-        # if missing_fields:
-        #     return jsonify({
-        #         'success': False,
-        #         'error': f'Missing required fields: {", ".join(missing_fields)}'
-        #     }), 400
-
-        # Process frustration ratings
-        frustrations = form_data.get('responses', {}).get('frustrations', {}).get('ratings', [])
-        frustration_values = {
-            "No event buddies": 0,
-            "Stuck in a social rut": 0,
-            "Struggling with starting conversations": 0,
-            "Difficulty finding people with similar interests": 0,
-            "No plans on short notice": 0,
-            "Feeling isolated in a new place": 0
-        }
-        
-        for item in frustrations:
-            title = item.get('title', '')
-            if title in frustration_values:
-                frustration_values[title] = int(item.get('value', 0))
-
-        # Get database connection
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # Reject malformed payloads before they reach the queue, the spool or a pooled connection
+        errors = validate_submission(form_data)
+        if errors:
+            logger.info(f"Rejected submission: {'; '.join(errors)}")
+            return jsonify({
+                'success': False,
+                'error': f"Invalid submission: {errors[0]}",
+                'errors': errors
+            }), 400
 
-        # Insert data
-        cursor.execute("""
-            INSERT INTO desirability_form_responses (
-                full_name, gender, age, city, email, phone, occupation,
-                frustration_no_buddies, frustration_social_rut,
-                frustration_starting_convos, frustration_similar_interests,
-                frustration_short_notice, frustration_isolated_new_place,
-                weekend_options, feel_meeting_new_people, vibe_selections,
-                tried_new_activity_with_someone, meeting_blocker_to_meet_new_people,
-                safe_fun_way_to, platform_join_likey_to,
-                challenges_you_face_when_trying_to_meet_new_people,
-                likely_features_in_app, safety_features_in_app,
-                scenarios_to_use_app_for, submission_date
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personal_info.get('name', ''),
-                personal_info.get('gender', ''),
-                personal_info.get('age', ''),
-                personal_info.get('city', ''),
-                personal_info.get('email', ''),
-                personal_info.get('phone', ''),
-                personal_info.get('occupation', ''),
-                frustration_values["No event buddies"],
-                frustration_values["Stuck in a social rut"],
-                frustration_values["Struggling with starting conversations"],
-                frustration_values["Difficulty finding people with similar interests"],
-                frustration_values["No plans on short notice"],
-                frustration_values["Feeling isolated in a new place"],
-                # Get answers for each response group
-                get_answers(form_data, 'weekend'),
-                get_answers(form_data, 'meeting'),
-                get_answers(form_data, 'vibe'),
-                get_answers(form_data, 'new_things'),
-                get_answers(form_data, 'blockers'),
-                get_answers(form_data, 'safe_fun'),
-                get_answers(form_data, 'platform'),
-                get_answers(form_data, 'challenges'),
-                get_answers(form_data, 'features'),
-                get_answers(form_data, 'safety'),
-                get_answers(form_data, 'scenarios'),
-                datetime.now()
-            ))
-        
-        conn.commit()
-        
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None and not 0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({
+                'success': False,
+                'error': f"Idempotency-Key must be 1 to {MAX_IDEMPOTENCY_KEY_LENGTH} characters"
+            }), 400
+
+        # Double clicks and retries after a slow response get the original submission back
+        submission_key, dedupe_key = submission_identity(form_data, idempotency_key, client_ip(), DEDUPE_RETENTION,
+                                                         DEDUPE_BY_CONTENT)
+        if dedupe_key is not None:
+            original = recent_submissions.peek(dedupe_key)
+            if original is not None:
+                logger.info(f"Duplicate submission {submission_key} answered from memory")
+                return duplicate_response(*original)
+
+        row = build_submission_row(form_data, submission_key)
+
+        # Write-behind mode: hand the row to the flusher and answer immediately
+        if submission_queue is not None:
+            try:
+                submission_queue.submit(row)
+            except QueueFull as e:
+                logger.warning(str(e))
+                response = jsonify({
+                    'success': False,
+                    'error': 'Server is busy, please retry shortly'
+                })
+                response.headers['Retry-After'] = '1'
+                return response, 503
+            remember_submission(dedupe_key, submission_key, submission_key)
+            return jsonify({
+                'success': True,
+                'message': 'Form submission accepted',
+                'submission_id': submission_key,
+                'queued': True
+            }), 202
+
+        try:
+            # Insert data and commit (batched with concurrent submissions on SQLite)
+            with admission.db_slot():
+                submission_id, created = repository.save_submission_once(row)
+            if created:
+                response_total.add()
+                response_cache.invalidate()
+        except DATABASE_ERRORS as e:
+            # The database is down or saturated: keep the response in the local spool instead of losing it
+            if submission_spool is None or not is_unavailable(e):
+                raise
+            logger.warning(f"Database unavailable, spooling submission {submission_key}: {e}")
+            submission_spool.append(submission_key, row)
+            remember_submission(dedupe_key, submission_key, submission_key)
+            return jsonify({
+                'success': True,
+                'message': 'Form submission accepted',
+                'submission_id': submission_key,
+                'spooled': True
+            }), 202
+
+        remember_submission(dedupe_key, submission_id, submission_key)
+        if not created:
+            logger.info(f"Duplicate submission {submission_key} matched response {submission_id}")
+            return duplicate_response(submission_id, submission_key)
         return jsonify({
             'success': True,
             'message': 'Form submitted successfully',
-            'submission_id': cursor.lastrowid
+            'submission_id': submission_id,
+            'submission_key': submission_key
         })
         
-    except pymysql.Error as e:
-        logger.error(f"MySQL Error [{e.args[0]}]: {e.args[1]}")
+    except Rejected as e:
+        logger.info(f"Submission from {client_ip()} shed: {e}")
+        return shed_response(e)
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {e}")
         return jsonify({
             'success': False,
-            'error': f"Database error: {e.args[1]}"
+            'error': f"Database error: {error_message(e)}"
         }), 500
     except Exception as e:
         logger.error(f"Error: {str(e)}\n{traceback.format_exc()}")
@@ -208,13 +347,9 @@ def handle_form_submission():
             'error': str(e),
             'traceback': traceback.format_exc()
         }), 500
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
 
 @app.route('/answers', methods=['GET'])
+@conditional_response(table_watermark)
 def get_answers_route():
     """Get all form responses from database"""
     conn = None
@@ -227,42 +362,46 @@ def get_answers_route():
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
         email_filter = request.args.get('email', '')
+        email_match = request.args.get('email_match', 'contains').lower()
+        if email_match not in MATCH_MODES:
+            return jsonify({
+                'success': False,
+                'error': f"email_match must be one of: {', '.join(MATCH_MODES)}"
+            }), 400
+        after = request.args.get('after', '')
+        include_total = request.args.get('include_total', 'true').lower() not in ('0', 'false', 'no')
+        
+        # Keyset pagination: `after` is the next_cursor of the previous page
+        after_key = None
+        if after:
+            try:
+                after_key = decode_page_cursor(after)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid pagination cursor'
+                }), 400
         
         # Build query with optional email filter
-        base_query = """
-            SELECT id, full_name, gender, age, city, email, phone, occupation,
-                   frustration_no_buddies, frustration_social_rut,
-                   frustration_starting_convos, frustration_similar_interests,
-                   frustration_short_notice, frustration_isolated_new_place,
-                   weekend_options, feel_meeting_new_people, vibe_selections,
-                   tried_new_activity_with_someone, meeting_blocker_to_meet_new_people,
-                   safe_fun_way_to, platform_join_likey_to,
-                   challenges_you_face_when_trying_to_meet_new_people,
-                   likely_features_in_app, safety_features_in_app,
-                   scenarios_to_use_app_for, submission_date
-            FROM desirability_form_responses
-        """
-        
-        params = []
+        email_clause = None
         if email_filter:
-            base_query += " WHERE email LIKE %s"
-            params.append(f"%{email_filter}%")
-            
-        base_query += " ORDER BY submission_date DESC LIMIT %s OFFSET %s"
-        params.extend([limit, offset])
-        
-        cursor.execute(base_query, params)
-        results = cursor.fetchall()
-        
-        # Get total count for pagination info
-        count_query = "SELECT COUNT(*) as total FROM desirability_form_responses"
-        count_params = []
-        if email_filter:
-            count_query += " WHERE email LIKE %s"
-            count_params.append(f"%{email_filter}%")
-            
-        cursor.execute(count_query, count_params)
-        total_count = cursor.fetchone()['total']
+            email_clause = email_filter_clause(email_filter, email_match, repository.fulltext_available)
+        results = repository.list_responses(cursor, email_clause, after_key, limit, offset)
+        
+        next_cursor = None
+        if results and len(results) == limit:
+            next_cursor = encode_page_cursor(results[-1])
+        
+        # Get total count for pagination info from the maintained counter or the filtered-total cache
+        total_count = None
+        if include_total:
+            if email_filter:
+                total_count = filtered_totals.get(
+                    ('email', email_match, email_filter),
+                    lambda: repository.count_responses(cursor, email_clause)
+                )
+            else:
+                total_count = response_total.get(lambda: repository.count_responses(cursor))
         
         return jsonify({
             'success': True,
@@ -270,13 +409,14 @@ def get_answers_route():
             'pagination': {
                 'total': total_count,
                 'limit': limit,
-                'offset': offset,
-                'count': len(results)
+                'offset': 0 if after_key else offset,
+                'count': len(results),
+                'next_cursor': next_cursor
             }
         })
         
-    except pymysql.Error as e:
-        logger.error(f"MySQL Error: {str(e)}")
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
         return jsonify({
             'success': False,
             'error': f"Database error: {str(e)}"
@@ -294,6 +434,8 @@ def get_answers_route():
             conn.close()
 
 @app.route('/answers/<int:response_id>', methods=['GET'])
+@conditional_response(table_watermark)
+@response_cache.cached(ttl=RESPONSE_CACHE_TTLS['single_answer'])
 def get_single_answer(response_id):
     """Get a specific form response by ID"""
     conn = None
@@ -302,22 +444,7 @@ def get_single_answer(response_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT id, full_name, gender, age, city, email, phone, occupation,
-                   frustration_no_buddies, frustration_social_rut,
-                   frustration_starting_convos, frustration_similar_interests,
-                   frustration_short_notice, frustration_isolated_new_place,
-                   weekend_options, feel_meeting_new_people, vibe_selections,
-                   tried_new_activity_with_someone, meeting_blocker_to_meet_new_people,
-                   safe_fun_way_to, platform_join_likey_to,
-                   challenges_you_face_when_trying_to_meet_new_people,
-                   likely_features_in_app, safety_features_in_app,
-                   scenarios_to_use_app_for, submission_date
-            FROM desirability_form_responses
-            WHERE id = %s
-        """, (response_id,))
-        
-        result = cursor.fetchone()
+        result = repository.get_response(cursor, response_id)
         
         if result:
             return jsonify({
@@ -330,8 +457,8 @@ def get_single_answer(response_id):
                 'error': 'Response not found'
             }), 404
             
-    except pymysql.Error as e:
-        logger.error(f"MySQL Error: {str(e)}")
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
         return jsonify({
             'success': False,
             'error': f"Database error: {str(e)}"
@@ -349,6 +476,8 @@ def get_single_answer(response_id):
             conn.close()
 
 @app.route('/answers/summary', methods=['GET'])
+@conditional_response(table_watermark)
+@response_cache.cached(ttl=RESPONSE_CACHE_TTLS['summary'])
 def get_answers_summary():
     """Get summary statistics of form responses"""
     conn = None
@@ -357,68 +486,65 @@ def get_answers_summary():
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        # Get basic counts
-        cursor.execute("SELECT COUNT(*) as total FROM desirability_form_responses")
-        total_responses = cursor.fetchone()['total']
-        
-        # Get gender distribution
-        cursor.execute("""
-            SELECT gender, COUNT(*) as count 
-            FROM desirability_form_responses 
-            WHERE gender IS NOT NULL AND gender != ''
-            GROUP BY gender
-        """)
-        gender_stats = cursor.fetchall()
-        
-        # Get age statistics - Updated for VARCHAR age field
-        cursor.execute("""
-            SELECT 
-                age as age_range,
-                COUNT(*) as count
-            FROM desirability_form_responses 
-            WHERE age IS NOT NULL AND age != ''
-            GROUP BY age 
-            ORDER BY COUNT(*) DESC
-        """)
-        age_stats = cursor.fetchall()
-        
-        # Get top cities
-        cursor.execute("""
-            SELECT city, COUNT(*) as count 
-            FROM desirability_form_responses 
-            WHERE city IS NOT NULL AND city != ''
-            GROUP BY city 
-            ORDER BY count DESC 
-            LIMIT 10
-        """)
-        city_stats = cursor.fetchall()
-        
-        # Get average frustration scores
-        cursor.execute("""
-            SELECT 
-                AVG(frustration_no_buddies) as avg_no_buddies,
-                AVG(frustration_social_rut) as avg_social_rut,
-                AVG(frustration_starting_convos) as avg_starting_convos,
-                AVG(frustration_similar_interests) as avg_similar_interests,
-                AVG(frustration_short_notice) as avg_short_notice,
-                AVG(frustration_isolated_new_place) as avg_isolated_new_place
-            FROM desirability_form_responses
-        """)
-        frustration_stats = cursor.fetchone()
+        # O(1) read from the rollup tables maintained at insert time
+        summary = repository.summary(cursor)
         
         return jsonify({
             'success': True,
-            'summary': {
-                'total_responses': total_responses,
-                'gender_distribution': gender_stats,
-                'age_statistics': age_stats if age_stats else {},
-                'top_cities': city_stats,
-                'average_frustration_scores': frustration_stats if frustration_stats else {}
-            }
+            'summary': summary
+        })
+        
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f"Database error: {str(e)}"
+        }), 500
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+@app.route('/answers/analytics', methods=['GET'])
+@conditional_response(table_watermark)
+@response_cache.cached(ttl=RESPONSE_CACHE_TTLS['analytics'])
+def get_answers_analytics():
+    """Per-option pick counts for a multi-select group, optionally cross-tabbed by a respondent field"""
+    conn = None
+    cursor = None
+    try:
+        group = request.args.get('group', '')
+        by = request.args.get('by', '')
+        if group not in ANSWER_GROUP_COLUMNS:
+            return jsonify({
+                'success': False,
+                'error': f"group must be one of: {', '.join(ANSWER_GROUP_COLUMNS)}"
+            }), 400
+        if by and by not in CROSSTAB_DIMENSIONS:
+            return jsonify({
+                'success': False,
+                'error': f"by must be one of: {', '.join(CROSSTAB_DIMENSIONS)}"
+            }), 400
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        analytics = repository.analytics(cursor, group, by)
+        
+        return jsonify({
+            'success': True,
+            'analytics': analytics
         })
         
-    except pymysql.Error as e:
-        logger.error(f"MySQL Error: {str(e)}")
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
         return jsonify({
             'success': False,
             'error': f"Database error: {str(e)}"
@@ -436,8 +562,9 @@ def get_answers_summary():
             conn.close()
 
 @app.route('/api/data/export', methods=['GET'])
+@conditional_response(table_watermark)
 def export_data():
-    """Export all data in CSV or JSON format for PowerBI"""
+    """Export all data as CSV, JSON, Parquet or Arrow for PowerBI, streamed from a server-side cursor"""
     conn = None
     cursor = None
     try:
@@ -449,54 +576,56 @@ def export_data():
         # if api_key != expected_key:
         #     return jsonify({'error': 'Invalid API key'}), 401
         
+        columnar = format_type in COLUMNAR_FORMATS
+        if columnar and not columnar_available():
+            return jsonify({
+                'success': False,
+                'error': f"format={format_type} requires pyarrow to be installed on the server"
+            }), 501
+        
         conn = get_db_connection()
-        cursor = conn.cursor()
+        # Streaming tuple cursor: rows are read from the database as the response is sent
+        cursor = repository.export_cursor(conn)
         
-        cursor.execute("""
-            SELECT id, full_name, gender, age, city, email, phone, occupation,
-                   frustration_no_buddies, frustration_social_rut,
-                   frustration_starting_convos, frustration_similar_interests,
-                   frustration_short_notice, frustration_isolated_new_place,
-                   weekend_options, feel_meeting_new_people, vibe_selections,
-                   tried_new_activity_with_someone, meeting_blocker_to_meet_new_people,
-                   safe_fun_way_to, platform_join_likey_to,
-                   challenges_you_face_when_trying_to_meet_new_people,
-                   likely_features_in_app, safety_features_in_app,
-                   scenarios_to_use_app_for, submission_date
-            FROM desirability_form_responses
-            ORDER BY submission_date DESC
-        """)
-        
-        results = cursor.fetchall()
-        
-        if format_type == 'csv':
-            output = io.StringIO()
-            if results:
-                # Get column names from the first row
-                fieldnames = list(results[0].keys())
-                writer = csv.DictWriter(output, fieldnames=fieldnames)
-                writer.writeheader()
-                
-                for row in results:
-                    writer.writerow(row)
-            
+        # The response owns the cursor and connection from here and releases them when closed
+        if columnar:
+            chunks = stream_columnar(cursor, format_type, EXPORT_CHUNK_ROWS)
+        else:
+            chunks = stream_text_export(cursor, format_type, app.json.dumps, EXPORT_CHUNK_ROWS)
+        stream_cursor, stream_conn = cursor, conn
+        conn = None
+        cursor = None
+
+        # Parquet and Arrow are already compact binary formats, so only text formats are gzipped
+        gzip_enabled = not columnar and 'gzip' in request.accept_encodings
+        if gzip_enabled:
+            chunks = gzip_chunks(chunks)
+
+        if columnar:
+            mimetype, filename = COLUMNAR_FORMATS[format_type]
+            response = Response(
+                chunks,
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename={filename}'}
+            )
+        elif format_type == 'csv':
             response = Response(
-                output.getvalue(),
+                chunks,
                 mimetype='text/csv',
                 headers={'Content-Disposition': 'attachment; filename=form_responses.csv'}
             )
-            return response
-        
         else:  # JSON format (default)
-            return jsonify({
-                'success': True,
-                'data': results,
-                'total_records': len(results),
-                'export_date': datetime.now().isoformat()
-            })
+            response = Response(chunks, mimetype='application/json')
+
+        response.call_on_close(stream_cursor.close)
+        response.call_on_close(stream_conn.close)
+        response.headers['Vary'] = 'Accept-Encoding'
+        if gzip_enabled:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
             
-    except pymysql.Error as e:
-        logger.error(f"MySQL Error: {str(e)}")
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
         return jsonify({
             'success': False,
             'error': f"Database error: {str(e)}"
@@ -514,6 +643,8 @@ def export_data():
             conn.close()
 
 @app.route('/api/data/powerbi', methods=['GET'])
+@conditional_response(table_watermark)
+@response_cache.cached(ttl=RESPONSE_CACHE_TTLS['powerbi'])
 def powerbi_endpoint():
     """Specialized endpoint for PowerBI with flattened data structure"""
     conn = None
@@ -526,51 +657,37 @@ def powerbi_endpoint():
         # if api_key != expected_key:
         #     return jsonify({'error': 'Invalid API key'}), 401
         
+        # Incremental refresh: rows past the client's since_id watermark, re-reading POWERBI_ID_OVERLAP ids below it
+        # so late commits are not skipped (since only picks a first-load start)
+        since_id = request.args.get('since_id', '')
+        since = request.args.get('since', '')
+        try:
+            query, params = repository.powerbi_query(since_id, since, POWERBI_ID_OVERLAP)
+        except ValueError:
+            return jsonify({
+                'error': 'since_id must be an integer and since an ISO 8601 timestamp'
+            }), 400
+        
         conn = get_db_connection()
-        cursor = conn.cursor()
+        cursor = repository.tuple_cursor(conn)
+        
+        # Get all data with flattened structure for PowerBI, as tuples sharing one column list
+        cursor.execute(query, params)
+        
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
         
-        # Get all data with flattened structure for PowerBI
-        cursor.execute("""
-            SELECT 
-                id,
-                full_name,
-                gender,
-                age,
-                city,
-                email,
-                occupation,
-                frustration_no_buddies as frustration_score_no_buddies,
-                frustration_social_rut as frustration_score_social_rut,
-                frustration_starting_convos as frustration_score_starting_conversations,
-                frustration_similar_interests as frustration_score_similar_interests,
-                frustration_short_notice as frustration_score_short_notice,
-                frustration_isolated_new_place as frustration_score_isolated_new_place,
-                weekend_options,
-                feel_meeting_new_people,
-                vibe_selections,
-                tried_new_activity_with_someone,
-                meeting_blocker_to_meet_new_people,
-                safe_fun_way_to,
-                platform_join_likey_to,
-                challenges_you_face_when_trying_to_meet_new_people,
-                likely_features_in_app,
-                safety_features_in_app,
-                scenarios_to_use_app_for,
-                DATE(submission_date) as submission_date,
-                TIME(submission_date) as submission_time
-            FROM desirability_form_responses
-            ORDER BY submission_date DESC
-        """)
-        
-        results = cursor.fetchall()
+        # Split the timestamp into date and time columns in Python rather than per row in SQL
+        columns, rows, next_watermark = flatten_powerbi_rows(columns, rows, since_id)
         
         # Return in PowerBI-friendly format
         return jsonify({
-            'value': results  # PowerBI expects data in 'value' field for OData-like format
+            'value': Rows(columns, rows),  # PowerBI expects data in 'value' field for OData-like format
+            'next_watermark': next_watermark
         })
             
-    except pymysql.Error as e:
-        logger.error(f"MySQL Error: {str(e)}")
+    except DATABASE_ERRORS as e:
+        logger.error(f"Database Error: {str(e)}")
         return jsonify({
             'error': f"Database error: {str(e)}"
         }), 500
@@ -585,6 +702,53 @@ def powerbi_endpoint():
         if conn:
             conn.close()
 
+@app.cli.command('rebuild-rollups')
+@click.option('--check-only', is_flag=True, help='Compare rollups with the live queries without rebuilding')
+def rebuild_rollups_command(check_only):
+    """Recompute the /answers/summary rollups from scratch and verify them"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if not check_only:
+            repository.rebuild_rollups(cursor)
+            conn.commit()
+            response_cache.invalidate()
+            click.echo("Rollups rebuilt")
+
+        differences = repository.rollup_differences(cursor)
+        for difference in differences:
+            click.echo(f"MISMATCH {difference}", err=True)
+        if differences:
+            raise SystemExit(1)
+        click.echo("Rollups match the live summary")
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.cli.command('backfill-answers')
+@click.option('--batch-size', default=1000, show_default=True, help='Responses per transaction')
+def backfill_answers_command(batch_size):
+    """Parse the comma-joined answer columns of existing responses into response_answers"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        processed = repository.backfill_answers(cursor, conn.commit, batch_size)
+        response_cache.invalidate()
+        click.echo(f"Backfilled answers for {processed} responses")
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and precompress static/ into ASSET_BUILD_DIR"""
+    manifest = build_assets(app.static_folder, ASSET_BUILD_DIR)
+    for source, entry in manifest['assets'].items():
+        sizes = ', '.join(f"{encoding} {size}" for encoding, size in entry['encodings'].items())
+        click.echo(f"{source} -> {entry['path']} ({entry['original_size']} -> {entry['size']} bytes"
+                   f"{'; ' + sizes if sizes else ''})")
+    click.echo(f"Wrote {len(manifest['assets'])} assets to {ASSET_BUILD_DIR}")
+
 @app.route('/init-db', methods=['POST'])
 def init_db_route():
     """Manual database initialization endpoint"""
@@ -593,8 +757,9 @@ def init_db_route():
         return jsonify({
             'success': True,
             'message': 'Database initialized successfully',
-            'database_host': DB_CONFIG['host'],
-            'database_name': DB_CONFIG['database']
+            'database_engine': STORAGE_ENGINE,
+            'database_host': storage_engine.describe()['host'],
+            'database_name': storage_engine.describe()['database']
         })
     except Exception as e:
         logger.error(f"Failed to initialize database: {str(e)}")
@@ -603,59 +768,67 @@ def init_db_route():
             'error': str(e)
         }), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint (counters are per worker process)"""
+    return Response(instrumentation.registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Enhanced health check endpoint with database info"""
+    conn = None
+    cursor = None
     try:
         # Test database connection
         conn = get_db_connection()
         cursor = conn.cursor()
         
         # Test if table exists
-        cursor.execute("""
-            SELECT COUNT(*) as table_count 
-            FROM information_schema.tables 
-            WHERE table_schema = %s AND table_name = 'desirability_form_responses'
-        """, (DB_CONFIG['database'],))
-        
-        table_result = cursor.fetchone()
-        table_exists = table_result['table_count'] > 0
+        table_exists = repository.table_exists(cursor)
         
         # Get record count if table exists
         record_count = 0
         if table_exists:
-            cursor.execute("SELECT COUNT(*) as count FROM desirability_form_responses")
-            record_count = cursor.fetchone()['count']
-        
-        cursor.close()
-        conn.close()
+            record_count = response_total.get(lambda: repository.count_responses(cursor))
         
         return jsonify({
             'status': 'healthy',
             'database': {
-                'host': DB_CONFIG['host'],
-                'database': DB_CONFIG['database'],
+                **storage_engine.describe(),
                 'connection': 'successful',
                 'table_exists': table_exists,
                 'record_count': record_count
-            }
+            },
+            'pool': storage_engine.stats(),
+            'write_behind': submission_queue.stats() if submission_queue else None,
+            'spool': submission_spool.stats() if submission_spool else None,
+            'response_cache': response_cache.stats(),
+            'admission': admission.stats()
         })
         
-    except pymysql.Error as e:
+    except DATABASE_ERRORS as e:
         return jsonify({
             'status': 'error',
             'database': {
-                'host': DB_CONFIG['host'],
-                'database': DB_CONFIG['database'],
+                **storage_engine.describe(),
                 'connection': 'failed',
-                'error': f"MySQL Error: {str(e)}"
-            }
+                'error': f"Database Error: {str(e)}"
+            },
+            'pool': storage_engine.stats(),
+            'write_behind': submission_queue.stats() if submission_queue else None,
+            'spool': submission_spool.stats() if submission_spool else None,
+            'response_cache': response_cache.stats()
         }), 500
     except Exception as e:
         return jsonify({
             'status': 'error',
             'error': str(e)
         }), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
 
 if __name__ == '__main__':
     # Initialize database on startup
@@ -670,8 +843,9 @@ if __name__ == '__main__':
     debug_mode = os.getenv('FLASK_ENV') != 'production'
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
 
-# Initialize database when imported (for WSGI servers like gunicorn)
+# Initialize database and pre-open pooled connections when imported (for WSGI servers like gunicorn)
 try:
     init_database()
+    storage_engine.warm_up()
 except Exception as e:
     logger.error(f"Failed to initialize database on import: {e}")
\ No newline at end of file
@@ -0,0 +1,126 @@
+# Option values offered by templates/index.html, exactly as the browser submits them
+
+PERSONAL_INFO_OPTIONS = {
+    'gender': ['male', 'female', 'other', 'prefer-not'],
+    'age': ['under_18', '18-24', '25-34', '35-44', '45+'],
+    'city': ['karachi', 'hydrabad', 'islamabad', 'rawalpindi', 'lahore'],
+    'occupation': ['professional', 'student', 'retired']
+}
+
+ANSWER_OPTIONS = {
+    'weekend': [
+        'chilling_at_home_with_netflix',
+        'coffee_with_a_close_friend',
+        'exploring_new_spots_with_the_same_friend_group',
+        'attending_a_local_event_or_meetup',
+        'trying_a_new_cafe_or_restaurant_with_someone_new'
+    ],
+    'meeting': [
+        'social_anxiety_is_real',
+        'i_love_it!_the_more_the merrier!',
+        'its_okay_if_we_have_shared_interests',
+        'im_shy_but_ill_try',
+        'im_open_to_it_but_it_depends_on_the_situation'
+    ],
+    'vibe': [
+        'active_&_adventurous',
+        'curious_&_intellectual',
+        'creative_&_artsy',
+        'chill_&_introverted',
+        'nature_&_outdoors',
+        'foodie_&_culinary',
+        'social_butterfly'
+    ],
+    'new_things': ['last_week', 'last_month', 'cant_remember', 'its_been_a_while'],
+    'blockers': [
+        'no_time',
+        'fear_of_rejection',
+        'unsure_how_to_find_local_hangouts',
+        'hard_to_find_people_with_my_vibe',
+        'safety_concerns',
+        'no_easy_way_to_connect_instantly'
+    ],
+    'safe_fun': [
+        'find_coffee_buddies_who_love_your_favorite_books?',
+        'join_group_outings_for_concerts_hikes_or_art_shows',
+        'discover_new_local_spots_with_others',
+        'plan_last-minute_hangouts_without_the_hassle'
+    ],
+    'platform': [
+        'match_with_people_who_share_your_vibe',
+        'host_or_join_local_meetups_safely',
+        'build_real_friendships_(not_just_followers)',
+        'plan_quick_meetups_with_others',
+        'discover_new_local_activities_with_friends'
+    ],
+    'challenges': [
+        'i_dont_know_where_to_go_or_what_places_to_visit',
+        'i_dont_have_anyone_to_go_with_and_feel_isolated.',
+        'im_stuck_with_same_group_and_feeling_bored_and_want_to_meet_new_people',
+        'im_shy_or_experience_social_anxiety',
+        'i_dont_have_time_due_to_a_busy_schedule.'
+    ],
+    'features': [
+        'instant_meetup_requests_(eg_meet_me_at_this_cafe_today)',
+        'interest-based_matching_(eg_hiking,_cafe_hopping)',
+        'location-based_suggestions_for_nearby_hangouts',
+        'discovering_new_places_in_my_city',
+        'finding_people_for_regular_activities_(eg_weekly_hikes)',
+        'group_activities_or_events',
+        'profile_previews_before_connecting'
+    ],
+    'safety': [
+        'user_verification_(eg_ID check_or_social_media_linking)',
+        'ratings_or_reviews_of_other_users',
+        'emergency_contact_options_or_safety_alerts',
+        'in-app_messaging_only'
+    ],
+    'scenarios': [
+        'finding_coffee_buddies_who_love_my_favorite_books_or_hobbies',
+        'joining_group_outings_for_hikes,_concerts,_or_art_shows',
+        # The template wraps this attribute value over two lines, and browsers submit it verbatim
+        'connecting_with_potential_activity_partners_(e.g.,_gym,\n                        _games)',
+        'finding_someone_to_join_me_for_a_quick_outing',
+        'planning_last-minute_hangouts_without_the_hassle'
+    ]
+}
+
+
+# Radio-button pages allow exactly one answer
+SINGLE_CHOICE_GROUPS = {'new_things'}
+
+
+def max_selections(group):
+    """How many options static/script.js lets a respondent pick on a page (getMaxSelections)"""
+    if group in SINGLE_CHOICE_GROUPS:
+        return 1
+    option_count = len(ANSWER_OPTIONS[group])
+    if option_count >= 6:
+        return 4
+    if option_count == 5:
+        return 3
+    return 2
+
+
+def split_answer_values(group, joined):
+    """Split a comma-joined answer column back into option values
+
+    Some option values contain commas themselves, so adjacent pieces are
+    re-joined whenever together they spell a known option for the group.
+    """
+    if not joined:
+        return []
+    pieces = joined.split(',')
+    known = ANSWER_OPTIONS.get(group, ())
+    max_span = max((option.count(',') + 1 for option in known), default=1)
+
+    values = []
+    i = 0
+    while i < len(pieces):
+        for span in range(min(max_span, len(pieces) - i), 0, -1):
+            candidate = ','.join(pieces[i:i + span])
+            if span == 1 or candidate in known:
+                values.append(candidate)
+                i += span
+                break
+    return values
@@ -0,0 +1,293 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from flask.json.provider import JSONProvider
+
+slow_query_logger = logging.getLogger('slow_query')
+
+# Prometheus default buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+ROW_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+STATEMENT_LABEL_LENGTH = 100
+
+UNKNOWN_ROWCOUNT = 2 ** 63
+
+
+def statement_label(sql):
+    """Whitespace-collapsed SQL, cut in the middle so both the column list and the WHERE tail survive"""
+    sql = re.sub(r'\s+', ' ', sql).strip()
+    if len(sql) <= STATEMENT_LABEL_LENGTH:
+        return sql
+    head = STATEMENT_LABEL_LENGTH * 3 // 5
+    return sql[:head] + '...' + sql[-(STATEMENT_LABEL_LENGTH - head - 3):]
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in (*zip(names, values), *extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format"""
+
+    def __init__(self, name, help_text, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.label_names, label_values, [('le', f"{bound:g}")])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values, [('le', '+Inf')])
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return '\n'.join(lines)
+
+
+class Gauge:
+    """Values read at scrape time from a callable returning {label values tuple: number}"""
+
+    def __init__(self, name, help_text, label_names, collect):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.collect = collect
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        for label_values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return '\n'.join(lines)
+
+
+class Counter(Gauge):
+    """Monotonic totals read at scrape time from a callable returning {label values tuple: number}"""
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+class RequestTiming:
+    """Time spent in the database and in JSON serialization during one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.serialization = 0.0
+
+
+def current_timing():
+    if has_request_context():
+        return g.get('request_timing')
+    return None
+
+
+def current_endpoint():
+    if has_request_context():
+        return request.endpoint or 'unmatched'
+    return 'background'
+
+
+class Instrumentation:
+    """Per-request Server-Timing, per-statement metrics and a slow-query log for a Flask app"""
+
+    def __init__(self, slow_query_ms=200):
+        self.slow_query_ms = slow_query_ms
+        self.registry = MetricsRegistry()
+        self.request_duration = self.registry.register(Histogram(
+            'http_request_duration_seconds', 'Time from request start until the response is returned',
+            ('endpoint', 'method', 'status')
+        ))
+        self.serialization_duration = self.registry.register(Histogram(
+            'json_serialization_duration_seconds', 'Time spent encoding JSON bodies per request', ('endpoint',)
+        ))
+        self.statement_duration = self.registry.register(Histogram(
+            'db_statement_duration_seconds', 'Latency of each SQL statement', ('endpoint', 'statement')
+        ))
+        self.statement_rows = self.registry.register(Histogram(
+            'db_statement_rows', 'Rows returned or affected per SQL statement', ('endpoint', 'statement'),
+            buckets=ROW_BUCKETS
+        ))
+
+    def init_app(self, app):
+        # Wraps whichever provider the app was given, so set app.json before calling init_app
+        app.json = TimedJSONProvider(app, app.json)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    def _start_request(self):
+        g.request_timing = RequestTiming()
+
+    def _finish_request(self, response):
+        timing = g.pop('request_timing', None)
+        if timing is None:
+            return response
+        total = time.perf_counter() - timing.started
+        endpoint = current_endpoint()
+        self.request_duration.observe(total, endpoint, request.method, str(response.status_code))
+        if timing.serialization:
+            self.serialization_duration.observe(timing.serialization, endpoint)
+        response.headers['Server-Timing'] = (
+            f'db;dur={timing.db * 1000:.2f};desc="{timing.queries} queries", '
+            f'serialize;dur={timing.serialization * 1000:.2f}, '
+            f'total;dur={total * 1000:.2f}'
+        )
+        return response
+
+    def record_statement(self, sql, elapsed, rows):
+        endpoint = current_endpoint()
+        label = statement_label(sql)
+        self.statement_duration.observe(elapsed, endpoint, label)
+        if rows is not None:
+            self.statement_rows.observe(rows, endpoint, label)
+        timing = current_timing()
+        if timing is not None:
+            timing.db += elapsed
+            timing.queries += 1
+        if elapsed * 1000 >= self.slow_query_ms:
+            statement = re.sub(r'\s+', ' ', sql).strip()
+            slow_query_logger.warning(f"Slow query ({elapsed * 1000:.1f} ms, {rows} rows) in {endpoint}: {statement}")
+
+    def record_fetch(self, elapsed):
+        timing = current_timing()
+        if timing is not None:
+            timing.db += elapsed
+
+    def wrap_cursor(self, cursor):
+        return InstrumentedCursor(cursor, self)
+
+
+class InstrumentedCursor:
+    """Cursor proxy that times every statement and fetch and reports them to Instrumentation"""
+
+    def __init__(self, cursor, instrumentation):
+        self._cursor = cursor
+        self._instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def _timed_statement(self, method, sql, args):
+        started = time.perf_counter()
+        try:
+            return method(sql, args)
+        finally:
+            rows = self._cursor.rowcount
+            # Unbuffered cursors report an unsigned -1 until the result has been read
+            if rows is not None and not 0 <= rows < UNKNOWN_ROWCOUNT:
+                rows = None
+            self._instrumentation.record_statement(sql, time.perf_counter() - started, rows)
+
+    def execute(self, query, args=None):
+        return self._timed_statement(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed_statement(self._cursor.executemany, query, args)
+
+    def _timed_fetch(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._instrumentation.record_fetch(time.perf_counter() - started)
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+
+def _add_serialization_time(started):
+    timing = current_timing()
+    if timing is not None:
+        timing.serialization += time.perf_counter() - started
+
+
+class TimedJSONProvider(JSONProvider):
+    """Wraps the app's JSON provider, adding encode time to the current request's Server-Timing"""
+
+    def __init__(self, app, provider):
+        super().__init__(app)
+        self.provider = provider
+
+    def __getattr__(self, name):
+        # sort_keys, compact, mimetype and anything else the wrapped provider defines
+        return getattr(self.provider, name)
+
+    def dumps(self, obj, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.provider.dumps(obj, **kwargs)
+        finally:
+            _add_serialization_time(started)
+
+    def loads(self, s, **kwargs):
+        return self.provider.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.provider.response(*args, **kwargs)
+        finally:
+            _add_serialization_time(started)
@@ -0,0 +1,112 @@
+import dataclasses
+import decimal
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional dependency: pip install orjson
+    orjson = None
+
+
+class Rows:
+    """Tuple rows sharing one list of column names, serialized as a JSON array of objects
+
+    Cursors return plain tuples for large results, so no per-row dict is kept
+    around; the objects only exist for the duration of the encode call.
+    """
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def as_dicts(self):
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+
+def json_default(o):
+    """Flask's default conversions, plus Rows"""
+    if isinstance(o, Rows):
+        return o.as_dicts()
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def orjson_available():
+    return orjson is not None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider on orjson when it is installed, falling back to the standard library
+
+    Documents are the same as DefaultJSONProvider's: sorted keys, dates as
+    HTTP dates, Decimals and UUIDs as strings. orjson writes non-ASCII text
+    as UTF-8 rather than \\u escapes and never adds spaces after separators,
+    so only the bytes differ, never the parsed document. Calls passing options
+    orjson cannot honour (custom separators, indent other than 2, a custom
+    `default` or `cls`) go through the standard library.
+    """
+
+    default = staticmethod(json_default)
+
+    def __init__(self, app, use_orjson=True):
+        super().__init__(app)
+        self.use_orjson = use_orjson and orjson is not None
+
+    def _orjson_option(self, kwargs):
+        """orjson option flags equivalent to json.dumps keyword arguments, or None if there are none"""
+        if not self.use_orjson:
+            return None
+        kwargs = dict(kwargs)
+        kwargs.pop('ensure_ascii', None)
+        sort_keys = kwargs.pop('sort_keys', self.sort_keys)
+        indent = kwargs.pop('indent', None)
+        separators = kwargs.pop('separators', None)
+        if kwargs or indent not in (None, 2) or (indent is None and separators not in (None, (',', ':'))):
+            return None
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = self._orjson_option(kwargs)
+        if option is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=json_default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """jsonify, encoding straight to bytes on the orjson path"""
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args = {'indent': 2}
+        else:
+            dump_args = {'separators': (',', ':')}
+        option = self._orjson_option(dump_args)
+        if option is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=json_default, option=option | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,190 @@
+import functools
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g, request, make_response
+
+
+class MemoryBackend:
+    """In-process LRU store for cached responses"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def generation(self):
+        return self._generation
+
+    def bump_generation(self):
+        with self._lock:
+            self._generation += 1
+            # Old-generation keys can never be hit again, so drop them now
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """Cache store in a local SQLite file, shared by every worker process on the host"""
+
+    def __init__(self, path, max_entries=2048):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self.evictions = 0
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS response_cache (
+                key TEXT PRIMARY KEY,
+                expires_at REAL NOT NULL,
+                value BLOB NOT NULL
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS response_cache_generation (id INTEGER PRIMARY KEY, value INTEGER)")
+        conn.execute("INSERT OR IGNORE INTO response_cache_generation (id, value) VALUES (1, 0)")
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO response_cache (key, expires_at, value) VALUES (?, ?, ?)",
+            (key, time.time() + ttl, pickle.dumps(value))
+        )
+        # Expired rows go first, then the entries closest to expiry
+        evicted = conn.execute("""
+            DELETE FROM response_cache WHERE key IN (
+                SELECT key FROM response_cache ORDER BY expires_at
+                LIMIT MAX(0, (SELECT COUNT(*) FROM response_cache) - ?)
+            )
+        """, (self.max_entries,)).rowcount
+        self.evictions += max(evicted, 0)
+
+    def generation(self):
+        return self._conn().execute("SELECT value FROM response_cache_generation WHERE id = 1").fetchone()[0]
+
+    def bump_generation(self):
+        conn = self._conn()
+        conn.execute("UPDATE response_cache_generation SET value = value + 1 WHERE id = 1")
+        conn.execute("DELETE FROM response_cache")
+
+    def size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """Caches whole Flask responses per route and query string until their TTL or the next write
+
+    Writes only bump the generation in the process that made them (or on the
+    host, with SQLiteBackend), so entries are also keyed on the data version
+    conditional_response read for this request: a write from any worker
+    changes the version and the old entries are never hit again.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, req, version):
+        """Cache key for a request (Flask or Quart) against the data version its validators were built from"""
+        args = '&'.join(f"{k}={v}" for k, v in sorted(req.args.items(multi=True)))
+        return f"{self.backend.generation()}:{version}:{req.endpoint}:{req.path}?{args}"
+
+    def lookup(self, key):
+        """(body, status, headers) stored under key, or None"""
+        entry = self.backend.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def store(self, key, body, status, headers, ttl):
+        self.backend.set(key, (body, status, [(k, v) for k, v in headers.items() if k != 'Content-Length']), ttl)
+
+    def cached(self, ttl):
+        """Decorator for read-only Flask routes; only 200 responses with a buffered body are stored"""
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self.key(request, g.get('data_version'))
+                entry = self.lookup(key)
+                if entry is not None:
+                    body, status, headers = entry
+                    response = make_response(body, status)
+                    response.headers.update(headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.is_streamed:
+                    self.store(key, response.get_data(), response.status_code, response.headers, ttl)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    def invalidate(self):
+        """Called after a successful write; every cached response becomes stale at once"""
+        self.backend.bump_generation()
+
+    def stats(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'generation': self.backend.generation(),
+            'entries': self.backend.size(),
+            'hits': hits,
+            'misses': misses,
+            'evictions': self.backend.evictions
+        }
+
+
+def create_response_cache(backend='memory', path='response_cache.db', max_entries=None):
+    """ResponseCache on the named backend; max_entries defaults to 2048 for SQLite and 512 in memory"""
+    if backend == 'sqlite':
+        return ResponseCache(SQLiteBackend(path, max_entries=max_entries or 2048))
+    return ResponseCache(MemoryBackend(max_entries=max_entries or 512))
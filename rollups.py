@@ -0,0 +1,215 @@
+from collections import Counter
+from decimal import Decimal
+
+# Columns whose per-value counts are kept, and the key each one uses in the summary payload
+COUNT_DIMENSIONS = {
+    'gender': 'gender',
+    'age': 'age_range',
+    'city': 'city'
+}
+
+# Frustration columns and the AVG alias /answers/summary reports them under
+FRUSTRATION_AVERAGES = {
+    'frustration_no_buddies': 'avg_no_buddies',
+    'frustration_social_rut': 'avg_social_rut',
+    'frustration_starting_convos': 'avg_starting_convos',
+    'frustration_similar_interests': 'avg_similar_interests',
+    'frustration_short_notice': 'avg_short_notice',
+    'frustration_isolated_new_place': 'avg_isolated_new_place'
+}
+
+RESPONSES_METRIC = 'responses'
+
+# MySQL reports AVG() over INT columns with div_precision_increment (4) decimal places
+AVG_QUANTUM = Decimal('0.0001')
+
+ROLLUP_TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS response_rollup_counts (
+        dimension VARCHAR(20) NOT NULL,
+        value VARCHAR(255) NOT NULL,
+        count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (dimension, value)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS response_rollup_totals (
+        metric VARCHAR(64) PRIMARY KEY,
+        total BIGINT NOT NULL DEFAULT 0
+    )
+    """
+]
+
+UPSERT_COUNT_SQL = """
+    INSERT INTO response_rollup_counts (dimension, value, count) VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+"""
+
+UPSERT_TOTAL_SQL = """
+    INSERT INTO response_rollup_totals (metric, total) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+"""
+
+
+def rollup_deltas(rows, columns):
+    """Parameters for UPSERT_COUNT_SQL and UPSERT_TOTAL_SQL covering a batch of new rows"""
+    positions = {column: columns.index(column) for column in (*COUNT_DIMENSIONS, *FRUSTRATION_AVERAGES)}
+
+    counts = Counter()
+    for row in rows:
+        for dimension in COUNT_DIMENSIONS:
+            value = row[positions[dimension]]
+            if value:
+                counts[(dimension, value)] += 1
+    totals = {RESPONSES_METRIC: len(rows)}
+    for column in FRUSTRATION_AVERAGES:
+        totals[column] = sum(row[positions[column]] or 0 for row in rows)
+
+    return [(d, v, n) for (d, v), n in counts.items()], list(totals.items())
+
+
+def apply_rollups(cursor, rows, columns):
+    """Add a batch of freshly inserted rows to the rollups (call inside the insert transaction)"""
+    if not rows:
+        return
+    count_params, total_params = rollup_deltas(rows, columns)
+    if count_params:
+        cursor.executemany(UPSERT_COUNT_SQL, count_params)
+    cursor.executemany(UPSERT_TOTAL_SQL, total_params)
+
+
+SELECT_TOTALS_SQL = "SELECT metric, total FROM response_rollup_totals"
+
+SELECT_COUNTS_SQL = "SELECT dimension, value, count FROM response_rollup_counts WHERE count > 0"
+
+
+def read_summary(cursor):
+    """Build the /answers/summary payload from the rollup tables, or None if they were never built"""
+    cursor.execute(SELECT_TOTALS_SQL)
+    total_rows = cursor.fetchall()
+    if not any(row['metric'] == RESPONSES_METRIC for row in total_rows):
+        return None
+    cursor.execute(SELECT_COUNTS_SQL)
+    return summary_from_rollups(total_rows, cursor.fetchall())
+
+
+def summary_from_rollups(total_rows, count_rows):
+    """Assemble the summary payload from the rows of SELECT_TOTALS_SQL and SELECT_COUNTS_SQL"""
+    totals = {row['metric']: row['total'] for row in total_rows}
+    by_dimension = {dimension: [] for dimension in COUNT_DIMENSIONS}
+    for row in count_rows:
+        by_dimension[row['dimension']].append((row['value'], row['count']))
+    for values in by_dimension.values():
+        values.sort(key=lambda item: (-item[1], item[0]))
+
+    total_responses = totals[RESPONSES_METRIC]
+    averages = {}
+    for column, alias in FRUSTRATION_AVERAGES.items():
+        if total_responses:
+            averages[alias] = (Decimal(totals.get(column, 0)) / total_responses).quantize(AVG_QUANTUM)
+        else:
+            averages[alias] = None
+
+    age_stats = [{'age_range': value, 'count': count} for value, count in by_dimension['age']]
+    return {
+        'total_responses': total_responses,
+        'gender_distribution': [{'gender': value, 'count': count} for value, count in by_dimension['gender']],
+        'age_statistics': age_stats if age_stats else {},
+        'top_cities': [{'city': value, 'count': count} for value, count in by_dimension['city'][:10]],
+        'average_frustration_scores': averages
+    }
+
+
+def compute_live_summary(cursor):
+    """Build the /answers/summary payload with full-table aggregate queries"""
+    # Get basic counts
+    cursor.execute("SELECT COUNT(*) as total FROM desirability_form_responses")
+    total_responses = cursor.fetchone()['total']
+
+    # Get gender distribution
+    cursor.execute("""
+        SELECT gender, COUNT(*) as count
+        FROM desirability_form_responses
+        WHERE gender IS NOT NULL AND gender != ''
+        GROUP BY gender
+        ORDER BY count DESC, gender
+    """)
+    gender_stats = cursor.fetchall()
+
+    # Get age statistics - Updated for VARCHAR age field
+    cursor.execute("""
+        SELECT
+            age as age_range,
+            COUNT(*) as count
+        FROM desirability_form_responses
+        WHERE age IS NOT NULL AND age != ''
+        GROUP BY age
+        ORDER BY COUNT(*) DESC, age
+    """)
+    age_stats = cursor.fetchall()
+
+    # Get top cities
+    cursor.execute("""
+        SELECT city, COUNT(*) as count
+        FROM desirability_form_responses
+        WHERE city IS NOT NULL AND city != ''
+        GROUP BY city
+        ORDER BY count DESC, city
+        LIMIT 10
+    """)
+    city_stats = cursor.fetchall()
+
+    # Get average frustration scores
+    cursor.execute(f"""
+        SELECT {', '.join(f'AVG({column}) as {alias}' for column, alias in FRUSTRATION_AVERAGES.items())}
+        FROM desirability_form_responses
+    """)
+    frustration_stats = cursor.fetchone()
+    if frustration_stats:
+        # SQLite returns AVG() as a float; report it the way MySQL does
+        frustration_stats = {
+            alias: Decimal(value).quantize(AVG_QUANTUM) if value is not None else None
+            for alias, value in frustration_stats.items()
+        }
+
+    return {
+        'total_responses': total_responses,
+        'gender_distribution': gender_stats,
+        'age_statistics': age_stats if age_stats else {},
+        'top_cities': city_stats,
+        'average_frustration_scores': frustration_stats if frustration_stats else {}
+    }
+
+
+def rebuild_rollups(cursor):
+    """Recompute both rollup tables from desirability_form_responses (caller commits)"""
+    cursor.execute("DELETE FROM response_rollup_counts")
+    cursor.execute("DELETE FROM response_rollup_totals")
+    for dimension in COUNT_DIMENSIONS:
+        cursor.execute(f"""
+            INSERT INTO response_rollup_counts (dimension, value, count)
+            SELECT %s, {dimension}, COUNT(*)
+            FROM desirability_form_responses
+            WHERE {dimension} IS NOT NULL AND {dimension} != ''
+            GROUP BY {dimension}
+        """, (dimension,))
+    cursor.execute(f"""
+        INSERT INTO response_rollup_totals (metric, total)
+        SELECT %s, COUNT(*) FROM desirability_form_responses
+        {''.join(f" UNION ALL SELECT '{column}', COALESCE(SUM({column}), 0) FROM desirability_form_responses"
+                 for column in FRUSTRATION_AVERAGES)}
+    """, (RESPONSES_METRIC,))
+
+
+def compare_summaries(rollup, live):
+    """Return a list of human-readable differences between two summary payloads"""
+    differences = []
+    for key in live:
+        rollup_value, live_value = rollup.get(key), live[key]
+        if key in ('gender_distribution', 'age_statistics', 'top_cities'):
+            # Ties in count may be ordered differently; compare as sets of (value, count)
+            rollup_value = sorted(tuple(item.values()) for item in rollup_value or [])
+            live_value = sorted(tuple(item.values()) for item in live_value or [])
+        if rollup_value != live_value:
+            differences.append(f"{key}: rollup={rollup_value!r} live={live_value!r}")
+    return differences
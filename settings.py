@@ -0,0 +1,110 @@
+"""Configuration shared by flask_app.py and asgi_app.py, read once from the environment (and .env)"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Database configuration for PythonAnywhere MySQL
+DB_CONFIG = {
+    'host': os.getenv('DB_HOST', 'junoform.mysql.pythonanywhere-services.com'),
+    'user': os.getenv('DB_USER', 'junoform'),
+    'password': os.getenv('DB_PASSWORD', '4d7CDntp6rZ6Xud'),
+    'database': os.getenv('DB_NAME', 'junoform$default'),
+    'port': int(os.getenv('DB_PORT', 3306)),
+    'charset': 'utf8mb4'
+}
+
+# Connection pool settings (recycle is the max lifetime of a connection in seconds)
+POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 5)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+    'recycle': int(os.getenv('DB_POOL_RECYCLE', 280))
+}
+
+# STORAGE_ENGINE=sqlite keeps everything in one embedded file (load tests, small single-host deployments)
+STORAGE_ENGINE = os.getenv('STORAGE_ENGINE', 'mysql').lower()
+
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'form_responses.db')
+
+# SQLite engine settings: synchronous=NORMAL is durable across crashes of the process (not of the host) in WAL
+# mode, and group commit lets one writer thread commit every queued submission in a single transaction
+SQLITE_CONFIG = {
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size_kb': int(os.getenv('SQLITE_CACHE_SIZE_KB', 16384)),
+    'group_commit': os.getenv('SQLITE_GROUP_COMMIT', 'true').lower() in ('1', 'true', 'yes'),
+    'max_batch': int(os.getenv('SQLITE_MAX_BATCH', 256)),
+    'commit_delay': float(os.getenv('SQLITE_COMMIT_DELAY_MS', 0)) / 1000
+}
+
+# orjson-backed JSON when installed (JSON_ENCODER=stdlib forces the standard library encoder)
+USE_ORJSON = os.getenv('JSON_ENCODER', 'orjson').lower() != 'stdlib'
+
+# Unfiltered total maintained in-process, and filtered totals cached per filter
+TOTAL_REFRESH_INTERVAL = int(os.getenv('TOTAL_REFRESH_INTERVAL', 300))
+FILTERED_TOTAL_TTL = int(os.getenv('FILTERED_TOTAL_TTL', 60))
+
+# Read-endpoint response cache, invalidated by every successful write
+RESPONSE_CACHE_TTLS = {
+    'summary': int(os.getenv('CACHE_TTL_SUMMARY', 30)),
+    'single_answer': int(os.getenv('CACHE_TTL_SINGLE_ANSWER', 300)),
+    'analytics': int(os.getenv('CACHE_TTL_ANALYTICS', 60)),
+    'powerbi': int(os.getenv('CACHE_TTL_POWERBI', 60))
+}
+
+# RESPONSE_CACHE_BACKEND=sqlite shares cached responses between all worker processes on the host
+RESPONSE_CACHE_CONFIG = {
+    'backend': os.getenv('RESPONSE_CACHE_BACKEND', 'memory').lower(),
+    'path': os.getenv('RESPONSE_CACHE_PATH', 'response_cache.db'),
+    'max_entries': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 0)) or None
+}
+
+EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', 500))
+
+# Ids below since_id that every Power BI delta re-reads, for rows whose transaction committed after a later id's
+POWERBI_ID_OVERLAP = int(os.getenv('POWERBI_ID_OVERLAP', 100))
+
+# Concurrent streaming exports per asgi_app worker; each holds one connection of a separate export pool
+ASGI_EXPORT_CONCURRENCY = int(os.getenv('ASGI_EXPORT_CONCURRENCY', 2))
+
+# Local spool that takes submissions while MySQL is down and replays them once it recovers ('' disables it)
+SPOOL_PATH = os.getenv('SUBMIT_SPOOL_PATH', 'submission_spool.db')
+SPOOL_CONFIG = {
+    'batch_size': int(os.getenv('SUBMIT_SPOOL_BATCH_SIZE', 200)),
+    'replay_interval': float(os.getenv('SUBMIT_SPOOL_REPLAY_INTERVAL', 5))
+}
+
+# Admission control for /submit: token buckets per client IP and overall (requests per second, 0 disables; both
+# off unless set), and a cap on concurrent database sections per worker (defaults to the pool size on MySQL, off
+# on SQLite) whose waiters are shed after ADMISSION_QUEUE_TIMEOUT_MS; keep it short so overload fails fast with a 503
+# (raise it towards DB_POOL_TIMEOUT to queue instead)
+ADMISSION_CONFIG = {
+    'client_rate': float(os.getenv('ADMISSION_CLIENT_RATE', 0)),
+    'client_burst': int(os.getenv('ADMISSION_CLIENT_BURST', 20)),
+    'global_rate': float(os.getenv('ADMISSION_GLOBAL_RATE', 0)),
+    'global_burst': int(os.getenv('ADMISSION_GLOBAL_BURST', 200)),
+    'max_concurrent': int(os.getenv('ADMISSION_MAX_CONCURRENT',
+                                    POOL_CONFIG['max_size'] if STORAGE_ENGINE == 'mysql' else 0)),
+    'queue_timeout': float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', 50)) / 1000
+}
+
+# ADMISSION_BACKEND=sqlite shares the buckets between all worker processes on the host
+ADMISSION_BACKEND_CONFIG = {
+    'backend': os.getenv('ADMISSION_BACKEND', 'memory').lower(),
+    'path': os.getenv('ADMISSION_PATH', 'admission.db'),
+    'max_clients': int(os.getenv('ADMISSION_MAX_CLIENTS', 10000))
+}
+
+# Behind a reverse proxy every request comes from the proxy, so set this to the number of proxies that append
+# to X-Forwarded-For before enabling ADMISSION_CLIENT_RATE, or all clients share one bucket
+TRUSTED_PROXIES = int(os.getenv('ADMISSION_TRUSTED_PROXIES', 0))
+
+# Duplicate suppression for /submit: a repeat with the same Idempotency-Key header, or with SUBMIT_DEDUPE_CONTENT
+# the same payload (carrying an email) from the same client within SUBMIT_DEDUPE_RETENTION seconds, gets the
+# original submission back. Recent submissions are answered from memory; the unique submission_key index catches
+# the rest across workers.
+DEDUPE_RETENTION = int(os.getenv('SUBMIT_DEDUPE_RETENTION', 600))
+DEDUPE_BY_CONTENT = (os.getenv('SUBMIT_DEDUPE_CONTENT', '').lower() in ('1', 'true', 'yes')
+                     and DEDUPE_RETENTION > 0)
+DEDUPE_MAX_ENTRIES = int(os.getenv('SUBMIT_DEDUPE_MAX_ENTRIES', 10000))
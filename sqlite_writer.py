@@ -0,0 +1,160 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+logger = logging.getLogger(__name__)
+
+
+class WriterUnavailable(sqlite3.OperationalError):
+    """The writer thread did not take a write: it is shut down or did not get to it within its timeout"""
+
+
+class SQLiteWriter:
+    """Single writer thread that group-commits queued write functions
+
+    SQLite serializes writers anyway, so instead of letting request threads
+    fight over the write lock, each one hands `write(work)` a function and
+    waits for its result. The writer thread runs every function queued at
+    that moment in one transaction, each inside its own savepoint so one
+    failure only rolls back its own changes, and pays for a single commit
+    (and, with synchronous=FULL, a single fsync) per batch.
+    """
+
+    def __init__(self, connect, max_batch=256, max_delay=0.0, timeout=5.0):
+        self.connect = connect
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Counters exposed through /health
+        self.writes = 0
+        self.failed_writes = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.commit_seconds = 0.0
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+            self._thread.start()
+
+    def write(self, work):
+        """Run work(cursor) on the writer thread and return its result once committed
+
+        Raises WriterUnavailable only for a write that is guaranteed never to
+        run, so a caller can safely spool it. A write still queued after
+        `timeout` is withdrawn; one the writer thread has already started
+        cannot be, so write waits for that batch to commit or fail instead.
+        """
+        if self._stopping.is_set():
+            raise WriterUnavailable("SQLite writer is shut down")
+        future = Future()
+        self._queue.put((work, future))
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise WriterUnavailable(f"SQLite writer did not start within {self.timeout}s") from None
+            # Already part of a running batch, bounded by the connection's busy timeout
+            return future.result()
+
+    def _drain(self, batch):
+        """Add whatever else is queued, waiting up to max_delay for late arrivals"""
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return
+
+    def _commit(self, conn, batch):
+        # Skip writes whose caller already gave up waiting
+        batch = [(work, future) for work, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        cursor = conn.cursor()
+        results = []
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            for work, future in batch:
+                cursor.execute("SAVEPOINT batch_item")
+                try:
+                    results.append((future, work(cursor)))
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO batch_item")
+                    future.set_exception(e)
+                    with self._lock:
+                        self.failed_writes += 1
+                finally:
+                    cursor.execute("RELEASE batch_item")
+            started = time.perf_counter()
+            cursor.execute("COMMIT")
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            logger.error(f"Group commit of {len(batch)} writes failed: {e}")
+            conn.rollback()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            cursor.close()
+
+        for future, result in results:
+            future.set_result(result)
+        with self._lock:
+            self.writes += len(results)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self.commit_seconds += elapsed
+
+    def _run(self):
+        conn = self.connect()
+        try:
+            while True:
+                try:
+                    batch = [self._queue.get(timeout=0.5)]
+                except queue.Empty:
+                    if self._stopping.is_set():
+                        return
+                    continue
+                self._drain(batch)
+                self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def stop(self, timeout=10):
+        """Commit everything still queued and stop the writer thread"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.error(f"SQLite writer did not finish within {timeout}s; {self._queue.qsize()} writes pending")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._queue.qsize(),
+                'writes': self.writes,
+                'failed_writes': self.failed_writes,
+                'batches': self.batches,
+                'largest_batch': self.largest_batch,
+                'avg_batch': round(self.writes / self.batches, 2) if self.batches else None,
+                'avg_commit_ms': round(self.commit_seconds / self.batches * 1000, 3) if self.batches else None
+            }
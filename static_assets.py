@@ -0,0 +1,268 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # optional dependency: pip install brotli
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:  # optional dependency: pip install rcssmin
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:  # optional dependency: pip install rjsmin
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+# Text formats worth precompressing; PNG and JPEG are compressed already
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+
+# Hashed URLs change whenever the content does, so browsers may keep them for good
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Preferred first when the client accepts both
+ENCODINGS = ('br', 'gzip')
+
+ENCODING_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+CSS_STRING_OR_COMMENT = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/', re.S)
+
+
+def minify_css(text):
+    """rcssmin when installed, otherwise comments and insignificant whitespace removed outside strings"""
+    if rcssmin is not None:
+        return rcssmin.cssmin(text)
+    strings = []
+
+    def protect(match):
+        token = match.group()
+        if token.startswith('/*'):
+            return ' '
+        strings.append(token)
+        return f"\x00{len(strings) - 1}\x00"
+
+    code = CSS_STRING_OR_COMMENT.sub(protect, text)
+    code = re.sub(r'\s+', ' ', code)
+    code = re.sub(r' ?([{};,]) ?', r'\1', code)
+    code = code.replace(': ', ':').replace(';}', '}')
+    return re.sub('\x00(\\d+)\x00', lambda match: strings[int(match.group(1))], code).strip()
+
+
+def minify_js(text):
+    """rjsmin when installed; JavaScript is left as is otherwise (it is still precompressed)"""
+    if rjsmin is not None:
+        return rjsmin.jsmin(text)
+    return text
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def precompress(data):
+    """gzip (and, when installed, brotli) encodings of data, keeping only those that come out smaller"""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)
+    return {encoding: compressed for encoding, compressed in variants.items() if len(compressed) < len(data)}
+
+
+def negotiated_response(variants, tag, accept_encodings, if_none_match, headers):
+    """(body, status, headers) for the smallest variant the client accepts, or a 304 if its ETag matches
+
+    variants maps content codings ('identity', 'gzip', 'br') to bytes; tag
+    identifies the content and is combined with the coding into the ETag.
+    """
+    encoding = next((e for e in ENCODINGS if e in variants and e in accept_encodings), 'identity')
+    etag = f"{tag}-{encoding}"
+    headers = {**headers, 'ETag': f'"{etag}"', 'Vary': 'Accept-Encoding'}
+    if if_none_match and if_none_match.contains(etag):
+        headers.pop('Content-Type', None)
+        return b'', 304, headers
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return variants[encoding], 200, headers
+
+
+def hashed_name(path, digest):
+    root, extension = os.path.splitext(path)
+    return f"{root}.{digest}{extension}"
+
+
+def source_files(static_dir, output_dir):
+    """Paths of the static files relative to static_dir, leaving out the build output and dotfiles"""
+    output_dir = os.path.abspath(output_dir)
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs
+                         if not d.startswith('.') and os.path.abspath(os.path.join(root, d)) != output_dir)
+        for name in sorted(files):
+            if not name.startswith('.'):
+                yield os.path.relpath(os.path.join(root, name), static_dir).replace(os.sep, '/')
+
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def build_assets(static_dir, output_dir):
+    """Minify, fingerprint and precompress every static file into output_dir; returns the manifest
+
+    Each file is written as <name>.<content hash>.<ext>, plus .gz and .br
+    variants for text formats when they come out smaller. Earlier builds are
+    left in place so pages rendered before a deploy can still load their
+    assets.
+    """
+    assets = {}
+    for path in source_files(static_dir, output_dir):
+        with open(os.path.join(static_dir, path), 'rb') as f:
+            original = f.read()
+        extension = os.path.splitext(path)[1].lower()
+        data = original
+        minifier = MINIFIERS.get(extension)
+        if minifier is not None:
+            data = minifier(original.decode('utf-8')).encode('utf-8')
+
+        built_path = hashed_name(path, hashlib.sha256(data).hexdigest()[:12])
+        write_file(os.path.join(output_dir, built_path), data)
+        entry = {'path': built_path, 'original_size': len(original), 'size': len(data), 'encodings': {}}
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            for encoding, compressed in precompress(data).items():
+                write_file(os.path.join(output_dir, built_path + ENCODING_SUFFIXES[encoding]), compressed)
+                entry['encodings'][encoding] = len(compressed)
+        assets[path] = entry
+
+    manifest = {'assets': assets}
+    write_file(os.path.join(output_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+class AssetManifest:
+    """Built assets held in memory, served by their fingerprinted path
+
+    Loads the manifest written by build_assets; when there is none, hashed_path
+    returns None and pages fall back to the plain static route.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self._paths = {}
+        self._files = {}
+        self.reload()
+
+    def reload(self):
+        """Read the manifest and every built variant into memory"""
+        manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+        try:
+            with open(manifest_path, 'rb') as f:
+                assets = json.load(f)['assets']
+        except FileNotFoundError:
+            self._paths, self._files = {}, {}
+            return
+        except (ValueError, KeyError) as e:
+            logger.error(f"Ignoring unreadable asset manifest {manifest_path}: {e}")
+            self._paths, self._files = {}, {}
+            return
+
+        paths = {}
+        files = {}
+        for source, entry in assets.items():
+            built_path = entry['path']
+            try:
+                variants = {}
+                for encoding in ('identity', *entry['encodings']):
+                    file_path = os.path.join(self.output_dir, built_path + ENCODING_SUFFIXES.get(encoding, ''))
+                    with open(file_path, 'rb') as f:
+                        variants[encoding] = f.read()
+            except OSError as e:
+                logger.error(f"Built asset {built_path} is missing, serving {source} unfingerprinted: {e}")
+                continue
+            mimetype = mimetypes.guess_type(source)[0] or 'application/octet-stream'
+            if mimetype.startswith('text/') or mimetype == 'application/javascript':
+                mimetype += '; charset=utf-8'
+            paths[source] = built_path
+            files[built_path] = (mimetype, variants)
+        self._paths, self._files = paths, files
+        logger.info(f"Loaded {len(files)} fingerprinted assets from {self.output_dir}")
+
+    def hashed_path(self, filename):
+        """Fingerprinted path for a static filename, or None if it was not built"""
+        return self._paths.get(filename)
+
+    def respond(self, built_path, accept_encodings, if_none_match=None):
+        """(body, status, headers) for a fingerprinted path, or None if there is no such asset
+
+        Picks the smallest variant the client accepts. accept_encodings and
+        if_none_match are the request's parsed Accept-Encoding and
+        If-None-Match headers.
+        """
+        asset = self._files.get(built_path)
+        if asset is None:
+            return None
+        mimetype, variants = asset
+        headers = {'Cache-Control': IMMUTABLE_CACHE_CONTROL, 'Content-Type': mimetype}
+        return negotiated_response(variants, built_path.rsplit('.', 2)[-2], accept_encodings, if_none_match, headers)
+
+    def stats(self):
+        return {'assets': len(self._files), 'output_dir': self.output_dir}
+
+
+class RenderedPage:
+    """A page that renders the same for every request, kept in memory as identity, gzip and brotli bytes
+
+    The view renders once (stale() is True until store() is called) and then
+    only negotiates an encoding. With check_source, as in development, the
+    template file's mtime is compared on every request and a change makes
+    the page stale again.
+    """
+
+    def __init__(self, source_path, mimetype='text/html; charset=utf-8'):
+        self.source_path = source_path
+        self.mimetype = mimetype
+        self._page = None
+        self.renders = 0
+
+    def _source_mtime(self):
+        try:
+            return os.stat(self.source_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def stale(self, check_source=False):
+        page = self._page
+        return page is None or (check_source and page[0] != self._source_mtime())
+
+    def store(self, html):
+        """Compress a freshly rendered page and start serving it"""
+        mtime = self._source_mtime()
+        data = html.encode('utf-8')
+        variants = {'identity': data, **precompress(data)}
+        self._page = (mtime, hashlib.sha256(data).hexdigest()[:16], variants)
+        self.renders += 1
+
+    def respond(self, accept_encodings, if_none_match=None):
+        """(body, status, headers) for the stored page; call store() first if stale()"""
+        _, tag, variants = self._page
+        # Revalidate on every visit: the page names the current asset URLs, and a 304 costs no render
+        headers = {'Cache-Control': 'no-cache', 'Content-Type': self.mimetype}
+        return negotiated_response(variants, tag, accept_encodings, if_none_match, headers)
+
+    def stats(self):
+        page = self._page
+        return {
+            'renders': self.renders,
+            'sizes': {encoding: len(data) for encoding, data in page[2].items()} if page else None
+        }
@@ -0,0 +1,694 @@
+import logging
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+import pymysql
+
+from db_pool import ConnectionPool, PoolTimeout
+from sqlite_writer import SQLiteWriter, WriterUnavailable
+from submissions import (INSERT_COLUMNS, SUBMISSION_KEY_INDEX, column_map, insert_response_sql,
+                         response_select_sql, powerbi_select_sql, answers_page_query, powerbi_query)
+from answer_store import (RESPONSE_ANSWERS_TABLE_SQL, INSERT_ANSWER_SQL, OPTION_COUNTS_SQL, RESPONDENTS_SQL,
+                          crosstab_sql, build_analytics, insert_answers, backfill_answers)
+from rollups import (ROLLUP_TABLES_SQL, UPSERT_COUNT_SQL, UPSERT_TOTAL_SQL, SELECT_TOTALS_SQL, SELECT_COUNTS_SQL,
+                     apply_rollups, read_summary, compute_live_summary, rebuild_rollups, compare_summaries)
+
+logger = logging.getLogger(__name__)
+
+ENGINES = ('mysql', 'sqlite')
+
+# Errors either engine can raise, and unique-key violations
+DATABASE_ERRORS = (pymysql.Error, sqlite3.Error)
+INTEGRITY_ERRORS = (pymysql.IntegrityError, sqlite3.IntegrityError)
+
+# MySQL errors meaning the server could not be reached or was too busy, not that it rejected the statement:
+# can't connect (2003), gone away (2006), lost connection (2013), too many connections (1040), lock wait
+# timeout (1205) and deadlock (1213)
+UNAVAILABLE_ERRNOS = frozenset((2003, 2006, 2013, 1040, 1205, 1213))
+
+# SQLITE_BUSY and SQLITE_LOCKED, the primary result codes for a database another connection is writing
+SQLITE_UNAVAILABLE_CODES = (5, 6)
+
+
+def is_unavailable(e):
+    """Whether a database error means the write can succeed later (spool it) rather than never
+
+    Other errors, such as an unknown column (1054) or a denied command
+    (1142), would fail the same way on every retry.
+    """
+    if isinstance(e, (PoolTimeout, WriterUnavailable)):
+        return True
+    if isinstance(e, pymysql.OperationalError):
+        return bool(e.args) and e.args[0] in UNAVAILABLE_ERRNOS
+    if isinstance(e, sqlite3.OperationalError):
+        code = getattr(e, 'sqlite_errorcode', None)
+        if code is None:
+            return str(e).startswith(('database is locked', 'database table is locked'))
+        return code & 0xff in SQLITE_UNAVAILABLE_CODES
+    return False
+
+
+def error_message(e):
+    """The server's message for a database error, without the MySQL error code"""
+    if isinstance(e, pymysql.Error) and len(e.args) > 1:
+        return e.args[1]
+    return str(e)
+
+
+class MySQLEngine:
+    """MySQL through the pooled pymysql connections of db_pool.ConnectionPool"""
+
+    name = 'mysql'
+
+    def __init__(self, pool, host, database):
+        self.pool = pool
+        self.host = host
+        self.database = database
+
+    def connect(self):
+        return self.pool.acquire()
+
+    def write(self, work):
+        """Run work(cursor) on a pooled connection and commit; returns its result"""
+        conn = self.connect()
+        cursor = conn.cursor()
+        try:
+            result = work(cursor)
+            conn.commit()
+            return result
+        finally:
+            cursor.close()
+            conn.close()
+
+    def prepare(self, sql):
+        # Statements are written in MySQL's dialect already
+        return sql
+
+    def streaming_cursor(self, conn):
+        """Unbuffered tuple cursor: rows are read from the socket as the caller fetches them"""
+        return conn.cursor(pymysql.cursors.SSCursor)
+
+    def tuple_cursor(self, conn):
+        return conn.cursor(pymysql.cursors.Cursor)
+
+    def _ensure_column(self, cursor, table, column, definition):
+        cursor.execute("""
+            SELECT COUNT(*) as column_count
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """, (table, column))
+        if cursor.fetchone()['column_count'] == 0:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            logger.info(f"Added column {table}.{column}")
+
+    def _ensure_index(self, cursor, table, index, definition):
+        cursor.execute("""
+            SELECT COUNT(*) as index_count
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """, (table, index))
+        if cursor.fetchone()['index_count'] == 0:
+            cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+            logger.info(f"Added index {table}.{index}")
+
+    def init_schema(self, cursor, columns):
+        """Create or migrate the tables; returns whether the email FULLTEXT index is available"""
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS desirability_form_responses (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                full_name VARCHAR(255),
+                gender VARCHAR(50),
+                age VARCHAR(50),
+                city VARCHAR(100),
+                email VARCHAR(255),
+                phone VARCHAR(20),
+                occupation VARCHAR(255),
+                frustration_no_buddies INT DEFAULT 0,
+                frustration_social_rut INT DEFAULT 0,
+                frustration_starting_convos INT DEFAULT 0,
+                frustration_similar_interests INT DEFAULT 0,
+                frustration_short_notice INT DEFAULT 0,
+                frustration_isolated_new_place INT DEFAULT 0,
+                weekend_options TEXT,
+                {columns['feel_meeting_new_people']} TEXT,
+                vibe_selections TEXT,
+                {columns['tried_new_activity_with_someone']} TEXT,
+                {columns['meeting_blocker_to_meet_new_people']} TEXT,
+                {columns['safe_fun_way_to']} TEXT,
+                {columns['platform_join_likey_to']} TEXT,
+                {columns['challenges_you_face_when_trying_to_meet_new_people']}  TEXT,
+                {columns['likely_features_in_app']} TEXT,
+                {columns['safety_features_in_app']} TEXT,
+                {columns['scenarios_to_use_app_for']} TEXT,
+                submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                submission_key VARCHAR(64),
+                UNIQUE KEY uniq_submission_key (submission_key),
+                INDEX idx_submission_date_id (submission_date, id),
+                INDEX idx_email (email)
+            )
+        """)
+
+        # Migrate tables created before submission keys existed
+        self._ensure_column(cursor, 'desirability_form_responses', 'submission_key', 'VARCHAR(64)')
+        self._ensure_index(cursor, 'desirability_form_responses', 'uniq_submission_key',
+                           'UNIQUE INDEX uniq_submission_key (submission_key)')
+        self._ensure_index(cursor, 'desirability_form_responses', 'idx_submission_date_id',
+                           'INDEX idx_submission_date_id (submission_date, id)')
+        self._ensure_index(cursor, 'desirability_form_responses', 'idx_email',
+                           'INDEX idx_email (email)')
+
+        # Normalized multi-select answers (populate existing rows with `flask backfill-answers`)
+        cursor.execute(RESPONSE_ANSWERS_TABLE_SQL)
+        for statement in ROLLUP_TABLES_SQL:
+            cursor.execute(statement)
+
+        # Substring email search index; stopwords off so ngrams such as "at" or "on" are kept
+        try:
+            cursor.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+            self._ensure_index(cursor, 'desirability_form_responses', 'ft_email_ngram',
+                               'FULLTEXT INDEX ft_email_ngram (email) WITH PARSER ngram')
+            return True
+        except pymysql.Error as e:
+            logger.warning(f"Email FULLTEXT index unavailable, substring search will scan: {e}")
+            return False
+
+    def table_exists(self, cursor):
+        cursor.execute("""
+            SELECT COUNT(*) as table_count
+            FROM information_schema.tables
+            WHERE table_schema = %s AND table_name = 'desirability_form_responses'
+        """, (self.database,))
+        return cursor.fetchone()['table_count'] > 0
+
+    def warm_up(self):
+        self.pool.warm_up()
+
+    def close(self):
+        self.pool.close_all()
+
+    def stats(self):
+        return self.pool.stats()
+
+    def describe(self):
+        return {'engine': self.name, 'host': self.host, 'database': self.database}
+
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+# Statements whose MySQL spelling has no mechanical SQLite translation
+SQLITE_STATEMENTS = {
+    UPSERT_COUNT_SQL: """
+        INSERT INTO response_rollup_counts (dimension, value, count) VALUES (?, ?, ?)
+        ON CONFLICT (dimension, value) DO UPDATE SET count = count + excluded.count
+    """,
+    UPSERT_TOTAL_SQL: """
+        INSERT INTO response_rollup_totals (metric, total) VALUES (?, ?)
+        ON CONFLICT (metric) DO UPDATE SET total = total + excluded.total
+    """,
+    INSERT_ANSWER_SQL: """
+        INSERT OR IGNORE INTO response_answers (response_id, answer_group, option_id) VALUES (?, ?, ?)
+    """
+}
+
+SQLITE_ANSWERS_TABLE_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS response_answers (
+        response_id INTEGER NOT NULL REFERENCES desirability_form_responses (id) ON DELETE CASCADE,
+        answer_group TEXT NOT NULL,
+        option_id TEXT NOT NULL,
+        PRIMARY KEY (response_id, answer_group, option_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_group_option ON response_answers (answer_group, option_id)"
+]
+
+# Timestamps are stored as ISO text; bundled rows written by app.py use a 'T' separator
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(sep=' '))
+sqlite3.register_converter('timestamp', lambda value: datetime.fromisoformat(value.decode('utf-8')))
+
+
+def _dict_rows(description, rows):
+    names = [column[0] for column in description]
+    return [dict(zip(names, row)) for row in rows]
+
+
+class SQLiteCursor:
+    """sqlite3 cursor speaking the pymysql dialect: %s placeholders and dict rows"""
+
+    def __init__(self, engine, cursor, dict_rows=True):
+        self._engine = engine
+        self._cursor = cursor
+        self._dict_rows = dict_rows
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def execute(self, query, args=None):
+        return self._cursor.execute(self._engine.prepare(query), tuple(args) if args else ())
+
+    def executemany(self, query, args):
+        return self._cursor.executemany(self._engine.prepare(query), args)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is None or not self._dict_rows:
+            return row
+        return _dict_rows(self._cursor.description, [row])[0]
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size or self._cursor.arraysize)
+        return _dict_rows(self._cursor.description, rows) if self._dict_rows else rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        return _dict_rows(self._cursor.description, rows) if self._dict_rows else rows
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    def __init__(self, engine, raw, shared=False):
+        self._engine = engine
+        self._raw = raw
+        self._shared = shared
+
+    def cursor(self, dict_rows=True):
+        cursor = SQLiteCursor(self._engine, self._raw.cursor(), dict_rows)
+        if self._engine.cursor_wrapper is not None:
+            cursor = self._engine.cursor_wrapper(cursor)
+        return cursor
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        # A per-thread connection outlives the request; only drop what it left uncommitted
+        if self._shared:
+            if self._raw.in_transaction:
+                self._raw.rollback()
+        else:
+            self._raw.close()
+
+
+class SQLiteEngine:
+    """Embedded SQLite file, for load tests and small single-host deployments
+
+    The file runs in WAL mode, so readers never block the writer or each
+    other. Each thread keeps one connection for reads (and for maintenance
+    writes such as schema changes). Submissions go through `write`, which
+    with group commit enabled hands them to a single SQLiteWriter thread
+    that commits everything queued at once.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, timeout=5.0, synchronous='NORMAL', cache_size_kb=16384, group_commit=True,
+                 max_batch=256, commit_delay=0.0, cursor_wrapper=None):
+        self.path = path
+        self.timeout = timeout
+        self.synchronous = synchronous.upper()
+        self.cache_size_kb = cache_size_kb
+        self.cursor_wrapper = cursor_wrapper
+        self._statements = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.journal_mode = None
+
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of: {', '.join(SYNCHRONOUS_MODES)}")
+
+        self.writer = None
+        if group_commit:
+            self.writer = SQLiteWriter(lambda: SQLiteConnection(self, self._open(isolation_level=None)),
+                                       max_batch=max_batch, max_delay=commit_delay, timeout=timeout)
+            self.writer.start()
+
+    def _open(self, isolation_level=''):
+        raw = sqlite3.connect(self.path, timeout=self.timeout, detect_types=sqlite3.PARSE_DECLTYPES,
+                              check_same_thread=False, isolation_level=isolation_level)
+        # WAL is a property of the file; the rest apply to this connection only
+        self.journal_mode = raw.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+        raw.execute(f"PRAGMA synchronous = {self.synchronous}")
+        raw.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        raw.execute("PRAGMA temp_store = MEMORY")
+        raw.execute("PRAGMA foreign_keys = ON")
+        with self._lock:
+            self.connections_opened += 1
+        return raw
+
+    def connect(self):
+        """This thread's connection; close() leaves it open for the thread's next request"""
+        raw = getattr(self._local, 'raw', None)
+        if raw is None:
+            raw = self._local.raw = self._open()
+        return SQLiteConnection(self, raw, shared=True)
+
+    def write(self, work):
+        """Run work(cursor) in a transaction and return its result once committed"""
+        if self.writer is not None:
+            return self.writer.write(work)
+        conn = self.connect()
+        cursor = conn.cursor()
+        try:
+            result = work(cursor)
+            conn.commit()
+            return result
+        finally:
+            cursor.close()
+            conn.close()
+
+    def prepare(self, sql):
+        """Translate a MySQL-dialect statement once and remember the result"""
+        statement = self._statements.get(sql)
+        if statement is None:
+            statement = SQLITE_STATEMENTS.get(sql)
+            if statement is None:
+                # MySQL's LIKE escapes with backslash by default, SQLite needs it spelled out
+                statement = re.sub(r"LIKE %s", r"LIKE ? ESCAPE '\\'", sql).replace('%s', '?')
+            self._statements[sql] = statement
+        return statement
+
+    def streaming_cursor(self, conn):
+        # sqlite3 cursors step through the result lazily already
+        return conn.cursor(dict_rows=False)
+
+    def tuple_cursor(self, conn):
+        return conn.cursor(dict_rows=False)
+
+    def _columns(self, cursor, table):
+        cursor.execute(f"PRAGMA table_info({table})")
+        return {row['name'] for row in cursor.fetchall()}
+
+    def init_schema(self, cursor, columns):
+        """Create or migrate the tables; SQLite has no FULLTEXT index, so this returns False"""
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS desirability_form_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                full_name TEXT,
+                gender TEXT,
+                age TEXT,
+                city TEXT,
+                email TEXT,
+                phone TEXT,
+                occupation TEXT,
+                frustration_no_buddies INTEGER DEFAULT 0,
+                frustration_social_rut INTEGER DEFAULT 0,
+                frustration_starting_convos INTEGER DEFAULT 0,
+                frustration_similar_interests INTEGER DEFAULT 0,
+                frustration_short_notice INTEGER DEFAULT 0,
+                frustration_isolated_new_place INTEGER DEFAULT 0,
+                weekend_options TEXT,
+                {columns['feel_meeting_new_people']} TEXT,
+                vibe_selections TEXT,
+                {columns['tried_new_activity_with_someone']} TEXT,
+                {columns['meeting_blocker_to_meet_new_people']} TEXT,
+                {columns['safe_fun_way_to']} TEXT,
+                {columns['platform_join_likey_to']} TEXT,
+                {columns['challenges_you_face_when_trying_to_meet_new_people']} TEXT,
+                {columns['likely_features_in_app']} TEXT,
+                {columns['safety_features_in_app']} TEXT,
+                {columns['scenarios_to_use_app_for']} TEXT,
+                submission_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                submission_key TEXT
+            )
+        """)
+
+        # Migrate files created by app.py, which had no submission keys and wrote 'T'-separated timestamps
+        if 'submission_key' not in self._columns(cursor, 'desirability_form_responses'):
+            cursor.execute("ALTER TABLE desirability_form_responses ADD COLUMN submission_key TEXT")
+            logger.info("Added column desirability_form_responses.submission_key")
+        cursor.execute("""
+            UPDATE desirability_form_responses SET submission_date = REPLACE(submission_date, 'T', ' ')
+            WHERE submission_date LIKE '%T%'
+        """)
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uniq_submission_key
+            ON desirability_form_responses (submission_key)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_submission_date_id
+            ON desirability_form_responses (submission_date, id)
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_email ON desirability_form_responses (email)")
+
+        for statement in SQLITE_ANSWERS_TABLE_SQL:
+            cursor.execute(statement)
+        # The rollup DDL only uses types and constraints SQLite accepts as written
+        for statement in ROLLUP_TABLES_SQL:
+            cursor.execute(statement)
+        return False
+
+    def table_exists(self, cursor):
+        cursor.execute("""
+            SELECT COUNT(*) as table_count
+            FROM sqlite_master
+            WHERE type = 'table' AND name = 'desirability_form_responses'
+        """)
+        return cursor.fetchone()['table_count'] > 0
+
+    def warm_up(self):
+        self.connect().close()
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.stop()
+
+    def stats(self):
+        return {
+            'journal_mode': self.journal_mode,
+            'synchronous': self.synchronous,
+            'connections_opened': self.connections_opened,
+            'statements_prepared': len(self._statements),
+            'writer': self.writer.stats() if self.writer else None
+        }
+
+    def describe(self):
+        return {'engine': self.name, 'host': None, 'database': self.path}
+
+
+class ResponseRepository:
+    """Every read and write of form responses, for either engine and either column naming
+
+    Statements are built from the column map and translated for the engine
+    once, when the repository is created. Methods take an open cursor and
+    leave committing to the caller, like the helpers in rollups.py.
+    """
+
+    def __init__(self, engine, schema='current'):
+        self.engine = engine
+        self.schema = schema
+        self.columns = column_map(schema)
+        # Set by init_schema once the ngram FULLTEXT index on email is known to exist
+        self.fulltext_available = False
+
+        self.insert_sql = insert_response_sql(schema)
+        self.select_sql = response_select_sql(schema)
+        self.powerbi_select_sql = powerbi_select_sql(schema)
+        self.by_id_sql = self.select_sql + " WHERE id = %s"
+        self.export_sql = self.select_sql + " ORDER BY submission_date DESC"
+        # Both aggregates are answered from the ends of the PRIMARY and idx_submission_date_id indexes
+        self.watermark_sql = """
+            SELECT MAX(id) as max_id, MAX(submission_date) as last_modified
+            FROM desirability_form_responses
+        """
+        self.count_sql = "SELECT COUNT(*) as total FROM desirability_form_responses"
+        self.by_key_sql = "SELECT id FROM desirability_form_responses WHERE submission_key = %s"
+
+        for statement in (self.insert_sql, self.by_id_sql, self.by_key_sql, self.export_sql, self.watermark_sql,
+                          self.count_sql, INSERT_ANSWER_SQL, UPSERT_COUNT_SQL, UPSERT_TOTAL_SQL, SELECT_TOTALS_SQL,
+                          SELECT_COUNTS_SQL, OPTION_COUNTS_SQL, RESPONDENTS_SQL):
+            engine.prepare(statement)
+
+    def connect(self):
+        return self.engine.connect()
+
+    def init_schema(self, cursor):
+        """Create or migrate every table and build the rollups the first time (caller commits)"""
+        self.fulltext_available = self.engine.init_schema(cursor, self.columns)
+        if read_summary(cursor) is None:
+            rebuild_rollups(cursor)
+            logger.info("Built summary rollups from existing responses")
+
+    def insert_submission(self, cursor, row):
+        """Insert one submission row with its answers and rollups; returns the new id"""
+        cursor.execute(self.insert_sql, row)
+        response_id = cursor.lastrowid
+        insert_answers(cursor, [(response_id, row)], INSERT_COLUMNS)
+        apply_rollups(cursor, [row], INSERT_COLUMNS)
+        return response_id
+
+    def save_submission(self, row):
+        """Insert one submission in its own transaction (group-committed on SQLite); returns the new id"""
+        return self.engine.write(lambda cursor: self.insert_submission(cursor, row))
+
+    def find_submission(self, cursor, submission_key):
+        """Id of the response stored under submission_key, or None (uses uniq_submission_key)"""
+        cursor.execute(self.by_key_sql, (submission_key,))
+        row = cursor.fetchone()
+        return row['id'] if row else None
+
+    def save_submission_once(self, row):
+        """save_submission unless a response with the row's submission_key is stored; returns (id, created)"""
+        submission_key = row[SUBMISSION_KEY_INDEX]
+
+        def work(cursor):
+            existing = self.find_submission(cursor, submission_key)
+            if existing is not None:
+                return existing, False
+            return self.insert_submission(cursor, row), True
+
+        try:
+            return self.engine.write(work)
+        except INTEGRITY_ERRORS:
+            # A concurrent request with the same key committed between the lookup and the insert
+            conn = self.connect()
+            cursor = conn.cursor()
+            try:
+                existing = self.find_submission(cursor, submission_key)
+            finally:
+                cursor.close()
+                conn.close()
+            if existing is None:
+                raise
+            return existing, False
+
+    def save_submissions(self, rows):
+        """insert_submissions in its own transaction; returns the rows actually inserted"""
+        return self.engine.write(lambda cursor: self.insert_submissions(cursor, rows))
+
+    def insert_submissions(self, cursor, rows):
+        """Insert a batch with one multi-row INSERT; returns the rows that were not already stored"""
+        keys = [row[SUBMISSION_KEY_INDEX] for row in rows]
+        cursor.execute(f"""
+            SELECT submission_key FROM desirability_form_responses
+            WHERE submission_key IN ({', '.join(['%s'] * len(keys))})
+        """, keys)
+        existing = {result['submission_key'] for result in cursor.fetchall()}
+        new_rows = []
+        for row in rows:
+            # Repeated submissions share a key, so a batch can hold the same one twice
+            if row[SUBMISSION_KEY_INDEX] not in existing:
+                existing.add(row[SUBMISSION_KEY_INDEX])
+                new_rows.append(row)
+
+        if new_rows:
+            cursor.executemany(self.insert_sql, new_rows)
+
+            # Look up the generated ids by key rather than assuming a consecutive auto-increment range
+            new_keys = [row[SUBMISSION_KEY_INDEX] for row in new_rows]
+            cursor.execute(f"""
+                SELECT id, submission_key FROM desirability_form_responses
+                WHERE submission_key IN ({', '.join(['%s'] * len(new_keys))})
+            """, new_keys)
+            ids = {result['submission_key']: result['id'] for result in cursor.fetchall()}
+            insert_answers(cursor, [(ids[row[SUBMISSION_KEY_INDEX]], row) for row in new_rows], INSERT_COLUMNS)
+            apply_rollups(cursor, new_rows, INSERT_COLUMNS)
+        return new_rows
+
+    def get_response(self, cursor, response_id):
+        cursor.execute(self.by_id_sql, (response_id,))
+        return cursor.fetchone()
+
+    def list_responses(self, cursor, email_clause, after_key, limit, offset):
+        """One /answers page; email_clause is a (where, params) pair or None"""
+        query, params = answers_page_query(email_clause, after_key, limit, offset, self.select_sql)
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def count_responses(self, cursor, email_clause=None):
+        """Run the actual COUNT(*), optionally filtered by an email (where, params) clause"""
+        query = self.count_sql
+        params = ()
+        if email_clause:
+            query += f" WHERE {email_clause[0]}"
+            params = email_clause[1]
+        cursor.execute(query, params)
+        return cursor.fetchone()['total']
+
+    def watermark(self, cursor):
+        """(max id, newest submission_date)"""
+        cursor.execute(self.watermark_sql)
+        watermark = cursor.fetchone()
+        last_modified = watermark['last_modified']
+        if isinstance(last_modified, str):
+            # SQLite does not carry the declared column type through MAX()
+            last_modified = datetime.fromisoformat(last_modified)
+        return watermark['max_id'], last_modified
+
+    def summary(self, cursor):
+        """/answers/summary payload, an O(1) read from the rollup tables maintained at insert time"""
+        summary = read_summary(cursor)
+        if summary is None:
+            logger.warning("Rollups have not been built yet, computing summary from the full table")
+            summary = compute_live_summary(cursor)
+        return summary
+
+    def analytics(self, cursor, group, by=None):
+        cursor.execute(OPTION_COUNTS_SQL, (group,))
+        count_rows = cursor.fetchall()
+        cursor.execute(RESPONDENTS_SQL, (group,))
+        respondents = cursor.fetchone()['respondents']
+        crosstab_rows = ()
+        if by:
+            cursor.execute(crosstab_sql(by), (group,))
+            crosstab_rows = cursor.fetchall()
+        return build_analytics(group, count_rows, respondents, by, crosstab_rows)
+
+    def powerbi_query(self, since_id, since, overlap=0):
+        """SQL and parameters for /api/data/powerbi; raises ValueError for a malformed watermark"""
+        return powerbi_query(since_id, since, self.powerbi_select_sql, overlap)
+
+    def tuple_cursor(self, conn):
+        """Buffered cursor returning tuples; column names are in cursor.description"""
+        return self.engine.tuple_cursor(conn)
+
+    def export_cursor(self, conn):
+        """Streaming tuple cursor positioned on the full export, newest first"""
+        cursor = self.engine.streaming_cursor(conn)
+        try:
+            cursor.execute(self.export_sql)
+        except BaseException:
+            cursor.close()
+            raise
+        return cursor
+
+    def table_exists(self, cursor):
+        return self.engine.table_exists(cursor)
+
+    def rebuild_rollups(self, cursor):
+        rebuild_rollups(cursor)
+
+    def rollup_differences(self, cursor):
+        """Human-readable differences between the rollups and the live aggregate queries"""
+        return compare_summaries(read_summary(cursor) or {}, compute_live_summary(cursor))
+
+    def backfill_answers(self, cursor, commit, batch_size=1000):
+        return backfill_answers(cursor, commit, batch_size, self.schema)
+
+
+def create_engine(name, connect_kwargs=None, pool_config=None, sqlite_path=None, sqlite_config=None,
+                  cursor_wrapper=None):
+    """Build the engine named by STORAGE_ENGINE; connect_kwargs are pymysql.connect() arguments"""
+    if name == 'mysql':
+        pool = ConnectionPool(dict(connect_kwargs, cursorclass=pymysql.cursors.DictCursor), **(pool_config or {}),
+                              cursor_wrapper=cursor_wrapper)
+        return MySQLEngine(pool, connect_kwargs.get('host'), connect_kwargs.get('database'))
+    if name == 'sqlite':
+        return SQLiteEngine(sqlite_path, **(sqlite_config or {}), cursor_wrapper=cursor_wrapper)
+    raise ValueError(f"STORAGE_ENGINE must be one of: {', '.join(ENGINES)}")
@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """Raised when the write-behind queue stays full for longer than the put timeout"""
+
+
+class SubmissionQueue:
+    """Write-behind buffer that drains submission rows into batched INSERTs
+
+    `writer` is called from the flusher thread with a list of row tuples and
+    must insert and commit them as one batch. If `on_failure` is given, a
+    batch the writer rejects is handed to it, with the exception, instead of
+    being retried in memory. Without it, a batch failing with an error
+    `retryable(error)` accepts (the database is unavailable; every error when
+    it is None) is kept and retried; any other failure would repeat on every
+    retry, so the batch is written row by row and rows that still fail are
+    logged and dropped instead of blocking every row queued behind them.
+    """
+
+    def __init__(self, writer, max_size=1000, batch_size=50, flush_interval=0.5, put_timeout=0.1,
+                 on_failure=None, retryable=None):
+        self.writer = writer
+        self.on_failure = on_failure
+        self.retryable = retryable
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+        # Counters exposed through /health
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.failed_batches = 0
+        self.dropped_rows = 0
+
+    def start(self):
+        """Start the background flusher thread (idempotent)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='submission-flusher', daemon=True)
+            self._thread.start()
+
+    def submit(self, row):
+        """Enqueue a row, blocking up to put_timeout before applying back-pressure"""
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise QueueFull(f"Submission queue is full ({self._queue.maxsize} pending rows)")
+        with self._lock:
+            self.enqueued += 1
+
+    def _drain(self, batch):
+        """Fill batch up to batch_size, waiting at most flush_interval for the first row"""
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0 and not self._stopping.is_set():
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def should_retry(self, error):
+        return self.retryable is None or self.retryable(error)
+
+    def _salvage(self, batch):
+        """Write a failed batch one row at a time, dropping rows the database rejects; returns rows to retry"""
+        for index, row in enumerate(batch):
+            try:
+                self.writer([row])
+            except Exception as e:
+                if self.should_retry(e):
+                    return batch[index:]
+                logger.error(f"Dropping write-behind row the database rejected: {e}: {row!r}")
+                with self._lock:
+                    self.dropped_rows += 1
+                continue
+            with self._lock:
+                self.flushed_rows += 1
+        return []
+
+    def _flush(self, batch):
+        """Write a batch; returns the rows that could not be written yet and should be retried"""
+        try:
+            self.writer(batch)
+        except Exception as e:
+            logger.error(f"Write-behind flush of {len(batch)} rows failed: {e}")
+            with self._lock:
+                self.failed_batches += 1
+            if self.on_failure is None:
+                return batch if self.should_retry(e) else self._salvage(batch)
+            try:
+                self.on_failure(batch, e)
+            except Exception as e:
+                logger.error(f"Failure handler could not take {len(batch)} rows: {e}")
+                return batch
+            return []
+        with self._lock:
+            self.flushed_rows += len(batch)
+            self.flushed_batches += 1
+        return []
+
+    def _run(self):
+        batch = []
+        while True:
+            self._drain(batch)
+            if batch:
+                batch = self._flush(batch)
+                if not batch:
+                    continue
+                if self._stopping.is_set():
+                    logger.error(f"Dropping {len(batch)} unflushed rows on shutdown")
+                    batch = []
+                else:
+                    # Keep the failed batch and retry it after a pause
+                    self._stopping.wait(self.flush_interval)
+            elif self._stopping.is_set():
+                return
+
+    def stop(self, timeout=10):
+        """Flush everything still queued and stop the flusher thread"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.error(f"Flusher did not finish within {timeout}s; {self._queue.qsize()} rows pending")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._queue.qsize(),
+                'capacity': self._queue.maxsize,
+                'enqueued': self.enqueued,
+                'rejected': self.rejected,
+                'flushed_rows': self.flushed_rows,
+                'flushed_batches': self.flushed_batches,
+                'failed_batches': self.failed_batches,
+                'dropped_rows': self.dropped_rows
+            }
@@ -0,0 +1,185 @@
+from form_options import PERSONAL_INFO_OPTIONS, ANSWER_OPTIONS, max_selections
+from submissions import ANSWER_GROUPS, FRUSTRATION_TITLES
+
+# personalInfo fields: max_length matches the desirability_form_responses column, and fields with
+# options are <select>s, submitted as '' when left unanswered
+PERSONAL_INFO_SCHEMA = {
+    'name': {'max_length': 255},
+    'gender': {'max_length': 50, 'options': PERSONAL_INFO_OPTIONS['gender']},
+    'age': {'max_length': 50, 'options': PERSONAL_INFO_OPTIONS['age']},
+    'city': {'max_length': 100, 'options': PERSONAL_INFO_OPTIONS['city']},
+    'email': {'max_length': 255},
+    'phone': {'max_length': 20},
+    'occupation': {'max_length': 255, 'options': PERSONAL_INFO_OPTIONS['occupation']}
+}
+
+# Multi-select pages: each answer value must be an option of its group, at most max_selections of them
+ANSWER_SCHEMA = {
+    group: {'options': ANSWER_OPTIONS[group], 'max_selections': max_selections(group)}
+    for group in ANSWER_GROUPS
+}
+
+# Star ratings on the frustrations page; 0 means the respondent left the item unrated
+RATING_SCHEMA = {'group': 'frustrations', 'titles': FRUSTRATION_TITLES, 'min': 0, 'max': 5}
+
+# Display strings the browser sends alongside the values (question titles, answer labels); never stored
+MAX_LABEL_LENGTH = 1000
+
+
+def describe(value):
+    """Short description of a rejected value, without echoing long strings back"""
+    if isinstance(value, str) and len(value) <= 60:
+        return repr(value)
+    return f"a value of type {type(value).__name__}"
+
+
+def compile_validator(personal_info=PERSONAL_INFO_SCHEMA, answers=ANSWER_SCHEMA, ratings=RATING_SCHEMA):
+    """Compile the declarative schema into validate(form_data), which returns a list of error messages
+
+    All lookups are resolved to frozensets and tuples here, once, so validating
+    a submission is a handful of dict and set operations.
+    """
+    personal_fields = tuple(
+        (name, spec['max_length'], frozenset(spec['options']) | {''} if 'options' in spec else None)
+        for name, spec in personal_info.items()
+    )
+    personal_keys = frozenset(personal_info)
+    answer_groups = {
+        group: (frozenset(spec['options']), spec['max_selections']) for group, spec in answers.items()
+    }
+    rating_group = ratings['group']
+    rating_titles = frozenset(ratings['titles'])
+    rating_min, rating_max = ratings['min'], ratings['max']
+    response_keys = frozenset(answer_groups) | {rating_group}
+    top_level_keys = frozenset(('personalInfo', 'responses'))
+    answer_group_keys = frozenset(('question', 'answers'))
+    answer_item_keys = frozenset(('value', 'text'))
+    rating_group_keys = frozenset(('question', 'ratings'))
+    rating_item_keys = frozenset(('title', 'value'))
+
+    def check_keys(path, data, allowed, errors):
+        if data.keys() <= allowed:
+            return
+        names = sorted(data.keys() - allowed)
+        more = f" and {len(names) - 5} more" if len(names) > 5 else ''
+        errors.append(f"{path}: unexpected field(s) {', '.join(names[:5])}{more}")
+
+    def check_label(path, label, errors):
+        if label is not None and (type(label) is not str or len(label) > MAX_LABEL_LENGTH):
+            errors.append(f"{path}: must be a string of at most {MAX_LABEL_LENGTH} characters")
+
+    def check_personal_info(data, errors):
+        if type(data) is not dict:
+            errors.append("personalInfo: must be an object")
+            return
+        check_keys('personalInfo', data, personal_keys, errors)
+        for name, max_length, options in personal_fields:
+            value = data.get(name)
+            if value is None:
+                continue
+            if type(value) is not str:
+                errors.append(f"personalInfo.{name}: must be a string, got {describe(value)}")
+            elif len(value) > max_length:
+                errors.append(f"personalInfo.{name}: longer than {max_length} characters")
+            elif options is not None and value not in options:
+                errors.append(f"personalInfo.{name}: {describe(value)} is not one of the form's options")
+
+    # The item loops below are the hot path: paths are only formatted once something is wrong
+
+    def check_answers(group, data, errors):
+        if type(data) is not dict:
+            errors.append(f"responses.{group}: must be an object")
+            return
+        if not data.keys() <= answer_group_keys:
+            check_keys(f"responses.{group}", data, answer_group_keys, errors)
+        question = data.get('question')
+        if question is not None and (type(question) is not str or len(question) > MAX_LABEL_LENGTH):
+            check_label(f"responses.{group}.question", question, errors)
+        items = data.get('answers', [])
+        if type(items) is not list:
+            errors.append(f"responses.{group}.answers: must be a list")
+            return
+        options, limit = answer_groups[group]
+        if len(items) > limit:
+            errors.append(f"responses.{group}.answers: at most {limit} selection(s) allowed, got {len(items)}")
+            return
+        seen = set()
+        for index, item in enumerate(items):
+            if type(item) is not dict:
+                errors.append(f"responses.{group}.answers[{index}]: must be an object")
+                continue
+            if not item.keys() <= answer_item_keys:
+                check_keys(f"responses.{group}.answers[{index}]", item, answer_item_keys, errors)
+            text = item.get('text')
+            if text is not None and (type(text) is not str or len(text) > MAX_LABEL_LENGTH):
+                check_label(f"responses.{group}.answers[{index}].text", text, errors)
+            value = item.get('value')
+            if type(value) is not str or value not in options:
+                errors.append(f"responses.{group}.answers[{index}].value: "
+                              f"{describe(value)} is not one of the {group} options")
+            elif value in seen:
+                errors.append(f"responses.{group}.answers[{index}].value: "
+                              f"{describe(value)} is selected more than once")
+            else:
+                seen.add(value)
+
+    def check_ratings(data, errors):
+        path = f"responses.{rating_group}"
+        if type(data) is not dict:
+            errors.append(f"{path}: must be an object")
+            return
+        check_keys(path, data, rating_group_keys, errors)
+        check_label(f"{path}.question", data.get('question'), errors)
+        items = data.get('ratings', [])
+        if type(items) is not list:
+            errors.append(f"{path}.ratings: must be a list")
+            return
+        if len(items) > len(rating_titles):
+            errors.append(f"{path}.ratings: at most {len(rating_titles)} ratings allowed, got {len(items)}")
+            return
+        seen = set()
+        for index, item in enumerate(items):
+            if type(item) is not dict:
+                errors.append(f"{path}.ratings[{index}]: must be an object")
+                continue
+            if not item.keys() <= rating_item_keys:
+                check_keys(f"{path}.ratings[{index}]", item, rating_item_keys, errors)
+            title = item.get('title')
+            if type(title) is not str or title not in rating_titles:
+                errors.append(f"{path}.ratings[{index}].title: {describe(title)} is not one of the rated struggles")
+            elif title in seen:
+                errors.append(f"{path}.ratings[{index}].title: {describe(title)} is rated more than once")
+            else:
+                seen.add(title)
+            # bool is an int subclass; the browser only ever sends numbers
+            value = item.get('value', 0)
+            if type(value) is not int or not rating_min <= value <= rating_max:
+                errors.append(f"{path}.ratings[{index}].value: must be a whole number from {rating_min} to {rating_max}")
+
+    def validate(form_data):
+        if type(form_data) is not dict:
+            return ["Request body must be a JSON object"]
+        errors = []
+        check_keys('body', form_data, top_level_keys, errors)
+        personal = form_data.get('personalInfo')
+        if personal is not None:
+            check_personal_info(personal, errors)
+        responses = form_data.get('responses')
+        if responses is None:
+            return errors
+        if type(responses) is not dict:
+            errors.append("responses: must be an object")
+            return errors
+        check_keys('responses', responses, response_keys, errors)
+        for group, data in responses.items():
+            if group == rating_group:
+                check_ratings(data, errors)
+            elif group in answer_groups:
+                check_answers(group, data, errors)
+        return errors
+
+    return validate
+
+
+# Compiled once at import; call validate_submission(form_data) before building a row
+validate_submission = compile_validator()
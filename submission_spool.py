@@ -0,0 +1,206 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    raise TypeError(f"Cannot spool value of type {type(value).__name__}")
+
+
+class SubmissionSpool:
+    """Crash-safe local SQLite spool for submissions that could not reach MySQL
+
+    Rows are appended with their submission key and replayed into MySQL in
+    batches by a background thread. `writer` must skip rows whose key is
+    already stored, so a replay interrupted after commit never duplicates rows.
+    A batch failing with an error `retryable(error)` accepts (the database is
+    unavailable; every error when it is None) stays spooled for the next
+    replay; any other failure would repeat on every retry, so the batch is
+    replayed row by row and rows that still fail are moved to the
+    submission_dead_letter table instead of holding up the rest.
+    """
+
+    def __init__(self, path, writer, batch_size=200, replay_interval=5.0, retryable=None):
+        self.path = path
+        self.writer = writer
+        self.batch_size = max(1, batch_size)
+        self.replay_interval = replay_interval
+        self.retryable = retryable
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS submission_spool (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                submission_key TEXT NOT NULL UNIQUE,
+                row_data TEXT NOT NULL,
+                spooled_at TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS submission_dead_letter (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                submission_key TEXT NOT NULL UNIQUE,
+                row_data TEXT NOT NULL,
+                error TEXT NOT NULL,
+                failed_at TEXT NOT NULL
+            )
+        """)
+        self._stopping = threading.Event()
+        self._thread = None
+
+        # Counters exposed through /health
+        self.spooled = 0
+        self.replayed = 0
+        self.replay_failures = 0
+        self.dead_lettered = 0
+        self.last_replay_rate = 0.0
+        self.last_replay_at = None
+        self.last_error = None
+
+    def append(self, submission_key, row):
+        """Durably store a row; re-spooling the same key is a no-op"""
+        row_data = json.dumps(list(row), default=_encode_value)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO submission_spool (submission_key, row_data, spooled_at) VALUES (?, ?, ?)",
+                (submission_key, row_data, datetime.now().isoformat(sep=' '))
+            )
+            self.spooled += cursor.rowcount
+
+    def dead_letter(self, submission_key, row, error):
+        """Set aside a row the database rejects, taking it out of the spool if it was there"""
+        row_data = json.dumps(list(row), default=_encode_value)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO submission_dead_letter (submission_key, row_data, error, failed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (submission_key, row_data, str(error), datetime.now().isoformat(sep=' '))
+                )
+                self._conn.execute("DELETE FROM submission_spool WHERE submission_key = ?", (submission_key,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self.dead_lettered += 1
+        logger.error(f"Moved submission {submission_key} to the dead-letter table: {error}")
+
+    def should_retry(self, error):
+        return self.retryable is None or self.retryable(error)
+
+    def salvage(self, keyed_rows):
+        """Write (submission_key, row) pairs one at a time after their batch failed; returns rows written
+
+        Rows the database rejects are dead-lettered. If it becomes unavailable
+        part way through, the remaining rows are spooled and the error is raised.
+        """
+        written = 0
+        for index, (submission_key, row) in enumerate(keyed_rows):
+            try:
+                self.writer([row])
+            except Exception as e:
+                if not self.should_retry(e):
+                    self.dead_letter(submission_key, row, e)
+                    continue
+                for key, rest in keyed_rows[index:]:
+                    self.append(key, rest)
+                raise
+            with self._lock:
+                self._conn.execute("DELETE FROM submission_spool WHERE submission_key = ?", (submission_key,))
+            written += 1
+        return written
+
+    def depth(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM submission_spool").fetchone()[0]
+
+    def replay_once(self):
+        """Replay spooled rows oldest-first until the spool is empty; returns rows replayed"""
+        total = 0
+        started = time.monotonic()
+        while not self._stopping.is_set():
+            with self._lock:
+                batch = self._conn.execute(
+                    "SELECT seq, submission_key, row_data FROM submission_spool ORDER BY seq LIMIT ?",
+                    (self.batch_size,)
+                ).fetchall()
+            if not batch:
+                break
+
+            keyed_rows = [(submission_key, tuple(json.loads(row_data))) for _, submission_key, row_data in batch]
+            try:
+                self.writer([row for _, row in keyed_rows])
+            except Exception as e:
+                if self.should_retry(e):
+                    raise
+                logger.warning(f"Spooled batch of {len(batch)} rows failed, replaying row by row: {e}")
+                written = self.salvage(keyed_rows)
+                with self._lock:
+                    self.replayed += written
+                total += written
+                continue
+
+            with self._lock:
+                self._conn.execute("DELETE FROM submission_spool WHERE seq <= ?", (batch[-1][0],))
+                self.replayed += len(batch)
+            total += len(batch)
+
+        if total:
+            elapsed = time.monotonic() - started
+            self.last_replay_rate = round(total / elapsed, 1) if elapsed > 0 else float(total)
+            self.last_replay_at = datetime.now().isoformat()
+            logger.info(f"Replayed {total} spooled submissions at {self.last_replay_rate} rows/s")
+        return total
+
+    def start(self):
+        """Start the background replayer thread (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='spool-replayer', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.replay_once()
+                self.last_error = None
+            except Exception as e:
+                self.replay_failures += 1
+                self.last_error = str(e)
+                logger.warning(f"Spool replay failed, retrying in {self.replay_interval}s: {e}")
+            self._stopping.wait(self.replay_interval)
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def dead_letter_depth(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM submission_dead_letter").fetchone()[0]
+
+    def stats(self):
+        return {
+            'depth': self.depth(),
+            'dead_letters': self.dead_letter_depth(),
+            'dead_lettered': self.dead_lettered,
+            'spooled': self.spooled,
+            'replayed': self.replayed,
+            'replay_failures': self.replay_failures,
+            'last_replay_rate': self.last_replay_rate,
+            'last_replay_at': self.last_replay_at,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,383 @@
+import base64
+import binascii
+import csv
+import hashlib
+import io
+import json
+import logging
+import time
+import uuid
+import zlib
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+def get_answers(form_data, response_name):
+    """Safely extract answers for a response group"""
+    try:
+        # Navigate through the response structure: responses > group name > answers
+        group_data = form_data.get('responses', {}).get(response_name, {})
+        answers = group_data.get('answers', [])
+        return ','.join(str(item['value']) for item in answers)
+    except (KeyError, TypeError):
+        logger.warning(f"Missing answers for {response_name}")
+        return ''
+
+
+# Frustration rating titles sent by static/script.js, in column order
+FRUSTRATION_TITLES = [
+    "No event buddies",
+    "Stuck in a social rut",
+    "Struggling with starting conversations",
+    "Difficulty finding people with similar interests",
+    "No plans on short notice",
+    "Feeling isolated in a new place"
+]
+
+# Multi-select response groups, in column order
+ANSWER_GROUPS = [
+    'weekend', 'meeting', 'vibe', 'new_things', 'blockers', 'safe_fun',
+    'platform', 'challenges', 'features', 'safety', 'scenarios'
+]
+
+INSERT_COLUMNS = [
+    'full_name', 'gender', 'age', 'city', 'email', 'phone', 'occupation',
+    'frustration_no_buddies', 'frustration_social_rut',
+    'frustration_starting_convos', 'frustration_similar_interests',
+    'frustration_short_notice', 'frustration_isolated_new_place',
+    'weekend_options', 'feel_meeting_new_people', 'vibe_selections',
+    'tried_new_activity_with_someone', 'meeting_blocker_to_meet_new_people',
+    'safe_fun_way_to', 'platform_join_likey_to',
+    'challenges_you_face_when_trying_to_meet_new_people',
+    'likely_features_in_app', 'safety_features_in_app',
+    'scenarios_to_use_app_for', 'submission_date', 'submission_key'
+]
+
+# Column names used by app.py and the bundled desirability_form.db, where they differ from the current schema
+LEGACY_COLUMN_NAMES = {
+    'feel_meeting_new_people': 'meeting_feeling',
+    'tried_new_activity_with_someone': 'last_new_thing',
+    'meeting_blocker_to_meet_new_people': 'meeting_blocker',
+    'safe_fun_way_to': 'safe_fun_option',
+    'platform_join_likey_to': 'platform_likelihood',
+    'challenges_you_face_when_trying_to_meet_new_people': 'challenges',
+    'likely_features_in_app': 'features',
+    'safety_features_in_app': 'safety',
+    'scenarios_to_use_app_for': 'scenarios'
+}
+
+SCHEMAS = ('current', 'legacy')
+
+# Columns returned by /answers, /answers/<id> and /api/data/export
+RESPONSE_COLUMNS = ['id'] + [column for column in INSERT_COLUMNS if column != 'submission_key']
+
+# Flattened structure for PowerBI: (column, output name)
+POWERBI_COLUMNS = [
+    ('id', 'id'),
+    ('full_name', 'full_name'),
+    ('gender', 'gender'),
+    ('age', 'age'),
+    ('city', 'city'),
+    ('email', 'email'),
+    ('occupation', 'occupation'),
+    ('frustration_no_buddies', 'frustration_score_no_buddies'),
+    ('frustration_social_rut', 'frustration_score_social_rut'),
+    ('frustration_starting_convos', 'frustration_score_starting_conversations'),
+    ('frustration_similar_interests', 'frustration_score_similar_interests'),
+    ('frustration_short_notice', 'frustration_score_short_notice'),
+    ('frustration_isolated_new_place', 'frustration_score_isolated_new_place'),
+    *((column, column) for column in INSERT_COLUMNS[INSERT_COLUMNS.index('weekend_options'):-2]),
+    ('submission_date', 'submission_date')
+]
+
+SUBMISSION_KEY_INDEX = INSERT_COLUMNS.index('submission_key')
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+
+def column_map(schema='current'):
+    """Current column name -> column name in the given schema"""
+    if schema not in SCHEMAS:
+        raise ValueError(f"Unknown schema: {schema}")
+    renames = LEGACY_COLUMN_NAMES if schema == 'legacy' else {}
+    return {column: renames.get(column, column) for column in ['id', *INSERT_COLUMNS]}
+
+
+def select_list(columns, schema='current'):
+    """SELECT list for (column, output name) pairs, aliasing wherever the schema's name differs"""
+    names = column_map(schema)
+    return ', '.join(
+        names[column] if names[column] == alias else f"{names[column]} as {alias}"
+        for column, alias in columns
+    )
+
+
+def insert_response_sql(schema='current'):
+    names = column_map(schema)
+    return f"""
+    INSERT INTO desirability_form_responses ({', '.join(names[column] for column in INSERT_COLUMNS)})
+    VALUES ({', '.join(['%s'] * len(INSERT_COLUMNS))})
+"""
+
+
+def response_select_sql(schema='current'):
+    return f"""
+    SELECT {select_list([(column, column) for column in RESPONSE_COLUMNS], schema)}
+    FROM desirability_form_responses
+"""
+
+
+def powerbi_select_sql(schema='current'):
+    return f"""
+    SELECT {select_list(POWERBI_COLUMNS, schema)}
+    FROM desirability_form_responses
+"""
+
+
+INSERT_RESPONSE_SQL = insert_response_sql()
+
+RESPONSE_SELECT_SQL = response_select_sql()
+
+POWERBI_SELECT_SQL = powerbi_select_sql()
+
+
+def build_submission_row(form_data, submission_key):
+    """Normalize a submission payload into a tuple matching INSERT_COLUMNS"""
+    personal_info = form_data.get('personalInfo', {})
+
+    # Process frustration ratings
+    frustrations = form_data.get('responses', {}).get('frustrations', {}).get('ratings', [])
+    frustration_values = dict.fromkeys(FRUSTRATION_TITLES, 0)
+    for item in frustrations:
+        title = item.get('title', '')
+        if title in frustration_values:
+            frustration_values[title] = int(item.get('value', 0))
+
+    return (
+        personal_info.get('name', ''),
+        personal_info.get('gender', ''),
+        personal_info.get('age', ''),
+        personal_info.get('city', ''),
+        personal_info.get('email', ''),
+        personal_info.get('phone', ''),
+        personal_info.get('occupation', ''),
+        *(frustration_values[title] for title in FRUSTRATION_TITLES),
+        # Get answers for each response group
+        *(get_answers(form_data, group) for group in ANSWER_GROUPS),
+        datetime.now(),
+        submission_key
+    )
+
+
+def idempotency_submission_key(idempotency_key):
+    """submission_key for a client-supplied Idempotency-Key, hashed to fit the 64-character column"""
+    return hashlib.sha256(f"idempotency-key:{idempotency_key}".encode('utf-8')).hexdigest()
+
+
+def payload_digest(form_data, client):
+    """Hash of a client's payload; the same answers from the same address give the same digest"""
+    canonical = json.dumps(form_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(f"{client}\n{canonical}".encode('utf-8')).hexdigest()
+
+
+def content_submission_key(digest, window):
+    """submission_key for a payload digest within one retention window (window = unix time // retention)
+
+    Identical surveys from one address are legitimate once the window has
+    passed, so the window is part of the key rather than deduplicating forever.
+    """
+    return hashlib.sha256(f"content:{digest}:{window}".encode('utf-8')).hexdigest()
+
+
+def submission_identity(form_data, idempotency_key, client, retention, by_content):
+    """(submission_key, dedupe key or None) for a validated payload
+
+    An Idempotency-Key names the submission outright; without one, and with
+    by_content, the payload digest does within the current retention window,
+    but only for payloads that carry an email. Anonymous surveys with the same
+    answers from one address (a shared office or campus NAT) are different
+    people as often as not, so they get a fresh random key and are never
+    deduplicated, like everything else.
+    """
+    if idempotency_key is not None:
+        submission_key = idempotency_submission_key(idempotency_key)
+        return submission_key, submission_key
+    if by_content and str(form_data.get('personalInfo', {}).get('email') or '').strip():
+        digest = payload_digest(form_data, client)
+        return content_submission_key(digest, int(time.time()) // retention), digest
+    return uuid.uuid4().hex, None
+
+
+def encode_page_cursor(row):
+    """Build an opaque keyset cursor from the (submission_date, id) of a row; the date may be None"""
+    submission_date = row['submission_date']
+    key = json.dumps([submission_date.isoformat(sep=' ') if submission_date else None, row['id']])
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_page_cursor(token):
+    """Decode a keyset cursor back into (submission_date, id); raises ValueError if malformed"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        submission_date, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(submission_date) if submission_date is not None else None), int(row_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid pagination cursor: {token}") from e
+
+
+def answers_page_query(email_clause, after_key, limit, offset, select_sql=RESPONSE_SELECT_SQL):
+    """SQL and parameters for one /answers page; email_clause is a (where, params) pair or None"""
+    query = select_sql
+    conditions = []
+    params = []
+    if email_clause:
+        conditions.append(email_clause[0])
+        params.extend(email_clause[1])
+    if after_key:
+        # Seek past the last row of the previous page using idx_submission_date_id; rows without a date sort
+        # last, after every dated row
+        if after_key[0] is None:
+            conditions.append("(submission_date IS NULL AND id < %s)")
+            params.append(after_key[1])
+        else:
+            conditions.append("(submission_date < %s OR (submission_date = %s AND id < %s) OR submission_date IS NULL)")
+            params.extend([after_key[0], after_key[0], after_key[1]])
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    query += " ORDER BY submission_date DESC, id DESC LIMIT %s"
+    params.append(limit)
+    if not after_key:
+        query += " OFFSET %s"
+        params.append(offset)
+    return query, params
+
+
+def powerbi_query(since_id, since, select_sql=POWERBI_SELECT_SQL, overlap=0):
+    """SQL and parameters for /api/data/powerbi; raises ValueError for a malformed watermark
+
+    since_id is the delta watermark. Auto-increment ids are handed out at
+    insert but become visible at commit, so a row with a lower id can
+    commit after a poll has already returned a higher one. The delta
+    therefore re-reads the last `overlap` ids below since_id: delivery is
+    at-least-once as long as fewer than `overlap` ids are assigned while a
+    transaction is in flight, and clients de-duplicate on id.
+
+    since only picks a starting point for a first load and is inclusive, as
+    submission_date has one-second precision; it is not safe as a
+    watermark, since rows committed in the same second after a poll would
+    be skipped.
+    """
+    conditions = []
+    params = []
+    if since_id:
+        conditions.append("id > %s")
+        params.append(max(int(since_id) - overlap, 0))
+    if since:
+        conditions.append("submission_date >= %s")
+        params.append(datetime.fromisoformat(since))
+
+    query = select_sql
+    if conditions:
+        # Delta mode: seek on the PRIMARY key or idx_submission_date_id, oldest first
+        query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id" if since_id else " ORDER BY submission_date, id"
+    else:
+        query += " ORDER BY submission_date DESC"
+    return query, params
+
+
+def flatten_powerbi_rows(columns, rows, since_id):
+    """Split submission_date of tuple rows into date and time columns and compute the next watermark
+
+    Returns (columns, rows, next_watermark), with submission_time appended as
+    the last column; next_watermark carries the since_id for the next poll,
+    which never moves backwards even when every row was a re-read one.
+    """
+    id_index = columns.index('id')
+    date_index = columns.index('submission_date')
+    max_id = int(since_id) if since_id else None
+    flattened = []
+    for row in rows:
+        submitted = row[date_index]
+        if max_id is None or row[id_index] > max_id:
+            max_id = row[id_index]
+        if submitted is not None:
+            flattened.append((*row[:date_index], submitted.date(), *row[date_index + 1:],
+                              submitted.strftime('%H:%M:%S')))
+        else:
+            flattened.append((*row, None))
+    next_watermark = {'since_id': max_id}
+    return [*columns, 'submission_time'], flattened, next_watermark
+
+
+class TextExportEncoder:
+    """Encodes /api/data/export CSV or JSON one chunk of tuple rows at a time
+
+    `dumps` is the app's JSON provider dumps, so the streamed document is the
+    same one jsonify would build, with keys in jsonify's sorted order. Each
+    chunk is encoded as one array in a single dumps call.
+    """
+
+    def __init__(self, format_type, column_names, dumps):
+        self.format_type = format_type
+        self.column_names = list(column_names)
+        self.dumps = dumps
+        self.total_records = 0
+        self._output = io.StringIO()
+        self._writer = None
+
+    def start(self):
+        return '' if self.format_type == 'csv' else '{"data":['
+
+    def encode(self, rows):
+        if self.format_type == 'csv':
+            if self._writer is None:
+                self._writer = csv.writer(self._output)
+                self._writer.writerow(self.column_names)
+            self._writer.writerows(rows)
+            chunk = self._output.getvalue()
+            self._output.seek(0)
+            self._output.truncate()
+            return chunk
+        prefix = ',' if self.total_records else ''
+        self.total_records += len(rows)
+        columns = self.column_names
+        # Strip the brackets so consecutive chunks join into one array
+        return prefix + self.dumps([dict(zip(columns, row)) for row in rows], separators=(',', ':'))[1:-1]
+
+    def finish(self):
+        if self.format_type == 'csv':
+            return ''
+        return (f'],"export_date":{self.dumps(datetime.now().isoformat())},'
+                f'"success":true,"total_records":{self.total_records}}}')
+
+
+def stream_text_export(cursor, format_type, dumps, chunk_rows):
+    """Yield the CSV or JSON export body chunk by chunk from an unbuffered tuple cursor"""
+    encoder = TextExportEncoder(format_type, [column[0] for column in cursor.description], dumps)
+    chunk = encoder.start()
+    if chunk:
+        yield chunk
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        yield encoder.encode(rows)
+    chunk = encoder.finish()
+    if chunk:
+        yield chunk
+
+
+def gzip_chunks(chunks):
+    """Gzip-compress a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode('utf-8'))
+            if data:
+                yield data
+        yield compressor.flush()
+    finally:
+        chunks.close()
@@ -0,0 +1,42 @@
+"""Run flask_app and asgi_app against one throwaway SQLite database
+
+settings.py reads the environment once, when it is imported, so everything
+is set here before a test module imports either app.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATA_DIR = tempfile.mkdtemp(prefix='form-tests-')
+
+os.environ.update({
+    'STORAGE_ENGINE': 'sqlite',
+    'SQLITE_PATH': os.path.join(DATA_DIR, 'form_responses.db'),
+    'SUBMIT_SPOOL_PATH': '',
+    'SUBMIT_WRITE_BEHIND': '',
+    'RESPONSE_CACHE_BACKEND': 'memory',
+    'ADMISSION_BACKEND': 'memory',
+    # Each app keeps its own in-process totals; re-count on every read so each sees the other's writes
+    'TOTAL_REFRESH_INTERVAL': '0',
+    'FILTERED_TOTAL_TTL': '0'
+})
+
+
+@pytest.fixture
+def repository(tmp_path):
+    """ResponseRepository on its own fresh SQLite file, schema created"""
+    from storage import ResponseRepository, create_engine
+
+    engine = create_engine('sqlite', sqlite_path=str(tmp_path / 'responses.db'))
+    repository = ResponseRepository(engine)
+    conn = repository.connect()
+    cursor = conn.cursor()
+    repository.init_schema(cursor)
+    conn.commit()
+    cursor.close()
+    yield repository
+    engine.close()
@@ -0,0 +1,125 @@
+"""Admission control: token buckets, the database slot cap, and the 429/503 responses /submit sheds with"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import asgi_app
+import flask_app
+from admission import AdmissionController, MemoryBuckets, Rejected, SQLiteBuckets, create_admission
+
+SUBMISSION = {'personalInfo': {'name': 'Shed Before Saving'}}
+
+
+def post_flask(path, **kwargs):
+    response = flask_app.app.test_client().post(path, **kwargs)
+    return response.status_code, response.headers, response.get_json()
+
+
+def post_asgi(path, **kwargs):
+    async def send():
+        response = await asgi_app.app.test_client().post(path, **kwargs)
+        return response.status_code, response.headers, json.loads(await response.get_data())
+    return asyncio.run(send())
+
+
+@pytest.fixture(params=[(flask_app, post_flask), (asgi_app, post_asgi)], ids=['wsgi', 'asgi'])
+def app_with_admission(request, monkeypatch):
+    """(install(controller), post) for one app; install swaps in the controller for the test"""
+    module, post = request.param
+    return lambda controller: monkeypatch.setattr(module, 'admission', controller), post
+
+
+def test_memory_bucket_refills_at_its_rate():
+    buckets = MemoryBuckets()
+    limits = [('client:a', 0.5, 2)]
+    assert buckets.take(limits, now=0) is None
+    assert buckets.take(limits, now=0) is None
+    assert buckets.take(limits, now=0) == (0, 2)
+    assert buckets.take(limits, now=1) == (0, 1)
+    assert buckets.take(limits, now=2) is None
+
+
+def test_memory_buckets_take_all_or_nothing():
+    buckets = MemoryBuckets()
+    buckets.take([('global', 1, 1)], now=0)
+    assert buckets.take([('client:a', 1, 5), ('global', 1, 1)], now=0) == (1, 1)
+    # The refused request did not spend the client's token
+    assert buckets.take([('client:a', 1, 1)], now=0) is None
+
+
+def test_sqlite_buckets_are_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'admission.db')
+    first, second = SQLiteBuckets(path), SQLiteBuckets(path)
+    limits = [('client:a', 1, 1)]
+    assert first.take(limits, now=100) is None
+    assert second.take(limits, now=100) == (0, 1)
+
+
+def test_client_limit_is_429_and_global_limit_is_503():
+    controller = AdmissionController(MemoryBuckets(), client_rate=0.25, client_burst=1, global_rate=1, global_burst=2)
+    controller.admit('a')
+    with pytest.raises(Rejected) as client_limited:
+        controller.admit('a')
+    assert (client_limited.value.status, client_limited.value.reason, client_limited.value.retry_after) == (
+        429, 'client_rate', 4)
+
+    controller.admit('b')
+    with pytest.raises(Rejected) as global_limited:
+        controller.admit('c')
+    assert (global_limited.value.status, global_limited.value.reason) == (503, 'global_rate')
+    assert controller.stats()['decisions'] == {'admitted_rate': 2, 'shed_client_rate': 1, 'shed_global_rate': 1}
+
+
+def test_full_slots_are_shed_after_the_short_default_wait():
+    controller = AdmissionController(MemoryBuckets(), max_concurrent=1)
+    with controller.db_slot():
+        started = time.monotonic()
+        with pytest.raises(Rejected) as shed:
+            with controller.db_slot():
+                pass
+        assert time.monotonic() - started < 1
+    assert (shed.value.status, shed.value.reason, shed.value.retry_after) == (503, 'concurrency', 1)
+    with controller.db_slot():
+        assert controller.stats()['in_flight'] == 1
+
+
+def test_queued_request_gets_a_slot_freed_within_the_timeout():
+    controller = AdmissionController(MemoryBuckets(), max_concurrent=1, queue_timeout=5)
+    holding = threading.Event()
+
+    def hold():
+        with controller.db_slot():
+            holding.set()
+            time.sleep(0.05)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait()
+    with controller.db_slot():
+        pass
+    holder.join()
+
+
+@pytest.mark.parametrize('limits, status, retry_after', [
+    ({'client_rate': 0.5, 'client_burst': 0}, 429, '2'),
+    ({'global_rate': 0.2, 'global_burst': 0}, 503, '5'),
+])
+def test_rate_limited_submissions_are_shed(app_with_admission, limits, status, retry_after):
+    install, post = app_with_admission
+    install(create_admission(**limits))
+    code, headers, body = post('/submit', json=SUBMISSION)
+    assert (code, headers['Retry-After']) == (status, retry_after)
+    assert body['success'] is False
+
+
+def test_submission_without_a_free_slot_is_shed(app_with_admission):
+    install, post = app_with_admission
+    controller = create_admission(max_concurrent=1, queue_timeout=0.01)
+    install(controller)
+    with controller.db_slot():
+        code, headers, body = post('/submit', json=SUBMISSION)
+    assert (code, headers['Retry-After']) == (503, '1')
+    assert body == {'success': False, 'error': 'Server is busy, please retry shortly'}
@@ -0,0 +1,59 @@
+"""Duplicate suppression keys for /submit: Idempotency-Key always, payload content only when opted in"""
+import pytest
+
+import settings
+import submissions
+from submissions import idempotency_submission_key, submission_identity
+
+RETENTION = 600
+
+SIGNED = {'personalInfo': {'name': 'Ayesha Khan', 'email': 'ayesha@example.com'}}
+
+
+def identity(form_data, idempotency_key=None, client='203.0.113.7', by_content=True):
+    return submission_identity(form_data, idempotency_key, client, RETENTION, by_content)
+
+
+def test_content_dedupe_is_off_by_default():
+    assert settings.DEDUPE_BY_CONTENT is False
+
+
+def test_content_dedupe_is_opt_in():
+    first_key, dedupe_key = identity(SIGNED, by_content=False)
+    assert dedupe_key is None
+    assert identity(SIGNED, by_content=False)[0] != first_key
+
+
+def test_same_signed_payload_from_one_client_shares_a_key():
+    first, second = identity(SIGNED), identity(dict(SIGNED))
+    assert first == second
+    assert first[1] is not None
+
+
+@pytest.mark.parametrize('personal_info', [{}, {'name': 'Anon', 'email': ''}, {'name': 'Anon', 'email': '   '},
+                                           {'name': 'Anon', 'email': None}])
+def test_payloads_without_an_email_are_never_deduplicated(personal_info):
+    form_data = {'personalInfo': personal_info, 'responses': {}}
+    (first_key, first_dedupe), (second_key, second_dedupe) = identity(form_data), identity(form_data)
+    assert first_dedupe is None and second_dedupe is None
+    assert first_key != second_key
+
+
+def test_other_clients_and_answers_get_their_own_keys():
+    key = identity(SIGNED)[0]
+    assert identity(SIGNED, client='198.51.100.9')[0] != key
+    assert identity({**SIGNED, 'responses': {'blockers': {'answers': [{'value': 'no_time'}]}}})[0] != key
+
+
+def test_content_key_changes_with_the_retention_window(monkeypatch):
+    monkeypatch.setattr(submissions.time, 'time', lambda: 1000 * RETENTION)
+    key = identity(SIGNED)[0]
+    monkeypatch.setattr(submissions.time, 'time', lambda: 1001 * RETENTION)
+    assert identity(SIGNED)[0] != key
+
+
+def test_idempotency_key_wins_even_without_an_email():
+    anonymous = {'personalInfo': {'name': 'Anon'}}
+    expected = idempotency_submission_key('retry-1')
+    assert identity(anonymous, 'retry-1', by_content=False) == (expected, expected)
+    assert identity(SIGNED, 'retry-1') == (expected, expected)
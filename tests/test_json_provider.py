@@ -0,0 +1,131 @@
+"""FastJSONProvider must produce the documents Flask's DefaultJSONProvider does
+
+Bytes match too on the standard library path; orjson writes non-ASCII text
+as UTF-8 instead of \\u escapes, so there only the parsed documents match.
+"""
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import FastJSONProvider, Rows, orjson_available
+from submissions import TextExportEncoder, flatten_powerbi_rows
+
+COLUMNS = ['id', 'full_name', 'email', 'submission_date', 'average_score', 'notes']
+
+ROWS = [
+    (1, 'Ayesha Khan', 'ayesha@example.com', datetime(2025, 6, 1, 12, 30, 5), Decimal('3.5000'), None),
+    (2, 'Zoë Ålund', 'zoe@example.org', datetime(2025, 6, 2, 8, 0, 0), Decimal('0'), 'café, "quoted"'),
+    (3, 'محمد علي', '', datetime(2025, 6, 3, 23, 59, 59), Decimal('-1.25'), 'line\nbreak'),
+    (4, 'Plain Ascii', 'plain@example.com', None, None, '')
+]
+
+PROVIDERS = [
+    pytest.param(False, id='stdlib'),
+    pytest.param(True, id='orjson', marks=pytest.mark.skipif(not orjson_available(), reason='orjson not installed'))
+]
+
+
+def make_app(provider, **kwargs):
+    app = Flask(__name__)
+    app.json = provider(app, **kwargs)
+    return app
+
+
+def jsonify_body(app, document):
+    with app.app_context():
+        return app.json.response(document).get_data()
+
+
+def dict_rows(columns, rows):
+    return [dict(zip(columns, row)) for row in rows]
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return make_app(DefaultJSONProvider)
+
+
+@pytest.fixture(params=PROVIDERS)
+def candidate(request):
+    return make_app(FastJSONProvider, use_orjson=request.param)
+
+
+def assert_same_document(expected, actual, candidate):
+    assert json.loads(actual) == json.loads(expected)
+    if not candidate.json.use_orjson:
+        assert actual == expected
+
+
+def test_scalars_match(reference, candidate):
+    document = {
+        'datetime': datetime(2025, 6, 1, 12, 30, 5),
+        'date': date(2025, 6, 1),
+        'decimal': Decimal('3.1400'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'non_ascii': 'José Núñez, Ayşe Çelik, محمد',
+        'int_keys': {2: 'b', 1: 'a'},
+        'nested': [{'b': 1, 'a': [None, True, 1.5]}]
+    }
+    assert_same_document(jsonify_body(reference, document), jsonify_body(candidate, document), candidate)
+
+
+def test_non_ascii_is_valid_utf8(candidate):
+    body = jsonify_body(candidate, {'name': 'Zoë Ålund'})
+    assert json.loads(body.decode('utf-8')) == {'name': 'Zoë Ålund'}
+
+
+def test_rows_encode_like_dicts(reference, candidate):
+    expected = jsonify_body(reference, {'value': dict_rows(COLUMNS, ROWS)})
+    actual = jsonify_body(candidate, {'value': Rows(COLUMNS, ROWS)})
+    assert_same_document(expected, actual, candidate)
+
+
+def test_powerbi_rows_match(reference, candidate):
+    columns, rows, next_watermark = flatten_powerbi_rows(COLUMNS, ROWS, '')
+    assert next_watermark == {'since_id': 4}
+
+    expected_rows = dict_rows(COLUMNS, ROWS)
+    for row in expected_rows:
+        submitted = row['submission_date']
+        row['submission_date'] = submitted.date() if submitted else None
+        row['submission_time'] = submitted.strftime('%H:%M:%S') if submitted else None
+    expected = jsonify_body(reference, {'value': expected_rows, 'next_watermark': next_watermark})
+    actual = jsonify_body(candidate, {'value': Rows(columns, rows), 'next_watermark': next_watermark})
+    assert_same_document(expected, actual, candidate)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 3, 100])
+def test_streamed_export_matches_jsonify(reference, candidate, chunk_rows):
+    encoder = TextExportEncoder('json', COLUMNS, candidate.json.dumps)
+    chunks = [encoder.start()]
+    for start in range(0, len(ROWS), chunk_rows):
+        chunks.append(encoder.encode(ROWS[start:start + chunk_rows]))
+    chunks.append(encoder.finish())
+    streamed = json.loads(''.join(chunks))
+
+    expected = json.loads(jsonify_body(reference, {
+        'success': True,
+        'data': dict_rows(COLUMNS, ROWS),
+        'total_records': len(ROWS),
+        'export_date': streamed['export_date']
+    }))
+    assert streamed == expected
+
+
+@pytest.mark.parametrize('kwargs', [{}, {'indent': 4}, {'separators': (', ', ': ')}, {'sort_keys': False}])
+def test_dumps_options_match(reference, candidate, kwargs):
+    document = {'b': Decimal('1.10'), 'a': datetime(2025, 6, 1), 'c': 'Ålund'}
+    expected = reference.json.dumps(document, **kwargs)
+    actual = candidate.json.dumps(document, **kwargs)
+    assert json.loads(actual) == json.loads(expected)
+    if not candidate.json.use_orjson or kwargs.get('indent') == 4:
+        assert actual == expected
+
+
+def test_loads_round_trips(candidate):
+    assert candidate.json.loads('{"name": "Zoë", "n": [1, 2.5, null]}') == {'name': 'Zoë', 'n': [1, 2.5, None]}
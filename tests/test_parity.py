@@ -0,0 +1,180 @@
+"""flask_app (WSGI) and asgi_app (ASGI) must answer every route alike
+
+Both test clients share the SQLite database set up in conftest.py, so a row
+written through one app is read back through the other.
+"""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+import asgi_app
+import flask_app
+
+SUBMISSIONS = [
+    {
+        'personalInfo': {
+            'name': 'Ayesha Khan', 'gender': 'female', 'age': '25-34', 'city': 'lahore',
+            'email': 'ayesha@example.com', 'phone': '', 'occupation': 'student'
+        },
+        'responses': {
+            'frustrations': {'ratings': [{'title': 'No event buddies', 'value': 4}]},
+            'blockers': {'answers': [{'value': 'no_time'}, {'value': 'safety_concerns'}]},
+            'weekend': {'answers': [{'value': 'coffee_with_a_close_friend'}]}
+        }
+    },
+    {
+        'personalInfo': {
+            'name': 'Zoë Müller', 'gender': 'male', 'age': '18-24', 'city': 'karachi',
+            'email': 'zoe@example.org', 'phone': '', 'occupation': 'professional'
+        },
+        'responses': {
+            'frustrations': {'ratings': [{'title': 'No event buddies', 'value': 2}]},
+            'blockers': {'answers': [{'value': 'no_time'}]}
+        }
+    }
+]
+
+READ_PATHS = [
+    '/answers?limit=5',
+    '/answers?limit=1',
+    '/answers?limit=5&email=example&email_match=contains',
+    '/answers?limit=5&email=zoe@example.org&email_match=exact',
+    '/answers?limit=5&email_match=bad',
+    '/answers?after=not-a-cursor',
+    '/answers?include_total=false',
+    '/answers/1',
+    '/answers/999999999',
+    '/answers/summary',
+    '/answers/analytics?group=blockers',
+    '/answers/analytics?group=blockers&by=age',
+    '/answers/analytics?group=nope',
+    '/api/data/powerbi',
+    '/api/data/powerbi?since_id=1',
+    '/api/data/powerbi?since_id=x',
+    '/api/data/export?format=json',
+    '/api/data/export?format=csv'
+]
+
+
+def asgi_request(method, path, **kwargs):
+    """(status, headers, body) of one request through the Quart test client"""
+    async def send():
+        response = await asgi_app.app.test_client().open(path, method=method, **kwargs)
+        return response.status_code, response.headers, await response.get_data()
+    return asyncio.run(send())
+
+
+def flask_request(method, path, **kwargs):
+    response = flask_app.app.test_client().open(path, method=method, **kwargs)
+    return response.status_code, response.headers, response.get_data()
+
+
+def normalize(path, body):
+    if 'format=csv' in path:
+        return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+    document = json.loads(body)
+    if path.startswith('/api/data/export'):
+        document.pop('export_date')
+    return document
+
+
+def shape(value):
+    """Keys and value types, ignoring the values themselves"""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    return type(value).__name__
+
+
+@pytest.fixture(scope='module', autouse=True)
+def seeded():
+    """One submission written through each app"""
+    status, _, body = flask_request('POST', '/submit', json=SUBMISSIONS[0])
+    assert status == 200, body
+    status, _, body = asgi_request('POST', '/submit', json=SUBMISSIONS[1])
+    assert status == 200, body
+
+
+@pytest.mark.parametrize('path', READ_PATHS)
+def test_read_endpoints_match(path):
+    flask_status, flask_headers, flask_body = flask_request('GET', path)
+    asgi_status, asgi_headers, asgi_body = asgi_request('GET', path)
+    assert flask_status == asgi_status
+    assert normalize(path, flask_body) == normalize(path, asgi_body)
+    assert flask_headers.get('ETag') == asgi_headers.get('ETag')
+
+
+def test_rows_written_by_each_app_are_visible_to_both():
+    for request in (flask_request, asgi_request):
+        _, _, body = request('GET', '/answers?limit=10')
+        names = {row['full_name'] for row in json.loads(body)['data']}
+        assert names == {'Ayesha Khan', 'Zoë Müller'}
+
+
+def test_not_modified_matches():
+    _, headers, _ = flask_request('GET', '/answers/summary')
+    for request in (flask_request, asgi_request):
+        status, _, body = request('GET', '/answers/summary', headers={'If-None-Match': headers['ETag']})
+        assert status == 304
+        assert body == b''
+
+
+def test_gzip_export_matches():
+    flask_status, flask_headers, flask_body = flask_request('GET', '/api/data/export?format=csv',
+                                                            headers={'Accept-Encoding': 'gzip'})
+    asgi_status, asgi_headers, asgi_body = asgi_request('GET', '/api/data/export?format=csv',
+                                                        headers={'Accept-Encoding': 'gzip'})
+    assert flask_status == asgi_status == 200
+    assert flask_headers['Content-Encoding'] == asgi_headers['Content-Encoding'] == 'gzip'
+    assert flask_body == asgi_body
+
+
+@pytest.mark.parametrize('payload', [None, ['not', 'an', 'object'], {'personalInfo': {'name': 'a', 'favourite_colour': 'red'}}])
+def test_rejected_submissions_match(payload):
+    flask_status, _, flask_body = flask_request('POST', '/submit', json=payload)
+    asgi_status, _, asgi_body = asgi_request('POST', '/submit', json=payload)
+    assert flask_status == asgi_status == 400
+    assert json.loads(flask_body) == json.loads(asgi_body)
+
+
+def test_idempotency_key_is_shared_between_apps():
+    submission = dict(SUBMISSIONS[0], personalInfo=dict(SUBMISSIONS[0]['personalInfo'], name='Retry'))
+    headers = {'Idempotency-Key': 'parity-retry'}
+    flask_status, _, flask_body = flask_request('POST', '/submit', json=submission, headers=headers)
+    asgi_status, _, asgi_body = asgi_request('POST', '/submit', json=submission, headers=headers)
+    assert flask_status == asgi_status == 200
+    original, repeat = json.loads(flask_body), json.loads(asgi_body)
+    assert repeat['duplicate'] is True
+    assert (repeat['submission_id'], repeat['submission_key']) == (original['submission_id'],
+                                                                   original['submission_key'])
+
+    status, _, body = asgi_request('POST', '/submit', json=submission, headers={'Idempotency-Key': ''})
+    assert status == 400
+    assert json.loads(body) == json.loads(flask_request('POST', '/submit', json=submission,
+                                                        headers={'Idempotency-Key': ''})[2])
+
+
+def test_new_submissions_match_in_shape():
+    flask_status, _, flask_body = flask_request('POST', '/submit', json=SUBMISSIONS[1],
+                                                headers={'Idempotency-Key': 'parity-shape-wsgi'})
+    asgi_status, _, asgi_body = asgi_request('POST', '/submit', json=SUBMISSIONS[1],
+                                             headers={'Idempotency-Key': 'parity-shape-asgi'})
+    assert flask_status == asgi_status == 200
+    assert shape(json.loads(flask_body)) == shape(json.loads(asgi_body))
+
+
+def test_asgi_exports_beyond_their_slots_are_shed():
+    held = 0
+    while asgi_app.export_slots.acquire(blocking=False):
+        held += 1
+    try:
+        status, headers, body = asgi_request('GET', '/api/data/export?format=csv')
+        assert status == 503
+        assert headers['Retry-After'] == '1'
+        assert json.loads(body)['success'] is False
+    finally:
+        for _ in range(held):
+            asgi_app.export_slots.release()
+    assert asgi_request('GET', '/api/data/export?format=csv')[0] == 200
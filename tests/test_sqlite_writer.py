@@ -0,0 +1,60 @@
+"""SQLiteWriter timeouts: only writes that will never run are reported as failed"""
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from sqlite_writer import SQLiteWriter, WriterUnavailable
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'writer.db')
+
+
+@pytest.fixture
+def writer(path):
+    setup = sqlite3.connect(path)
+    setup.execute("CREATE TABLE items (name TEXT)")
+    setup.close()
+    writer = SQLiteWriter(lambda: sqlite3.connect(path, isolation_level=None, check_same_thread=False),
+                          timeout=0.1)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def stored_names(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(name for name, in conn.execute("SELECT name FROM items"))
+    finally:
+        conn.close()
+
+
+def insert(name, delay=0.0, started=None):
+    def work(cursor):
+        if started is not None:
+            started.set()
+        time.sleep(delay)
+        cursor.execute("INSERT INTO items (name) VALUES (?)", (name,))
+        return name
+    return work
+
+
+def test_running_write_past_the_timeout_still_returns_its_result(writer, path):
+    assert writer.write(insert('slow', delay=0.3)) == 'slow'
+    assert stored_names(path) == ['slow']
+
+
+def test_queued_write_past_the_timeout_is_withdrawn(writer, path):
+    started = threading.Event()
+    slow = threading.Thread(target=writer.write, args=(insert('slow', delay=0.3, started=started),))
+    slow.start()
+    started.wait()
+    with pytest.raises(WriterUnavailable):
+        writer.write(insert('queued'))
+    slow.join()
+    time.sleep(0.1)
+    assert stored_names(path) == ['slow']
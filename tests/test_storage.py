@@ -0,0 +1,148 @@
+"""ResponseRepository against a fresh SQLite file per test (the repository fixture in conftest.py)"""
+import random
+import sqlite3
+import uuid
+from datetime import datetime, timedelta
+
+import pymysql
+import pytest
+
+from benchmarks.payloads import generate_submission
+from db_pool import PoolTimeout
+from sqlite_writer import WriterUnavailable
+from storage import is_unavailable
+from submissions import (INSERT_COLUMNS, build_submission_row, decode_page_cursor, encode_page_cursor,
+                         flatten_powerbi_rows)
+
+
+def submission_rows(count, seed=0):
+    rng = random.Random(seed)
+    return [build_submission_row(generate_submission(rng), uuid.uuid4().hex) for _ in range(count)]
+
+
+def read(repository, work, *args):
+    conn = repository.connect()
+    cursor = conn.cursor()
+    try:
+        return work(cursor, *args)
+    finally:
+        cursor.close()
+
+
+def test_late_inserts_keep_the_request_time_submission_date(repository):
+    # A spooled or write-behind row reaches the database long after the request that built it
+    requested = datetime.now().replace(microsecond=0) - timedelta(hours=1)
+    late, single = [with_date(row, requested) for row in submission_rows(2)]
+
+    repository.save_submissions([late])
+    response_id = repository.save_submission(single)
+
+    stored = read(repository, repository.list_responses, None, None, 10, 0)
+    assert {row['submission_date'] for row in stored} == {requested}
+    assert read(repository, repository.get_response, response_id)['submission_date'] == requested
+
+
+def powerbi_poll(repository, since_id, overlap):
+    """(ids returned, next since_id) of one Power BI delta poll"""
+    query, params = repository.powerbi_query(since_id, '', overlap)
+    conn = repository.connect()
+    cursor = repository.tuple_cursor(conn)
+    try:
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        columns, rows, next_watermark = flatten_powerbi_rows(columns, cursor.fetchall(), since_id)
+    finally:
+        cursor.close()
+    id_index = columns.index('id')
+    return [row[id_index] for row in rows], next_watermark['since_id']
+
+
+def execute(repository, sql, args=None):
+    conn = repository.connect()
+    cursor = conn.cursor()
+    cursor.execute(sql, args)
+    conn.commit()
+    cursor.close()
+
+
+@pytest.mark.parametrize('overlap, redelivered', [(0, False), (5, True)])
+def test_powerbi_delta_rereads_ids_that_commit_late(repository, overlap, redelivered):
+    repository.save_submissions(submission_rows(3))
+    # Id 2 is handed out before id 3 but its transaction has not committed when the client first polls
+    execute(repository, "DELETE FROM desirability_form_responses WHERE id = 2")
+    ids, since_id = powerbi_poll(repository, '', overlap)
+    assert (ids, since_id) == ([3, 1], 3)
+
+    execute(repository, "INSERT INTO desirability_form_responses (id, full_name, submission_key) VALUES (2, %s, %s)",
+            ('Late Commit', uuid.uuid4().hex))
+    ids, since_id = powerbi_poll(repository, str(since_id), overlap)
+    assert since_id == 3
+    assert ids == ([1, 2, 3] if redelivered else [])
+
+
+@pytest.mark.parametrize('error, unavailable', [
+    (pymysql.OperationalError(2003, "Can't connect to MySQL server"), True),
+    (pymysql.OperationalError(2006, 'MySQL server has gone away'), True),
+    (pymysql.OperationalError(1040, 'Too many connections'), True),
+    (pymysql.OperationalError(1213, 'Deadlock found when trying to get lock'), True),
+    (PoolTimeout(2013, 'Timed out waiting for a database connection'), True),
+    (pymysql.OperationalError(1054, "Unknown column 'x' in 'field list'"), False),
+    (pymysql.OperationalError(1142, 'INSERT command denied to user'), False),
+    (pymysql.IntegrityError(1062, 'Duplicate entry'), False),
+    (WriterUnavailable('SQLite writer did not commit within 5.0s'), True),
+    (sqlite3.OperationalError('no such column: x'), False),
+])
+def test_only_connection_and_contention_errors_are_unavailable(error, unavailable):
+    assert is_unavailable(error) is unavailable
+
+
+def test_locked_sqlite_database_is_unavailable(tmp_path):
+    path = str(tmp_path / 'locked.db')
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("CREATE TABLE t (x)")
+    holder.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError) as raised:
+            sqlite3.connect(path, timeout=0).execute("INSERT INTO t VALUES (1)")
+        assert is_unavailable(raised.value)
+    finally:
+        holder.rollback()
+
+
+def with_date(row, submission_date):
+    date_index = INSERT_COLUMNS.index('submission_date')
+    return row[:date_index] + (submission_date,) + row[date_index + 1:]
+
+
+def page_through(repository, limit):
+    """Ids of every /answers row, read page by page with keyset cursors"""
+    ids = []
+    after_key = None
+    while True:
+        page = read(repository, repository.list_responses, None, after_key, limit, 0)
+        ids.extend(row['id'] for row in page)
+        if len(page) < limit:
+            return ids
+        after_key = decode_page_cursor(encode_page_cursor(page[-1]))
+
+
+@pytest.mark.parametrize('limit', [1, 2, 3, 10])
+def test_keyset_pages_cover_ties_and_missing_dates(repository, limit):
+    tied = datetime(2025, 6, 1, 12, 0, 0)
+    dates = [tied, datetime(2025, 6, 2), tied, None, tied, None, datetime(2025, 5, 1)]
+    repository.save_submissions([with_date(row, date) for row, date in zip(submission_rows(len(dates)), dates)])
+
+    # Newest first, ties broken by id, and rows without a date last
+    assert page_through(repository, limit) == [2, 5, 3, 1, 7, 6, 4]
+
+
+@pytest.mark.parametrize('submission_date', [datetime(2025, 6, 1, 12, 30, 5, 123456), None])
+def test_page_cursor_round_trips(submission_date):
+    token = encode_page_cursor({'submission_date': submission_date, 'id': 42})
+    assert decode_page_cursor(token) == (submission_date, 42)
+
+
+@pytest.mark.parametrize('token', ['', 'not-a-cursor', 'WzEsMl0', 'WyJub3QgYSBkYXRlIiwgMV0'])
+def test_malformed_page_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_page_cursor(token)
@@ -0,0 +1,66 @@
+"""SubmissionQueue write-behind flushing, against an in-memory writer"""
+import sqlite3
+
+import pymysql
+
+from storage import is_unavailable
+from submission_queue import SubmissionQueue
+
+
+class FakeWriter:
+    """Stores rows like insert_submissions, failing for poison rows or while `down` is set"""
+
+    def __init__(self, poison=()):
+        self.poison = set(poison)
+        self.down = False
+        self.rows = []
+
+    def __call__(self, rows):
+        if self.down:
+            raise pymysql.OperationalError(2003, "Can't connect to MySQL server")
+        if self.poison.intersection(rows):
+            raise pymysql.OperationalError(1054, "Unknown column 'x' in 'field list'")
+        self.rows.extend(rows)
+
+
+def drain(submission_queue, rows):
+    submission_queue.start()
+    for row in rows:
+        submission_queue.submit(row)
+    submission_queue.stop()
+    return submission_queue.stats()
+
+
+def test_poison_row_is_dropped_without_blocking_the_rest():
+    writer = FakeWriter(poison={'bad'})
+    submission_queue = SubmissionQueue(writer, batch_size=10, flush_interval=0.05, retryable=is_unavailable)
+    stats = drain(submission_queue, ['a', 'bad', 'b', 'c'])
+    assert writer.rows == ['a', 'b', 'c']
+    assert stats['dropped_rows'] == 1
+    assert stats['pending'] == 0
+
+
+def test_unavailable_batch_is_kept_and_retried():
+    writer = FakeWriter()
+    writer.down = True
+    submission_queue = SubmissionQueue(writer, batch_size=10, flush_interval=0.01, retryable=is_unavailable)
+    batch = ['a', 'b']
+    assert submission_queue._flush(batch) == batch
+    writer.down = False
+    assert submission_queue._flush(batch) == []
+    assert writer.rows == ['a', 'b']
+    assert submission_queue.stats()['dropped_rows'] == 0
+
+
+def test_salvage_stops_when_the_database_goes_away():
+    writer = FakeWriter(poison={'bad'})
+    submission_queue = SubmissionQueue(writer, retryable=is_unavailable)
+
+    def writer_down_after_bad(rows):
+        if rows == ['c']:
+            raise sqlite3.OperationalError('database is locked')
+        writer(rows)
+
+    submission_queue.writer = writer_down_after_bad
+    assert submission_queue._flush(['a', 'bad', 'c', 'd']) == ['c', 'd']
+    assert writer.rows == ['a']
@@ -0,0 +1,75 @@
+"""validate_submission: what /submit accepts and the messages it rejects with"""
+import random
+
+import pytest
+
+from benchmarks.payloads import generate_submission
+from form_options import ANSWER_OPTIONS, max_selections
+from submission_schema import MAX_LABEL_LENGTH, validate_submission
+
+
+def test_generated_submissions_are_valid():
+    rng = random.Random(0)
+    for _ in range(50):
+        assert validate_submission(generate_submission(rng)) == []
+
+
+@pytest.mark.parametrize('form_data', [{}, {'personalInfo': {}}, {'personalInfo': {'gender': ''}}, {'responses': {}}])
+def test_partial_submissions_are_valid(form_data):
+    assert validate_submission(form_data) == []
+
+
+@pytest.mark.parametrize('form_data, error', [
+    (None, "Request body must be a JSON object"),
+    (['not', 'an', 'object'], "Request body must be a JSON object"),
+    ({'extra': 1}, "body: unexpected field(s) extra"),
+    ({'personalInfo': 'Ayesha'}, "personalInfo: must be an object"),
+    ({'personalInfo': {'fullName': 'Ayesha'}}, "personalInfo: unexpected field(s) fullName"),
+    ({'personalInfo': {'name': 42}}, "personalInfo.name: must be a string, got a value of type int"),
+    ({'personalInfo': {'phone': '0' * 21}}, "personalInfo.phone: longer than 20 characters"),
+    ({'personalInfo': {'occupation': 'engineer'}},
+     "personalInfo.occupation: 'engineer' is not one of the form's options"),
+    ({'responses': []}, "responses: must be an object"),
+    ({'responses': {'nope': {}}}, "responses: unexpected field(s) nope"),
+    ({'responses': {'blockers': []}}, "responses.blockers: must be an object"),
+    ({'responses': {'blockers': {'answers': {}}}}, "responses.blockers.answers: must be a list"),
+    ({'responses': {'blockers': {'answers': [{'value': 'bored'}]}}},
+     "responses.blockers.answers[0].value: 'bored' is not one of the blockers options"),
+    ({'responses': {'blockers': {'answers': [{'value': 'no_time'}, {'value': 'no_time'}]}}},
+     "responses.blockers.answers[1].value: 'no_time' is selected more than once"),
+    ({'responses': {'blockers': {'answers': [{'value': 'no_time', 'score': 1}]}}},
+     "responses.blockers.answers[0]: unexpected field(s) score"),
+    ({'responses': {'blockers': {'question': 'x' * (MAX_LABEL_LENGTH + 1)}}},
+     f"responses.blockers.question: must be a string of at most {MAX_LABEL_LENGTH} characters"),
+    ({'responses': {'frustrations': {'ratings': [{'title': 'Bad commute', 'value': 1}]}}},
+     "responses.frustrations.ratings[0].title: 'Bad commute' is not one of the rated struggles"),
+    ({'responses': {'frustrations': {'ratings': [{'title': 'No event buddies', 'value': 6}]}}},
+     "responses.frustrations.ratings[0].value: must be a whole number from 0 to 5"),
+    ({'responses': {'frustrations': {'ratings': [{'title': 'No event buddies', 'value': True}]}}},
+     "responses.frustrations.ratings[0].value: must be a whole number from 0 to 5"),
+    ({'responses': {'frustrations': {'ratings': [{'title': 'No event buddies'}, {'title': 'No event buddies'}]}}},
+     "responses.frustrations.ratings[1].title: 'No event buddies' is rated more than once"),
+])
+def test_invalid_submissions_are_rejected(form_data, error):
+    assert validate_submission(form_data) == [error]
+
+
+def test_too_many_selections_are_rejected():
+    limit = max_selections('weekend')
+    answers = [{'value': value} for value in list(ANSWER_OPTIONS['weekend'])[:limit + 1]]
+    assert validate_submission({'responses': {'weekend': {'answers': answers}}}) == [
+        f"responses.weekend.answers: at most {limit} selection(s) allowed, got {limit + 1}"
+    ]
+
+
+def test_every_error_is_reported():
+    errors = validate_submission({
+        'personalInfo': {'gender': 'robot', 'city': 7},
+        'responses': {'blockers': {'answers': [{'value': 'bored'}]}}
+    })
+    assert len(errors) == 3
+
+
+def test_long_values_are_not_echoed_back():
+    [error] = validate_submission({'responses': {'blockers': {'answers': [{'value': 'x' * 100}]}}})
+    assert error == "responses.blockers.answers[0].value: a value of type str is not one of the blockers options"
@@ -0,0 +1,132 @@
+"""SubmissionSpool replay into a SQLite repository, retrying outages and dead-lettering rejected rows"""
+import random
+import sqlite3
+import uuid
+
+import pymysql
+import pytest
+
+from benchmarks.payloads import generate_submission
+from storage import is_unavailable
+from submission_spool import SubmissionSpool
+from submissions import INSERT_COLUMNS, SUBMISSION_KEY_INDEX, build_submission_row
+
+
+class FlakyWriter:
+    """repository.save_submissions, unavailable while `down` is set and rejecting rows whose key is poisoned"""
+
+    def __init__(self, repository):
+        self.repository = repository
+        self.down = False
+        self.poison = set()
+        self.calls = 0
+
+    def __call__(self, rows):
+        self.calls += 1
+        if self.down:
+            raise pymysql.OperationalError(2003, "Can't connect to MySQL server")
+        if any(row[SUBMISSION_KEY_INDEX] in self.poison for row in rows):
+            raise pymysql.OperationalError(1054, "Unknown column 'x' in 'field list'")
+        return self.repository.save_submissions(rows)
+
+
+@pytest.fixture
+def writer(repository):
+    return FlakyWriter(repository)
+
+
+@pytest.fixture
+def spool(tmp_path, writer):
+    spool = SubmissionSpool(str(tmp_path / 'spool.db'), writer, batch_size=10, retryable=is_unavailable)
+    yield spool
+    spool.stop()
+
+
+def spool_rows(spool, count):
+    rng = random.Random(count)
+    rows = [build_submission_row(generate_submission(rng), uuid.uuid4().hex) for _ in range(count)]
+    for row in rows:
+        spool.append(row[SUBMISSION_KEY_INDEX], row)
+    return rows
+
+
+def stored_keys(repository):
+    conn = repository.connect()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT submission_key FROM desirability_form_responses")
+        return {row['submission_key'] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def dead_letters(spool):
+    return dict(spool._conn.execute("SELECT submission_key, error FROM submission_dead_letter").fetchall())
+
+
+def test_rows_stay_spooled_while_the_database_is_unavailable(spool, writer, repository):
+    rows = spool_rows(spool, 3)
+    writer.down = True
+    with pytest.raises(pymysql.OperationalError):
+        spool.replay_once()
+    assert spool.depth() == 3
+
+    writer.down = False
+    assert spool.replay_once() == 3
+    assert spool.depth() == 0
+    assert stored_keys(repository) == {row[SUBMISSION_KEY_INDEX] for row in rows}
+
+
+def test_replay_never_duplicates_a_row_already_stored(spool, repository):
+    rows = spool_rows(spool, 2)
+    repository.save_submissions(rows[:1])
+    # Spooled again after a replay committed but before it cleared the spool
+    spool.append(rows[0][SUBMISSION_KEY_INDEX], rows[0])
+    spool.replay_once()
+    assert spool.depth() == 0
+    assert stored_keys(repository) == {row[SUBMISSION_KEY_INDEX] for row in rows}
+    conn = repository.connect()
+    cursor = conn.cursor()
+    assert repository.count_responses(cursor) == 2
+    cursor.close()
+
+
+def test_rejected_rows_are_dead_lettered_and_the_rest_replayed(spool, writer, repository):
+    rows = spool_rows(spool, 4)
+    poisoned = rows[1][SUBMISSION_KEY_INDEX]
+    writer.poison.add(poisoned)
+
+    assert spool.replay_once() == 3
+    assert spool.depth() == 0
+    assert stored_keys(repository) == {row[SUBMISSION_KEY_INDEX] for row in rows} - {poisoned}
+    assert list(dead_letters(spool)) == [poisoned]
+    assert 'Unknown column' in dead_letters(spool)[poisoned]
+    assert spool.stats()['dead_letters'] == 1
+
+
+def test_outage_during_row_by_row_replay_keeps_the_remaining_rows(spool, writer, repository):
+    rows = spool_rows(spool, 4)
+    writer.poison.add(rows[0][SUBMISSION_KEY_INDEX])
+    save = writer.repository.save_submissions
+
+    def save_then_fail(batch):
+        if batch[0][SUBMISSION_KEY_INDEX] == rows[2][SUBMISSION_KEY_INDEX]:
+            raise sqlite3.OperationalError('database is locked')
+        return save(batch)
+
+    writer.repository = type('Repository', (), {'save_submissions': staticmethod(save_then_fail)})
+    with pytest.raises(sqlite3.OperationalError):
+        spool.replay_once()
+    assert list(dead_letters(spool)) == [rows[0][SUBMISSION_KEY_INDEX]]
+    assert stored_keys(repository) == {rows[1][SUBMISSION_KEY_INDEX]}
+    assert spool.depth() == 2
+
+
+def test_replayed_rows_keep_their_request_time(spool, repository):
+    [row] = spool_rows(spool, 1)
+    spool.replay_once()
+    conn = repository.connect()
+    cursor = conn.cursor()
+    [stored] = repository.list_responses(cursor, None, None, 1, 0)
+    cursor.close()
+    assert stored['submission_date'] == row[INSERT_COLUMNS.index('submission_date')]
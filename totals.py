@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class RowCounter:
+    """In-process row total, bumped on insert and re-read from the database periodically
+
+    `load` callables passed to get() run the real COUNT(*); they are only
+    invoked when the counter is empty or older than refresh_interval seconds.
+    """
+
+    def __init__(self, refresh_interval=300):
+        self.refresh_interval = refresh_interval
+        self._value = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.refreshes = 0
+
+    def get(self, load):
+        value = self.peek()
+        if value is None:
+            value = load()
+            self.set(value)
+        return value
+
+    def peek(self):
+        """The current total, or None when it has to be re-read"""
+        with self._lock:
+            if self._value is not None and time.monotonic() - self._loaded_at < self.refresh_interval:
+                return self._value
+        return None
+
+    def set(self, value):
+        """Store a freshly counted total (for callers that cannot pass a synchronous `load`)"""
+        with self._lock:
+            self._value = value
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def add(self, count=1):
+        """Account for rows this process just committed"""
+        with self._lock:
+            if self._value is not None:
+                self._value += count
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+
+class TTLCache:
+    """Small thread-safe cache whose entries expire after `ttl` seconds (oldest evicted first)"""
+
+    def __init__(self, ttl=60, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        value = self.peek(key)
+        if value is None:
+            value = load()
+            self.set(key, value)
+        return value
+
+    def peek(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+        return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()